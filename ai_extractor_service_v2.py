@@ -7,11 +7,9 @@ AI抽取器微服务 v2.0 - 支持GLM和DeepSeek多模型容灾
 import os
 import sys
 import json
-import hashlib
 import logging
 import time
-from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass, asdict
+from typing import List, Dict, Any, Optional
 import asyncio
 import re
 from fastapi import FastAPI, HTTPException
@@ -93,6 +91,24 @@ class ExtractResponse(BaseModel):
     hits: List[ExtractHit] = Field(default_factory=list, description="抽取结果")
     meta: Dict[str, Any] = Field(default_factory=dict, description="元数据")
 
+class ExtractBatchItem(BaseModel):
+    section_text: str = Field(..., description="（三）小节全文")
+    doc_hash: str = Field(..., description="文档哈希")
+
+class ExtractBatchRequest(BaseModel):
+    task: str = Field(..., description="任务类型，固定为 R33110_pairs_v1_batch")
+    items: List[ExtractBatchItem] = Field(..., description="待抽取的小节列表")
+    language: str = Field(default="zh", description="语言")
+    max_windows: int = Field(default=3, description="每个小节的最大窗口数")
+
+class ExtractBatchResult(ExtractResponse):
+    error: Optional[str] = Field(None, description="该小节抽取失败时的错误信息")
+
+class ExtractBatchResponse(BaseModel):
+    results: List[ExtractBatchResult] = Field(
+        default_factory=list, description="与 items 一一对应的抽取结果"
+    )
+
 # ==================== AI客户端 ====================
 class AIExtractorClient:
     """AI抽取器客户端，使用新的AI客户端v2"""
@@ -250,7 +266,8 @@ class AIExtractorClient:
 ai_extractor = AIExtractorClient()
 
 # ==================== 滑窗处理 ====================
-def create_sliding_windows(text: str, window_size: int = WINDOW_SIZE, overlap: int = OVERLAP_SIZE) -> List[str]:
+def create_sliding_windows(text: str, window_size: int = WINDOW_SIZE,
+                           overlap: int = OVERLAP_SIZE) -> List[str]:
     """创建滑窗"""
     if len(text) <= window_size:
         return [text]
@@ -274,12 +291,13 @@ def adjust_spans_for_window(pairs: List[Dict[str, Any]], window_start: int) -> L
     adjusted_pairs = []
     for pair in pairs:
         adjusted_pair = pair.copy()
-        adjusted_pair["budget_span"] = [pair["budget_span"][0] + window_start, pair["budget_span"][1] + window_start]
-        adjusted_pair["final_span"] = [pair["final_span"][0] + window_start, pair["final_span"][1] + window_start]
-        adjusted_pair["stmt_span"] = [pair["stmt_span"][0] + window_start, pair["stmt_span"][1] + window_start]
+        for key in ("budget_span", "final_span", "stmt_span"):
+            adjusted_pair[key] = [pair[key][0] + window_start, pair[key][1] + window_start]
         
         if pair.get("reason_span"):
-            adjusted_pair["reason_span"] = [pair["reason_span"][0] + window_start, pair["reason_span"][1] + window_start]
+            adjusted_pair["reason_span"] = [
+                pair["reason_span"][0] + window_start, pair["reason_span"][1] + window_start
+            ]
         
         adjusted_pairs.append(adjusted_pair)
     
@@ -312,103 +330,122 @@ def create_clip(text: str, spans: List[List[int]], max_length: int = MAX_CLIP_LE
     return clip
 
 # ==================== API端点 ====================
-@app.post("/ai/extract/v1", response_model=ExtractResponse)
-async def extract_v1(request: ExtractRequest):
-    """AI信息抽取接口 v1.0"""
+async def _extract_section(section_text: str, max_windows: int) -> ExtractResponse:
+    """对单个小节执行滑窗抽取"""
+    section_text = section_text.strip()
     
-    try:
-        section_text = request.section_text.strip()
-        
-        # 检查空文本
-        if not section_text:
-            logger.warning("收到空文本请求")
-            return ExtractResponse(hits=[], meta={"model": "none", "cached": False})
+    # 检查空文本
+    if not section_text:
+        logger.warning("收到空文本请求")
+        return ExtractResponse(hits=[], meta={"model": "none", "cached": False})
+    
+    # 滑窗处理
+    windows = create_sliding_windows(section_text, WINDOW_SIZE, OVERLAP_SIZE)
+    all_pairs = []
+    window_start = 0
+    
+    for i, window in enumerate(windows[:max_windows]):
+        logger.info(f"处理窗口 {i+1}/{min(len(windows), max_windows)}, 长度: {len(window)}")
         
-        # 缓存检查
-        doc_hash = request.doc_hash
-        cache_key = f"extract_v1_{hashlib.md5(section_text.encode()).hexdigest()}"
+        # AI抽取
+        pairs = await ai_extractor.extract_pairs(window)
         
-        # 滑窗处理
-        windows = create_sliding_windows(section_text, WINDOW_SIZE, OVERLAP_SIZE)
-        all_pairs = []
-        window_start = 0
+        # 调整span到全文坐标
+        if pairs:
+            adjusted_pairs = adjust_spans_for_window(pairs, window_start)
+            all_pairs.extend(adjusted_pairs)
         
-        for i, window in enumerate(windows[:request.max_windows]):
-            logger.info(f"处理窗口 {i+1}/{min(len(windows), request.max_windows)}, 长度: {len(window)}")
+        # 更新窗口起始位置
+        if i < len(windows) - 1:
+            window_start += WINDOW_SIZE - OVERLAP_SIZE
+    
+    # 去重和后处理
+    unique_pairs = []
+    seen_spans = set()
+    
+    for pair in all_pairs:
+        span_key = tuple(pair["budget_span"] + pair["final_span"])
+        if span_key not in seen_spans:
+            seen_spans.add(span_key)
             
-            # AI抽取
-            pairs = await ai_extractor.extract_pairs(window)
+            # 创建clip
+            spans = [pair["budget_span"], pair["final_span"], pair["stmt_span"]]
+            if pair.get("reason_span"):
+                spans.append(pair["reason_span"])
             
-            # 调整span到全文坐标
-            if pairs:
-                adjusted_pairs = adjust_spans_for_window(pairs, window_start)
-                all_pairs.extend(adjusted_pairs)
+            clip = create_clip(section_text, spans)
+            pair["clip"] = clip
             
-            # 更新窗口起始位置
-            if i < len(windows) - 1:
-                window_start += WINDOW_SIZE - OVERLAP_SIZE
-        
-        # 去重和后处理
-        unique_pairs = []
-        seen_spans = set()
-        
-        for pair in all_pairs:
-            span_key = tuple(pair["budget_span"] + pair["final_span"])
-            if span_key not in seen_spans:
-                seen_spans.add(span_key)
-                
-                # 创建clip
-                spans = [pair["budget_span"], pair["final_span"], pair["stmt_span"]]
-                if pair.get("reason_span"):
-                    spans.append(pair["reason_span"])
-                
-                clip = create_clip(section_text, spans)
-                pair["clip"] = clip
-                
-                unique_pairs.append(pair)
-        
-        # 转换为ExtractHit对象
-        hits = []
-        for pair in unique_pairs:
-            hit = ExtractHit(
-                budget_text=pair["budget_text"],
-                budget_span=pair["budget_span"],
-                final_text=pair["final_text"],
-                final_span=pair["final_span"],
-                stmt_text=pair["stmt_text"],
-                stmt_span=pair["stmt_span"],
-                reason_text=pair.get("reason_text"),
-                reason_span=pair.get("reason_span"),
-                item_title=pair.get("item_title"),
-                clip=pair["clip"]
-            )
-            hits.append(hit)
-        
-        # 统计信息
-        estimated_tokens = len(section_text) * 1.5  # 估算token数
-        hit_count = len(hits)
-        
-        # 获取模型信息
-        status = ai_extractor.ai_client.get_model_status()
-        model_info = "AI_v2_fallback" if not status["valid"] else "AI_v2_multi_model"
-        
-        logger.info(f"抽取完成 - 窗口数: {len(windows)}, "
-                   f"估算tokens: {int(estimated_tokens)}, 命中数: {hit_count}, 模型: {model_info}")
-        
-        return ExtractResponse(
-            hits=hits,
-            meta={
-                "model": model_info, 
-                "cached": False,
-                "windows": len(windows),
-                "estimated_tokens": int(estimated_tokens),
-                "hit_count": hit_count
-            }
+            unique_pairs.append(pair)
+    
+    # 转换为ExtractHit对象
+    hits = []
+    for pair in unique_pairs:
+        hit = ExtractHit(
+            budget_text=pair["budget_text"],
+            budget_span=pair["budget_span"],
+            final_text=pair["final_text"],
+            final_span=pair["final_span"],
+            stmt_text=pair["stmt_text"],
+            stmt_span=pair["stmt_span"],
+            reason_text=pair.get("reason_text"),
+            reason_span=pair.get("reason_span"),
+            item_title=pair.get("item_title"),
+            clip=pair["clip"]
         )
+        hits.append(hit)
+    
+    # 统计信息
+    estimated_tokens = len(section_text) * 1.5  # 估算token数
+    hit_count = len(hits)
+    
+    # 获取模型信息
+    status = ai_extractor.ai_client.get_model_status()
+    model_info = "AI_v2_fallback" if not status["valid"] else "AI_v2_multi_model"
+    
+    logger.info(f"抽取完成 - 窗口数: {len(windows)}, "
+               f"估算tokens: {int(estimated_tokens)}, 命中数: {hit_count}, 模型: {model_info}")
+    
+    return ExtractResponse(
+        hits=hits,
+        meta={
+            "model": model_info, 
+            "cached": False,
+            "windows": len(windows),
+            "estimated_tokens": int(estimated_tokens),
+            "hit_count": hit_count
+        }
+    )
+
+@app.post("/ai/extract/v1", response_model=ExtractResponse)
+async def extract_v1(request: ExtractRequest):
+    """AI信息抽取接口 v1.0"""
+    
+    try:
+        return await _extract_section(request.section_text, request.max_windows)
         
     except Exception as e:
         logger.error(f"抽取失败: {e}")
-        raise HTTPException(status_code=500, detail=f"抽取失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"抽取失败: {str(e)}") from e
+
+@app.post("/ai/extract/v1/batch", response_model=ExtractBatchResponse)
+async def extract_v1_batch(request: ExtractBatchRequest):
+    """批量抽取接口：一次请求处理多个小节，结果按 items 顺序返回"""
+    
+    # 单个小节失败只影响该小节，其余结果照常返回
+    outputs = await asyncio.gather(*(
+        _extract_section(item.section_text, request.max_windows)
+        for item in request.items
+    ), return_exceptions=True)
+    
+    results = []
+    for output in outputs:
+        if isinstance(output, Exception):
+            logger.error(f"批量抽取中的小节失败: {output}")
+            results.append(ExtractBatchResult(error=f"抽取失败: {str(output)}"))
+        else:
+            results.append(ExtractBatchResult(hits=output.hits, meta=output.meta))
+    return ExtractBatchResponse(results=results)
 
 @app.get("/health")
 async def health_check():
@@ -440,6 +477,7 @@ async def root():
         "version": "2.0.0",
         "endpoints": [
             "/ai/extract/v1 (POST)",
+            "/ai/extract/v1/batch (POST)",
             "/health (GET)"
         ]
     }
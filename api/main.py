@@ -26,7 +26,6 @@ except ImportError:
                         os.environ.setdefault(key.strip(), value.strip())
     load_env_file()
 
-import pdfplumber  # ✅ 新增：读取 PDF
 from fastapi import FastAPI, UploadFile, File, HTTPException, Request, BackgroundTasks
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
@@ -38,7 +37,7 @@ if _ROOT not in _sys.path:
     _sys.path.insert(0, _ROOT)
 
 # 直接使用引擎暴露的构建与包装函数
-from engine.pipeline import build_document, build_issues_payload
+from engine.pipeline import build_document, build_issues_payload, extract_pdf_pages
 from api.config import AppConfig
 
 # 新增：双模式分析服务
@@ -119,35 +118,6 @@ def _find_first_pdf(job_dir: Path) -> Path:
         raise FileNotFoundError("未在该 job 目录下找到 PDF 文件")
     return pdfs[0]
 
-def _extract_tables_from_page(page) -> List[List[List[str]]]:
-    """
-    读取单页表格，返回：该页的多张表；每张表是 2D 数组（行→列）
-    （和引擎里的逻辑一致，先用线策略，再退回默认）
-    """
-    tables: List[List[List[str]]] = []
-    try:
-        t1 = page.extract_tables(table_settings={
-            "vertical_strategy": "lines",
-            "horizontal_strategy": "lines",
-            "intersection_tolerance": 3,
-            "min_words_vertical": 1,
-            "min_words_horizontal": 1,
-        }) or []
-        tables += t1
-    except Exception:
-        pass
-    try:
-        if not tables:
-            t2 = page.extract_tables() or []
-            tables += t2
-    except Exception:
-        pass
-
-    norm_tables: List[List[List[str]]] = []
-    for tb in tables:
-        norm_tables.append([[("" if c is None else str(c)).strip() for c in row] for row in (tb or [])])
-    return norm_tables
-
 async def _run_pipeline(job_dir: Path) -> None:
     """
     真正的解析管线：
@@ -208,12 +178,10 @@ async def _run_pipeline(job_dir: Path) -> None:
             "stage": "解析PDF内容"
         })
         
-        page_texts: List[str] = []
-        page_tables: List[List[List[List[str]]]] = []
-        with pdfplumber.open(str(pdf_path)) as pdf:
-            for p in pdf.pages:
-                page_texts.append(p.extract_text() or "")
-                page_tables.append(_extract_tables_from_page(p))
+        page_texts: List[str]
+        page_tables: List[List[List[List[str]]]]
+        # PDF 解析是阻塞的 CPU/IO 操作，放到线程里执行，避免卡住事件循环上的其他任务
+        page_texts, page_tables = await asyncio.to_thread(extract_pdf_pages, str(pdf_path))
         filesize = pdf_path.stat().st_size
 
         # 构建 Document
@@ -229,7 +197,8 @@ async def _run_pipeline(job_dir: Path) -> None:
             "stage": "构建文档对象"
         })
         
-        doc = build_document(
+        doc = await asyncio.to_thread(
+            build_document,
             path=str(pdf_path),
             page_texts=page_texts,
             page_tables=page_tables,
@@ -265,9 +234,9 @@ async def _run_pipeline(job_dir: Path) -> None:
             job_context = JobContext(
                 job_id=job_dir.name,
                 pdf_path=str(pdf_path),
-                ocr_text="\n".join(page_texts),  # 合并所有页面文本
+                ocr_text=doc.full_text,  # 合并所有页面文本（build_document 已拼好）
                 tables=flat_tables,
-                pages=len(page_texts),
+                pages=doc.pages,
                 meta={
                     "started_at": started,
                     "page_texts": page_texts,         # 按页文本
@@ -285,7 +254,7 @@ async def _run_pipeline(job_dir: Path) -> None:
                 "rule_findings": [item.dict() for item in dual_result.rule_findings],
                 "merged": dual_result.merged.dict(),
                 "meta": {
-                    "pages": len(page_texts),
+                    "pages": doc.pages,
                     "filesize": filesize,
                     "job_id": job_dir.name,
                     "started_at": started,
@@ -371,7 +340,7 @@ async def _run_pipeline(job_dir: Path) -> None:
                 "summary": "",
                 "issues": payload_issues["issues"],
                 "meta": {
-                    "pages": len(page_texts),
+                    "pages": doc.pages,
                     "filesize": filesize,
                     "job_id": job_dir.name,
                     "started_at": started,
@@ -6,13 +6,14 @@
 
 import asyncio
 import sys
-import json
 import time
+
 sys.path.append('.')
 
-from services.analyze_dual import DualModeAnalyzer
 from schemas.issues import AnalysisConfig, JobContext
-from pathlib import Path
+from services.analyze_dual import DualModeAnalyzer
+from tests.fixtures.sample_pages import sample_built_document, sample_document
+
 
 async def debug_dual_mode():
     print('🔍 调试双模式分析器')
@@ -22,7 +23,7 @@ async def debug_dual_mode():
     analyzer = DualModeAnalyzer()
     config = AnalysisConfig()
     
-    print(f'配置信息:')
+    print('配置信息:')
     print(f'  - AI启用: {config.ai_enabled}')
     print(f'  - 规则启用: {config.rule_enabled}')
     print(f'  - 双模式启用: {config.dual_mode}')
@@ -40,34 +41,35 @@ async def debug_dual_mode():
     
     if ai_rules:
         print('\nAI规则列表:')
-        for rule in ai_rules[:3]:
-            rule_id = rule.get('code', '未知ID')
-            title = rule.get('desc', '未知标题')
-            print(f'  - {rule_id}: {title}')
+        # 拼成一段后一次写出，避免逐条 print
+        sys.stdout.write('\n'.join(
+            f"  - {rule.get('code', '未知ID')}: {rule.get('desc', '未知标题')}"
+            for rule in ai_rules[:3]
+        ) + '\n')
+    print()
+    
+    # 直接在样例 Document 上跑本地规则（Document 进程内只构建一次）
+    print('🧪 直接执行本地规则...')
+    from engine.rules_v33 import ALL_RULES
+    doc = sample_built_document()
+    for rule in ALL_RULES:
+        print(f'  - {rule.code}: {len(rule.apply(doc))} 个问题')
     print()
     
-    # 创建测试上下文
+    # 创建测试上下文（样例页面与测试共用）
+    page_texts, page_tables = sample_document()
     context = JobContext(
         job_id='debug-dual-001',
         pdf_path='samples/bad/中共上海市普陀区委社会工作部 2024 年度部门决算.pdf',
-        pages=10,
-        ocr_text='''
-        2024年度部门决算说明
-        
-        一、一般公共预算收入执行情况
-        预算数：1000万元，实际完成：800万元，完成率：80%
-        
-        二、一般公共预算支出执行情况  
-        预算数：1200万元，实际支出：1300万元，超支：100万元
-        
-        三、三公经费支出情况
-        预算数：50万元，实际支出：80万元，超支率：60%
-        
-        四、政府采购执行情况
-        预算数：200万元，实际采购：180万元
-        ''',
+        pages=len(page_texts),
+        ocr_text="\n".join(page_texts),
         tables=[],
-        meta={'document_type': '部门决算', 'year': '2024'}
+        meta={
+            'document_type': '部门决算',
+            'year': '2024',
+            'page_texts': list(page_texts),
+            'page_tables': [list(t) for t in page_tables],
+        }
     )
     
     print('🧪 测试双模式分析...')
@@ -103,7 +105,10 @@ async def debug_dual_mode():
             print('🤖 AI检测到的问题:')
             for i, issue in enumerate(result.ai_findings[:3], 1):
                 print(f'  {i}. {issue.title} (严重程度: {issue.severity})')
-                print(f'     描述: {issue.message[:100]}...' if len(issue.message) > 100 else f'     描述: {issue.message}')
+                message = issue.message
+                if len(message) > 100:
+                    message = f'{message[:100]}...'
+                print(f'     描述: {message}')
         else:
             print('❌ AI检测没有发现问题')
         print()
@@ -118,7 +123,8 @@ async def debug_dual_mode():
         print()
         
         # 检查AI分析是否被执行
-        ai_elapsed = result.meta.get('performance', {}).get('ai_elapsed_ms', 0) if result.meta else 0
+        performance = result.meta.get('performance', {}) if result.meta else {}
+        ai_elapsed = performance.get('ai_elapsed_ms', 0)
         if ai_elapsed == 0:
             print('⚠️  警告: AI检测耗时为0ms，AI分析可能没有被执行')
             
@@ -2,55 +2,48 @@
 """
 调试任务状态
 """
-import requests
-import json
+import asyncio
 
-def debug_job_status():
+import httpx
+import orjson
+
+BASE_URL = 'http://localhost:8000'
+
+
+def _report(title, response, label, pretty=False):
+    """按原有格式输出单个检查结果"""
+    print(f"\n{title}")
+    print(f"   状态码: {response.status_code}")
+    if response.status_code == 200:
+        data = response.json()
+        if pretty:
+            # orjson 直接输出 UTF-8，不转义中文，与 ensure_ascii=False 一致
+            data = orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+        print(f"   {label}: {data}")
+    else:
+        print(f"   错误: {response.text}")
+
+
+async def debug_job_status():
     """调试任务状态"""
     job_id = "34bde7b0ceab13e8142a992639cec4e1"
     
     print(f"🔍 调试任务状态: {job_id}")
     
     try:
-        # 检查任务状态
-        print("\n1. 检查任务状态...")
-        response = requests.get(f'http://localhost:8000/jobs/{job_id}/status')
-        print(f"   状态码: {response.status_code}")
-        if response.status_code == 200:
-            status_data = response.json()
-            print(f"   状态: {status_data}")
-        else:
-            print(f"   错误: {response.text}")
-        
-        # 检查所有任务
-        print("\n2. 检查所有任务...")
-        response = requests.get('http://localhost:8000/jobs')
-        print(f"   状态码: {response.status_code}")
-        if response.status_code == 200:
-            jobs_data = response.json()
-            print(f"   任务列表: {json.dumps(jobs_data, ensure_ascii=False, indent=2)}")
-        else:
-            print(f"   错误: {response.text}")
+        # 四个检查互不依赖，并发发出，总耗时取决于最慢的一个
+        async with httpx.AsyncClient(base_url=BASE_URL, timeout=5) as client:
+            status, jobs, result, health = await asyncio.gather(
+                client.get(f'/jobs/{job_id}/status'),
+                client.get('/jobs'),
+                client.get(f'/jobs/{job_id}/result'),
+                client.get('/health'),
+            )
         
-        # 尝试获取结果
-        print("\n3. 尝试获取结果...")
-        response = requests.get(f'http://localhost:8000/jobs/{job_id}/result')
-        print(f"   状态码: {response.status_code}")
-        if response.status_code == 200:
-            result_data = response.json()
-            print(f"   结果: {json.dumps(result_data, ensure_ascii=False, indent=2)}")
-        else:
-            print(f"   错误: {response.text}")
-            
-        # 检查健康状态
-        print("\n4. 检查API健康状态...")
-        response = requests.get('http://localhost:8000/health')
-        print(f"   状态码: {response.status_code}")
-        if response.status_code == 200:
-            health_data = response.json()
-            print(f"   健康状态: {json.dumps(health_data, ensure_ascii=False, indent=2)}")
-        else:
-            print(f"   错误: {response.text}")
+        _report("1. 检查任务状态...", status, "状态")
+        _report("2. 检查所有任务...", jobs, "任务列表", pretty=True)
+        _report("3. 尝试获取结果...", result, "结果", pretty=True)
+        _report("4. 检查API健康状态...", health, "健康状态", pretty=True)
             
     except Exception as e:
         print(f"❌ 调试过程中出现错误: {e}")
@@ -58,4 +51,4 @@ def debug_job_status():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    debug_job_status()
\ No newline at end of file
+    asyncio.run(debug_job_status())
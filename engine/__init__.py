@@ -3,22 +3,35 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Iterable
+from typing import TYPE_CHECKING, Iterable
 
-from api.config import AppConfig
+if TYPE_CHECKING:
+    from api.config import AppConfig
 
 
 class RuleEngine:
     """Minimal placeholder that records requested rule evaluations."""
 
     def __init__(self, config: AppConfig | None = None) -> None:
-        self._config = config or AppConfig.load()
+        # Loaded lazily on first use so a bare ``RuleEngine()`` does no I/O.
+        self._config = config
+
+    @property
+    def config(self) -> AppConfig:
+        """Return the engine configuration, loading the default one on first access."""
+
+        if self._config is None:
+            # Imported here so that ``import engine.<submodule>`` does not pull in the API package.
+            from api.config import AppConfig
+
+            self._config = AppConfig.load()
+        return self._config
 
     @property
     def rules_file(self) -> Path:
         """Return the rules file path used by the engine."""
 
-        return self._config.rules_file
+        return self.config.rules_file
 
     def evaluate(self, document_path: Path) -> Iterable[str]:
         """Pretend to evaluate a document and yield triggered rules."""
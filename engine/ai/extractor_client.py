@@ -4,13 +4,33 @@
 AI抽取器客户端 - 后端调用AI抽取器微服务的客户端
 """
 
-import os
 import asyncio
-import logging
-from typing import List, Dict, Any, Optional
+import atexit
+import copy
 import hashlib
-import httpx
+import json
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+from collections import OrderedDict
 from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+import httpx
+
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:  # orjson 不可用时退回标准库
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    _json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +42,36 @@ AI_ASSIST_ENABLED = os.getenv("AI_ASSIST_ENABLED", "true").lower() == "true"
 REQUEST_TIMEOUT = 120.0  # 增加到120秒，适应复杂文档处理
 MAX_RETRIES = 2
 RETRY_DELAY = 1.0
+RETRY_MAX_DELAY = 10.0
+# 微批窗口：该时间内并发到达的多个抽取请求合并为一次批量调用
+BATCH_WINDOW = 0.02
+# 单次批量请求的小节上限；超出部分拆成多个请求并发发送
+MAX_BATCH_SIZE = 16
+# 同时在途的抽取请求上限
+MAX_CONCURRENCY = 8
+
+# 健康检查结果的有效期（秒）
+HEALTH_TTL = 10.0
+
+# 结果缓存：进程内 LRU 容量；设置 AI_EXTRACT_CACHE_DIR 时额外落盘，跨进程复用
+CACHE_SIZE = 512
+CACHE_DIR = os.getenv("AI_EXTRACT_CACHE_DIR") or None
+
+# hit 必需字段与需校验的 span 字段
+_REQUIRED_HIT_FIELDS = frozenset({
+    "budget_text", "budget_span", "final_text", "final_span", "stmt_text", "stmt_span", "clip"
+})
+_SPAN_FIELDS = ("budget_span", "final_span", "stmt_span")
+
+def _is_span(span: Any) -> bool:
+    return isinstance(span, list) and len(span) == 2
+
+class ExtractorHTTPError(Exception):
+    """抽取器返回非 200 状态码"""
+    
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
 
 @dataclass
 class ExtractorConfig:
@@ -31,28 +81,171 @@ class ExtractorConfig:
     timeout: float = REQUEST_TIMEOUT
     max_retries: int = MAX_RETRIES
     retry_delay: float = RETRY_DELAY
+    batch_window: float = BATCH_WINDOW
+    max_batch_size: int = MAX_BATCH_SIZE
+    max_concurrency: int = MAX_CONCURRENCY
+    cache_size: int = CACHE_SIZE
+    cache_dir: Optional[str] = CACHE_DIR
     
     @property
     def url(self) -> str:
         """获取完整的API URL"""
-        if self.base_url.endswith('/ai/extract/v1'):
-            return self.base_url
-        else:
-            return f"{self.base_url.rstrip('/')}/ai/extract/v1"
+        return _resolve_urls(self.base_url)[0]
+    
+    @property
+    def batch_url(self) -> str:
+        """批量抽取API URL"""
+        return _resolve_urls(self.base_url)[1]
+    
+    @property
+    def health_url(self) -> str:
+        """健康检查URL"""
+        return _resolve_urls(self.base_url)[2]
+
+@lru_cache(maxsize=16)
+def _resolve_urls(base_url: str) -> Tuple[str, str, str]:
+    """由 base_url 派生 (抽取, 批量抽取, 健康检查) 地址；按 base_url 缓存，避免每次请求重复拼接"""
+    if base_url.endswith('/ai/extract/v1'):
+        url = base_url
+    else:
+        url = f"{base_url.rstrip('/')}/ai/extract/v1"
+    return url, f"{url}/batch", f"{base_url.rstrip('/')}/health"
+
+def _read_cached_hits(path: Path) -> Optional[List[Dict[str, Any]]]:
+    """读取磁盘上的抽取缓存，不存在或损坏时返回 None"""
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception as e:
+        logger.debug("读取AI抽取缓存失败: %s", e)
+        return None
+
+def _write_cached_hits(path: Path, hits: List[Dict[str, Any]]) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(hits, ensure_ascii=False), encoding="utf-8")
+    except Exception as e:
+        logger.debug("写入AI抽取缓存失败: %s", e)
+
+@dataclass
+class _Pool:
+    """单个事件循环内的连接池客户端与并发信号量"""
+    client: httpx.AsyncClient
+    semaphore: asyncio.Semaphore
+    max_concurrency: int
 
 class ExtractorClient:
     """AI抽取器客户端"""
     
     def __init__(self, config: Optional[ExtractorConfig] = None):
         self.config = config or ExtractorConfig()
+        # 长连接客户端与并发信号量：httpx 连接和信号量都绑定事件循环，每个循环各建一份，
+        # 循环被回收时随之释放；信号量记下创建时的并发上限，配置变化后重建
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _Pool]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._pools_lock = threading.Lock()
+        # 微批：按事件循环分别登记等待合并的 (section_text, doc_hash, future)，
+        # future 只能在所属循环内完成，不同循环的请求不能混在一批
+        self._pending: Dict[asyncio.AbstractEventLoop, List[Tuple[str, str, asyncio.Future]]] = {}
+        self._flush_tasks: Set[asyncio.Task] = set()
+        # 抽取器不提供批量接口（404/405）时置为 False，之后多条请求逐条发送
+        self._batch_supported = True
+        # 抽取结果缓存：generate_doc_hash(section_text) -> hits
+        self._cache: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        # 最近一次健康检查：(monotonic 时间, 是否健康)
+        self._health: Optional[Tuple[float, bool]] = None
+        
+    async def _cache_get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """查缓存（内存优先，其次磁盘），命中返回深拷贝；磁盘读取放到线程中，不阻塞事件循环"""
+        hits = self._cache.get(key)
+        if hits is not None:
+            self._cache.move_to_end(key)
+            return copy.deepcopy(hits)
+        path = self._cache_path(key)
+        if path is None:
+            return None
+        hits = await asyncio.to_thread(_read_cached_hits, path)
+        if hits is None:
+            return None
+        self._cache_remember(key, hits)
+        return copy.deepcopy(hits)
+    
+    async def _cache_put(self, key: str, hits: List[Dict[str, Any]]) -> None:
+        """写缓存（内存，另有 cache_dir 时在线程中落盘）"""
+        stored = self._cache_remember(key, hits)
+        path = self._cache_path(key)
+        if path is not None:
+            await asyncio.to_thread(_write_cached_hits, path, stored)
+    
+    def _cache_remember(self, key: str, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """写内存缓存（保存副本），超出容量时淘汰最久未用项"""
+        stored = self._cache[key] = copy.deepcopy(hits)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.config.cache_size:
+            self._cache.popitem(last=False)
+        return stored
+    
+    def _cache_path(self, key: str) -> Optional[Path]:
+        if not self.config.cache_dir:
+            return None
+        return Path(self.config.cache_dir).expanduser() / key[:2] / f"{key[2:]}.json"
+        
+    def _get_pool(self) -> _Pool:
+        """获取（必要时创建）当前事件循环的连接池客户端与信号量"""
+        loop = asyncio.get_running_loop()
+        limit = max(1, self.config.max_concurrency)
+        with self._pools_lock:
+            pool = self._pools.get(loop)
+            if pool is None or pool.client.is_closed:
+                pool = self._pools[loop] = _Pool(
+                    client=httpx.AsyncClient(
+                        timeout=self.config.timeout,
+                        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+                    ),
+                    semaphore=asyncio.Semaphore(limit),
+                    max_concurrency=limit,
+                )
+            elif pool.max_concurrency != limit:
+                # 并发上限已修改：新请求改用新信号量，在途请求照常释放旧的
+                pool.semaphore = asyncio.Semaphore(limit)
+                pool.max_concurrency = limit
+            return pool
+    
+    async def _get_client(self) -> httpx.AsyncClient:
+        """获取（必要时创建）当前事件循环的连接池客户端"""
+        return self._get_pool().client
+    
+    async def aclose(self) -> None:
+        """关闭所有连接池：当前循环的直接关闭，其他仍在运行的循环投递到其所在线程关闭"""
+        current = asyncio.get_running_loop()
+        with self._pools_lock:
+            pools = list(self._pools.items())
+            self._pools.clear()
+        for loop, pool in pools:
+            if pool.client.is_closed:
+                continue
+            try:
+                if loop is current:
+                    await pool.client.aclose()
+                elif loop.is_running():
+                    await asyncio.wrap_future(
+                        asyncio.run_coroutine_threadsafe(pool.client.aclose(), loop)
+                    )
+                # 已关闭的循环无法再关闭其连接，随循环一起丢弃
+            except Exception as e:
+                logger.debug("关闭AI抽取器连接池失败: %s", e)
         
-    async def ai_extract_pairs(self, section_text: str, doc_hash: str) -> List[Dict[str, Any]]:
+    async def ai_extract_pairs(self, section_text: str, doc_hash: str,
+                               disable_cache: bool = False) -> List[Dict[str, Any]]:
         """
         调用AI抽取器进行信息抽取
         
         Args:
             section_text: （三）小节全文
             doc_hash: 文档哈希
+            disable_cache: 为 True 时跳过结果缓存，强制请求抽取器
             
         Returns:
             抽取结果列表，每个元素包含：
@@ -75,8 +268,18 @@ class ExtractorClient:
             logger.debug("输入文本为空，返回空列表")
             return []
             
+        # 缓存按小节内容寻址，同一文本重复抽取（重跑/多规则）不再访问网络
+        key = generate_doc_hash(section_text)
+        if not disable_cache:
+            cached = await self._cache_get(key)
+            if cached is not None:
+                logger.debug("AI抽取缓存命中: %s", key[:8])
+                return cached
+            
         try:
-            result = await self._call_with_retry(section_text, doc_hash)
+            result = await self._submit(section_text, doc_hash)
+            if not disable_cache:
+                await self._cache_put(key, result)
             return result
             
         except Exception as e:
@@ -84,34 +287,192 @@ class ExtractorClient:
             # 网络失败时不影响主流程，退回纯规则模式
             return []
     
-    async def _call_with_retry(self, section_text: str, doc_hash: str) -> List[Dict[str, Any]]:
+    async def ai_extract_pairs_batch(self, sections: List[Tuple[str, str]],
+                                     disable_cache: bool = False) -> List[List[Dict[str, Any]]]:
+        """
+        批量调用AI抽取器，一次请求处理多个小节
+        
+        Args:
+            sections: [(section_text, doc_hash), ...]
+            disable_cache: 为 True 时跳过结果缓存
+            
+        Returns:
+            与 sections 一一对应的抽取结果列表
+        """
+        results: List[List[Dict[str, Any]]] = [[] for _ in sections]
+        if not self.config.enabled:
+            logger.debug("AI辅助未启用，返回空列表")
+            return results
+        
+        pending = []
+        for i, (text, doc_hash) in enumerate(sections):
+            if not text.strip():
+                continue
+            cached = None if disable_cache else await self._cache_get(generate_doc_hash(text))
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append((i, text, doc_hash))
+        if not pending:
+            return results
+        
+        size = max(1, self.config.max_batch_size)
+        chunks = [pending[i:i + size] for i in range(0, len(pending), size)]
+        outputs = await asyncio.gather(
+            *(
+                self._call_with_retry(
+                    self._batch_call, [(text, doc_hash) for _, text, doc_hash in chunk]
+                )
+                for chunk in chunks
+            ),
+            return_exceptions=True,
+        )
+        
+        for chunk, batch in zip(chunks, outputs, strict=True):
+            if isinstance(batch, BaseException):
+                logger.error(f"AI批量抽取失败: {batch}")
+                continue
+            for (i, text, _), hits in zip(chunk, batch, strict=True):
+                if isinstance(hits, Exception):
+                    # 单个小节失败时只有该小节为空，不影响同批其余结果
+                    logger.error(f"AI批量抽取中的小节失败: {hits}")
+                    continue
+                results[i] = hits
+                if not disable_cache:
+                    await self._cache_put(generate_doc_hash(text), hits)
+        return results
+    
+    async def ai_extract_pairs_many(self, sections: List[Tuple[str, str]],
+                                    disable_cache: bool = False) -> List[List[Dict[str, Any]]]:
+        """
+        并发抽取多个小节：逐个走 ai_extract_pairs（缓存、微批、重试），
+        同时在途的请求数由 max_concurrency 限制
+        
+        Args:
+            sections: [(section_text, doc_hash), ...]
+            disable_cache: 为 True 时跳过结果缓存
+            
+        Returns:
+            与 sections 一一对应的抽取结果列表
+        """
+        return list(await asyncio.gather(
+            *(
+                self.ai_extract_pairs(text, doc_hash, disable_cache=disable_cache)
+                for text, doc_hash in sections
+            )
+        ))
+    
+    async def _submit(self, section_text: str, doc_hash: str) -> List[Dict[str, Any]]:
+        """登记到微批队列，等待窗口结束后与并发请求合并发送"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.get(loop)
+        if pending is None:
+            # 本循环没有开着的窗口：登记队列并安排窗口结束后发送
+            pending = self._pending[loop] = []
+            task = loop.create_task(self._flush_after_window(loop))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+        pending.append((section_text, doc_hash, future))
+        return await future
+    
+    async def _flush_after_window(self, loop: asyncio.AbstractEventLoop) -> None:
+        """窗口结束后发送：单条走原接口，多条走批量接口"""
+        try:
+            await asyncio.sleep(self.config.batch_window)
+        except asyncio.CancelledError:
+            # 窗口被取消（如循环关闭）时本批随之取消，调用方不会一直等待
+            for _, _, future in self._pending.pop(loop, []):
+                future.cancel()
+            raise
+        # 取走本批后立即允许下一批开窗，发送期间到达的请求不会被遗漏
+        batch = self._pending.pop(loop, [])
+        if not batch:
+            return
+        # 超过单批上限时拆成多批并发发送，由信号量限制同时在途的请求数
+        size = max(1, self.config.max_batch_size)
+        await asyncio.gather(
+            *(self._send_batch(batch[i:i + size]) for i in range(0, len(batch), size))
+        )
+    
+    async def _send_batch(self, batch: List[Tuple[str, str, asyncio.Future]]) -> None:
+        """发送一批微批请求并回填各自的 future"""
+        try:
+            if len(batch) == 1:
+                text, doc_hash, _ = batch[0]
+                outputs = [await self._call_with_retry(self._single_call, text, doc_hash)]
+            else:
+                outputs = await self._call_with_retry(
+                    self._batch_call, [(text, doc_hash) for text, doc_hash, _ in batch]
+                )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), hits in zip(batch, outputs, strict=True):
+            if future.done():
+                continue
+            if isinstance(hits, Exception):
+                future.set_exception(hits)
+            else:
+                future.set_result(hits)
+    
+    async def _call_with_retry(self, call, *args) -> Any:
         """带重试的调用"""
         last_exception = None
+        max_tries = self.config.max_retries + 1
         
-        for attempt in range(self.config.max_retries + 1):
+        for attempt in range(max_tries):
             try:
                 if attempt > 0:
-                    logger.info(f"AI抽取重试第{attempt}次")
-                    await asyncio.sleep(self.config.retry_delay * attempt)
+                    # 指数退避 + 全抖动：避免大量失败请求在同一时刻集中重试
+                    backoff = self.config.retry_delay * 2 ** (attempt - 1)
+                    delay = random.uniform(0, min(RETRY_MAX_DELAY, backoff))
+                    logger.info(f"AI抽取重试第{attempt}次（等待{delay:.2f}s）")
+                    await asyncio.sleep(delay)
                     
-                return await self._single_call(section_text, doc_hash)
+                return await call(*args)
                 
             except httpx.TimeoutException as e:
                 last_exception = e
-                logger.warning(f"AI抽取超时 (尝试 {attempt + 1}/{self.config.max_retries + 1}): {e}")
+                logger.warning(f"AI抽取超时 (尝试 {attempt + 1}/{max_tries}): {e}")
                 
             except httpx.ConnectError as e:
                 last_exception = e
-                logger.warning(f"AI抽取连接失败 (尝试 {attempt + 1}/{self.config.max_retries + 1}): {e}")
+                logger.warning(f"AI抽取连接失败 (尝试 {attempt + 1}/{max_tries}): {e}")
                 
             except Exception as e:
                 last_exception = e
-                logger.warning(f"AI抽取异常 (尝试 {attempt + 1}/{self.config.max_retries + 1}): {e}")
+                logger.warning(f"AI抽取异常 (尝试 {attempt + 1}/{max_tries}): {e}")
                 
         # 所有重试都失败
         logger.error(f"AI抽取最终失败: {last_exception}")
         raise last_exception or Exception("AI抽取失败：未知错误")
     
+    async def _post_json(self, url: str, request_data: Dict[str, Any]) -> Any:
+        """POST JSON 并解析响应；以流方式读取，错误响应只保留前 512 字节用于诊断"""
+        pool = self._get_pool()
+        # 超时按每次请求传入，update_config 修改后立即生效
+        async with pool.semaphore, pool.client.stream(
+            "POST", url,
+            content=_json_dumps(request_data),
+            headers={"Content-Type": "application/json"},
+            timeout=self.config.timeout,
+        ) as response:
+            if response.status_code != 200:
+                body = b""
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if len(body) >= 512:
+                        break
+                raise ExtractorHTTPError(
+                    f"AI抽取器返回错误状态码: {response.status_code}, "
+                    f"响应: {body[:512].decode('utf-8', errors='replace')}",
+                    response.status_code,
+                )
+            return _json_loads(await response.aread())
+    
     async def _single_call(self, section_text: str, doc_hash: str) -> List[Dict[str, Any]]:
         """单次调用"""
         request_data = {
@@ -122,75 +483,108 @@ class ExtractorClient:
             "max_windows": 3
         }
         
-        async with httpx.AsyncClient(timeout=self.config.timeout) as client:
-            response = await client.post(
-                self.config.url,
-                json=request_data,
-                headers={"Content-Type": "application/json"}
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"AI抽取器返回错误状态码: {response.status_code}, 响应: {response.text}")
-                
-            result = response.json()
-            
-            if "hits" not in result:
-                raise Exception(f"AI抽取器返回格式错误: {result}")
-                
-            hits = result["hits"]
-            logger.info(f"AI抽取成功，获得{len(hits)}个结果")
+        result = await self._post_json(self.config.url, request_data)
+        
+        if "hits" not in result:
+            raise Exception(f"AI抽取器返回格式错误: {result}")
             
-            # 转换为内部格式
-            return self._convert_hits_to_internal_format(hits)
+        hits = result["hits"]
+        logger.info(f"AI抽取成功，获得{len(hits)}个结果")
+        
+        # 转换为内部格式
+        return self._convert_hits_to_internal_format(hits)
+    
+    async def _batch_call(self, sections: List[Tuple[str, str]]) -> List[Any]:
+        """
+        单次批量调用；抽取器没有批量接口时退回逐条调用
+        
+        Returns:
+            与 sections 一一对应：成功为抽取结果列表，服务端报告该小节失败时为 Exception
+        """
+        if not self._batch_supported:
+            return await self._single_calls(sections)
+        request_data = {
+            "task": "R33110_pairs_v1_batch",
+            "items": [{"section_text": text, "doc_hash": doc_hash} for text, doc_hash in sections],
+            "language": "zh",
+            "max_windows": 3
+        }
+        
+        try:
+            result = await self._post_json(self.config.batch_url, request_data)
+        except ExtractorHTTPError as e:
+            if e.status_code not in (404, 405):
+                raise
+            logger.warning("AI抽取器不支持批量接口（%s），改为逐条调用", e.status_code)
+            self._batch_supported = False
+            return await self._single_calls(sections)
+        items = result.get("results")
+        if not isinstance(items, list) or len(items) != len(sections):
+            raise Exception(f"AI抽取器批量返回格式错误: {result}")
+        
+        outputs: List[Any] = []
+        for item in items:
+            if isinstance(item, dict) and item.get("error"):
+                outputs.append(Exception(f"AI抽取器小节抽取失败: {item['error']}"))
+                continue
+            if not isinstance(item, dict) or "hits" not in item:
+                raise Exception(f"AI抽取器返回格式错误: {item}")
+            outputs.append(self._convert_hits_to_internal_format(item["hits"]))
+        hit_count = sum(len(hits) for hits in outputs if not isinstance(hits, Exception))
+        logger.info(f"AI批量抽取完成，{len(sections)}个小节共获得{hit_count}个结果")
+        return outputs
+    
+    async def _single_calls(self, sections: List[Tuple[str, str]]) -> List[List[Dict[str, Any]]]:
+        """逐条调用单次接口（并发，受信号量限制）"""
+        return list(await asyncio.gather(
+            *(self._single_call(text, doc_hash) for text, doc_hash in sections)
+        ))
     
     def _convert_hits_to_internal_format(self, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """将API返回的hits转换为内部格式"""
         converted = []
         
         for hit in hits:
-            try:
-                # 验证必需字段
-                required_fields = ["budget_text", "budget_span", "final_text", "final_span", "stmt_text", "stmt_span", "clip"]
-                if not all(field in hit for field in required_fields):
-                    logger.warning(f"跳过缺少必需字段的hit: {hit}")
-                    continue
-                    
-                # 验证span格式
-                for span_field in ["budget_span", "final_span", "stmt_span"]:
-                    span = hit[span_field]
-                    if not isinstance(span, list) or len(span) != 2:
-                        logger.warning(f"跳过span格式错误的hit: {hit}")
-                        continue
-                        
-                # 处理可选的reason_span
-                reason_span = hit.get("reason_span")
-                if reason_span and (not isinstance(reason_span, list) or len(reason_span) != 2):
-                    logger.warning(f"reason_span格式错误，设为None: {reason_span}")
-                    hit["reason_span"] = None
-                    hit["reason_text"] = None
-                
-                converted.append(hit)
+            # 验证必需字段
+            if not isinstance(hit, dict) or not _REQUIRED_HIT_FIELDS.issubset(hit):
+                logger.warning(f"跳过缺少必需字段的hit: {hit}")
+                continue
                 
-            except Exception as e:
-                logger.warning(f"转换hit失败: {e}, hit: {hit}")
+            # 验证span格式
+            if not all(_is_span(hit[f]) for f in _SPAN_FIELDS):
+                logger.warning(f"跳过span格式错误的hit: {hit}")
                 continue
                 
+            # 处理可选的reason_span
+            reason_span = hit.get("reason_span")
+            if reason_span and not _is_span(reason_span):
+                logger.warning(f"reason_span格式错误，设为None: {reason_span}")
+                hit["reason_span"] = None
+                hit["reason_text"] = None
+            
+            converted.append(hit)
+                
         return converted
     
     async def health_check(self) -> bool:
-        """健康检查"""
+        """健康检查（结果缓存 HEALTH_TTL 秒，避免每次请求都探测抽取器）"""
         if not self.config.enabled:
             return False
+        
+        now = time.monotonic()
+        if self._health is not None and now - self._health[0] < HEALTH_TTL:
+            return self._health[1]
             
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                health_url = f"{self.config.base_url.rstrip('/')}/health"
-                response = await client.get(health_url)
-                return response.status_code == 200
+            client = await self._get_client()
+            response = await client.get(self.config.health_url, timeout=5.0)
+            ok = response.status_code == 200
                 
         except Exception as e:
             logger.warning(f"AI抽取器健康检查失败: {e}")
-            return False
+            ok = False
+        self._health = (time.monotonic(), ok)
+        return ok
 
 # ==================== 全局实例 ====================
 _default_client = None
@@ -200,8 +594,19 @@ def get_extractor_client() -> ExtractorClient:
     global _default_client
     if _default_client is None:
         _default_client = ExtractorClient()
+        atexit.register(_close_default_client)
     return _default_client
 
+def _close_default_client() -> None:
+    """进程退出时释放默认客户端的连接池"""
+    client = _default_client
+    if client is None or not client._pools:
+        return
+    try:
+        asyncio.run(client.aclose())
+    except Exception as e:
+        logger.debug("关闭AI抽取器客户端失败: %s", e)
+
 async def ai_extract_pairs(section_text: str, doc_hash: str) -> List[Dict[str, Any]]:
     """
     便捷函数：调用AI抽取器进行信息抽取
@@ -216,9 +621,46 @@ async def ai_extract_pairs(section_text: str, doc_hash: str) -> List[Dict[str, A
     client = get_extractor_client()
     return await client.ai_extract_pairs(section_text, doc_hash)
 
+_HASH_CHUNK = 65536  # 流式哈希每次编码的字符数
+
+def hash_text(text: Union[str, bytes]) -> str:
+    """文本内容哈希（blake2b，80 位，20 个十六进制字符），不做记忆化
+    
+    str 按 64K 字符分片编码后逐片喂给哈希器，避免为长文档整体再分配一份 bytes；
+    结果与整体编码后哈希相同。传入 bytes 时直接哈希。
+    """
+    hasher = hashlib.blake2b(digest_size=10)
+    if isinstance(text, bytes):
+        hasher.update(text)
+    else:
+        for i in range(0, len(text), _HASH_CHUNK):
+            hasher.update(text[i:i + _HASH_CHUNK].encode('utf-8'))
+    return hasher.hexdigest()
+
+# 最近哈希过的小节：id(文本) -> (文本, 哈希)。条目引用文本本身，存活期间其 id 不会被复用
+_DOC_HASH_MEMO: "OrderedDict[int, Tuple[str, str]]" = OrderedDict()
+_DOC_HASH_MEMO_SIZE = 8
+_DOC_HASH_MEMO_LOCK = threading.Lock()
+
 def generate_doc_hash(section_text: str) -> str:
-    """生成文档哈希"""
-    return hashlib.sha1(section_text.encode('utf-8')).hexdigest()
+    """生成文档哈希（仅作缓存键）
+    
+    同一小节文本对象会被缓存查找、回写反复取哈希；按对象 id 记住最近几个结果，
+    命中时既不编码也不重新计算摘要。
+    """
+    key = id(section_text)
+    with _DOC_HASH_MEMO_LOCK:
+        entry = _DOC_HASH_MEMO.get(key)
+        if entry is not None and entry[0] is section_text:
+            _DOC_HASH_MEMO.move_to_end(key)
+            return entry[1]
+    digest = hash_text(section_text)
+    with _DOC_HASH_MEMO_LOCK:
+        _DOC_HASH_MEMO[key] = (section_text, digest)
+        _DOC_HASH_MEMO.move_to_end(key)
+        while len(_DOC_HASH_MEMO) > _DOC_HASH_MEMO_SIZE:
+            _DOC_HASH_MEMO.popitem(last=False)
+    return digest
 
 # ==================== 配置更新 ====================
 def update_config(
@@ -229,15 +671,13 @@ def update_config(
     retry_delay: Optional[float] = None
 ):
     """更新全局配置"""
-    global _default_client
-    
-    if _default_client is None:
-        _default_client = ExtractorClient()
-        
-    config = _default_client.config
+    client = get_extractor_client()
+    config = client.config
     
     if url is not None:
         config.base_url = url
+        client._health = None
+        client._batch_supported = True
     if enabled is not None:
         config.enabled = enabled
     if timeout is not None:
@@ -3,18 +3,82 @@ AI验证器实现
 负责使用AI技术验证和增强规则引擎的结果
 """
 
+import asyncio
+import json
 import logging
-from typing import List, Dict, Any, Optional, Set, Tuple
+import os
+import re
+from collections import OrderedDict
 from dataclasses import dataclass, field
-import asyncio
 from enum import Enum
-import hashlib
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
+
+from .hybrid_validator import IssueConfidence, IssueSeverity, IssueSource, ValidationIssue
 
-from .hybrid_validator import ValidationIssue, IssueSource, IssueSeverity, IssueConfidence
-from .ai.extractor_client import ExtractorClient, ExtractorConfig
+if TYPE_CHECKING:
+    # 抽取客户端依赖 httpx，仅在实例化 SmartAIValidator 时导入
+    from .ai.extractor_client import ExtractorClient, ExtractorConfig
 
 logger = logging.getLogger(__name__)
 
+# 提示模板版本：修改 _make_*_prompt 后递增，使旧的响应缓存失效
+PROMPT_VERSION = "1"
+
+def _issue_key(description: str, text_snippet: str) -> int:
+    """去重用的问题标识：描述与片段以 \\x1f 分隔后转小写，取整数哈希"""
+    return hash(f"{description}\x1f{text_snippet}".lower())
+
+@lru_cache(maxsize=1024)
+def _make_validation_prompt(description: str, rule_id: str, snippet: str, doc_prefix: str) -> str:
+    """验证提示模板（参数均为字符串，按值缓存，重试/重复验证直接复用）"""
+    return f"""
+请验证以下预算检查问题是否准确：
+
+问题描述：{description}
+规则ID：{rule_id}
+文本片段：{snippet}
+
+文档上下文：
+{doc_prefix}...
+
+请回答：CONFIRM（确认）、REJECT（拒绝）或 ENHANCE（需要增强）
+"""
+
+@lru_cache(maxsize=1024)
+def _make_enhancement_prompt(description: str, rule_id: str, snippet: str, doc_prefix: str) -> str:
+    """增强提示模板"""
+    return f"""
+请为以下预算检查问题提供更详细的描述：
+
+当前描述：{description}
+规则ID：{rule_id}
+文本片段：{snippet}
+
+文档上下文：
+{doc_prefix}...
+
+请提供更详细、更准确的问题描述：
+"""
+
+def _read_cached_response(path: Path) -> Optional[str]:
+    """读取磁盘上的响应缓存，不存在或损坏时返回 None"""
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception as e:
+        logger.debug("读取AI响应缓存失败: %s", e)
+        return None
+
+def _write_cached_response(path: Path, response: str) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(response, ensure_ascii=False), encoding="utf-8")
+    except Exception as e:
+        logger.debug("写入AI响应缓存失败: %s", e)
+
 class ValidationAction(Enum):
     """验证动作"""
     CONFIRM = "confirm"      # 确认规则发现的问题
@@ -29,7 +93,15 @@ class AIValidationConfig:
     confidence_threshold: float = 0.7
     max_new_issues: int = 10
     validation_timeout: float = 60.0
-    extractor_config: Optional[ExtractorConfig] = None
+    max_concurrency: int = 8                # 同时在途的AI调用上限
+    
+    # AI响应缓存：按提示内容寻址，内存 LRU + 可选磁盘目录
+    cache_enabled: bool = True
+    cache_size: int = 10000
+    cache_dir: Optional[str] = field(
+        default_factory=lambda: os.getenv("AI_VALIDATOR_CACHE_DIR") or None
+    )
+    extractor_config: Optional["ExtractorConfig"] = None
     
     # 功能开关
     validate_rule_results: bool = True      # 是否验证规则结果
@@ -37,6 +109,10 @@ class AIValidationConfig:
     enhance_descriptions: bool = True       # 是否增强问题描述
     cross_validate: bool = True             # 是否交叉验证
 
+# 验证响应中的动作词；不加 \b，中文紧邻（如“确认CONFIRM”）时也能命中
+_ACTION_RE = re.compile(r"CONFIRM|REJECT|ENHANCE", re.IGNORECASE)
+_ACTION_PRIORITY = (ValidationAction.CONFIRM, ValidationAction.REJECT, ValidationAction.ENHANCE)
+
 @dataclass
 class ValidationContext:
     """验证上下文"""
@@ -44,13 +120,28 @@ class ValidationContext:
     document_hash: str
     section_name: str = ""
     metadata: Dict[str, Any] = field(default_factory=dict)
+    # 提示中引用的文档前缀，构造时切片一次
+    document_prefix: str = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        self.document_prefix = self.document_text[:500]
 
 class SmartAIValidator:
     """智能AI验证器实现"""
     
     def __init__(self, config: Optional[AIValidationConfig] = None):
+        from .ai.extractor_client import ExtractorClient, hash_text
+        
         self.config = config or AIValidationConfig()
-        self.extractor_client = ExtractorClient(self.config.extractor_config)
+        self.extractor_client: "ExtractorClient" = ExtractorClient(self.config.extractor_config)
+        self._hash_text = hash_text
+        # 并发AI调用的信号量（绑定事件循环，按需创建）
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._sem_loop: Optional[asyncio.AbstractEventLoop] = None
+        # AI响应缓存：hash(kind, 提示版本, prompt) -> 响应文本
+        self._resp_cache: "OrderedDict[str, str]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
         
         # 问题来源映射
         self.source_mapping = {
@@ -80,6 +171,7 @@ class SmartAIValidator:
         if not self.config.enabled:
             return rule_results
         
+        discover_task: Optional[asyncio.Future] = None
         try:
             # 创建验证上下文
             if context is None:
@@ -90,15 +182,21 @@ class SmartAIValidator:
             
             logger.info(f"开始AI验证: {len(rule_results)}个规则结果")
             
+            # 提前发起AI抽取，网络等待与规则结果验证重叠进行
+            if self.config.discover_new_issues:
+                discover_task = asyncio.ensure_future(self._fetch_ai_hits(context))
+            
             # 第一步：验证规则结果
             validated_results = rule_results
             if self.config.validate_rule_results:
                 validated_results = await self._validate_rule_results(rule_results, context)
             
-            # 第二步：发现新问题
+            # 第二步：发现新问题（与验证后的结果去重）
             new_issues = []
-            if self.config.discover_new_issues:
-                new_issues = await self._discover_new_issues(context, validated_results)
+            if discover_task is not None:
+                new_issues = self._discover_new_issues(
+                    await discover_task, context, validated_results
+                )
             
             # 第三步：增强描述
             all_results = validated_results + new_issues
@@ -111,40 +209,75 @@ class SmartAIValidator:
         except Exception as e:
             logger.error(f"AI验证过程出错: {e}")
             return rule_results
+        finally:
+            if discover_task is not None and not discover_task.done():
+                discover_task.cancel()
     
     async def _validate_rule_results(
         self, 
         rule_results: List[ValidationIssue], 
         context: ValidationContext
     ) -> List[ValidationIssue]:
-        """验证规则结果"""
-        validated_results = []
+        """验证规则结果（各结果的AI调用相互独立，并发执行）"""
+        # 同一规则的相同描述+片段（如同一问题在多页出现）只问一次AI，结论分发给所有重复项
+        groups: Dict[Tuple[str, str, Optional[str]], List[int]] = {}
+        for i, result in enumerate(rule_results):
+            key = (result.rule_id, result.description, result.text_snippet)
+            groups.setdefault(key, []).append(i)
+        members = list(groups.values())
+        
+        group_actions = await asyncio.gather(
+            *(self._validate_single_result(rule_results[idx[0]], context) for idx in members),
+            return_exceptions=True
+        )
+        actions: List[Any] = [None] * len(rule_results)
+        for idx, action in zip(members, group_actions, strict=True):
+            for i in idx:
+                actions[i] = action
+        
+        # 需要增强的结果再并发跑一轮，增强结果同样应用到组内每一项
+        to_enhance = [
+            idx for idx, action in zip(members, group_actions, strict=True)
+            if action == ValidationAction.ENHANCE
+        ]
+        enhanced = await asyncio.gather(
+            *(
+                self._enhance_single_result(rule_results[idx[0]], context,
+                                            duplicates=[rule_results[i] for i in idx[1:]])
+                for idx in to_enhance
+            ),
+            return_exceptions=True
+        )
+        enhanced_by_index = {}
+        for idx, enhanced_result in zip(to_enhance, enhanced, strict=True):
+            failed = isinstance(enhanced_result, BaseException)
+            for i in idx:
+                enhanced_by_index[i] = enhanced_result if failed else rule_results[i]
         
-        for result in rule_results:
-            try:
-                # 验证单个结果
-                action = await self._validate_single_result(result, context)
-                
-                if action == ValidationAction.CONFIRM:
-                    # 确认结果，可能提升置信度
-                    if result.confidence == IssueConfidence.LOW:
-                        result.confidence = IssueConfidence.MEDIUM
-                    validated_results.append(result)
-                elif action == ValidationAction.ENHANCE:
-                    # 增强结果
-                    enhanced_result = await self._enhance_single_result(result, context)
-                    validated_results.append(enhanced_result)
-                elif action == ValidationAction.REJECT:
-                    # 拒绝结果，记录日志但不添加
-                    logger.info(f"AI拒绝规则结果: {result.rule_id}")
-                else:
-                    # 默认保留
-                    validated_results.append(result)
-                    
-            except Exception as e:
-                logger.warning(f"验证单个结果时出错: {e}")
+        validated_results = []
+        for i, (result, action) in enumerate(zip(rule_results, actions, strict=True)):
+            if isinstance(action, BaseException):
+                logger.warning(f"验证单个结果时出错: {action}")
                 # 出错时保留原结果
                 validated_results.append(result)
+            elif action == ValidationAction.CONFIRM:
+                # 确认结果，可能提升置信度
+                if result.confidence == IssueConfidence.LOW:
+                    result.confidence = IssueConfidence.MEDIUM
+                validated_results.append(result)
+            elif action == ValidationAction.ENHANCE:
+                # 增强结果
+                enhanced_result = enhanced_by_index[i]
+                if isinstance(enhanced_result, BaseException):
+                    logger.warning(f"验证单个结果时出错: {enhanced_result}")
+                    enhanced_result = result
+                validated_results.append(enhanced_result)
+            elif action == ValidationAction.REJECT:
+                # 拒绝结果，记录日志但不添加
+                logger.info(f"AI拒绝规则结果: {result.rule_id}")
+            else:
+                # 默认保留
+                validated_results.append(result)
         
         return validated_results
     
@@ -159,7 +292,7 @@ class SmartAIValidator:
             validation_prompt = self._build_validation_prompt(result, context)
             
             # 调用AI进行验证
-            ai_response = await self._call_ai_for_validation(validation_prompt, context)
+            ai_response = await self._ask_ai("validation", validation_prompt, context)
             
             # 解析AI响应
             return self._parse_validation_response(ai_response)
@@ -168,19 +301,25 @@ class SmartAIValidator:
             logger.warning(f"验证单个结果时出错: {e}")
             return ValidationAction.CONFIRM  # 默认确认
     
-    async def _discover_new_issues(
+    async def _fetch_ai_hits(self, context: ValidationContext) -> List[Dict[str, Any]]:
+        """调用AI抽取器获取候选问题，失败时返回空列表"""
+        try:
+            return await self.extractor_client.ai_extract_pairs(
+                context.document_text, 
+                context.document_hash
+            )
+        except Exception as e:
+            logger.error(f"发现新问题时出错: {e}")
+            return []
+    
+    def _discover_new_issues(
         self, 
+        ai_hits: List[Dict[str, Any]],
         context: ValidationContext, 
         existing_results: List[ValidationIssue]
     ) -> List[ValidationIssue]:
-        """发现新问题"""
+        """从AI抽取结果中发现新问题"""
         try:
-            # 使用AI抽取器发现新问题
-            ai_hits = await self.extractor_client.ai_extract_pairs(
-                context.document_text, 
-                context.document_hash
-            )
-            
             new_issues = []
             existing_issues_set = self._build_existing_issues_set(existing_results)
             
@@ -203,41 +342,118 @@ class SmartAIValidator:
         results: List[ValidationIssue], 
         context: ValidationContext
     ) -> List[ValidationIssue]:
-        """增强问题描述"""
-        enhanced_results = []
+        """增强问题描述（并发执行）"""
+        outcomes = await asyncio.gather(
+            *(self._enhance_if_confident(result, context) for result in results),
+            return_exceptions=True
+        )
         
-        for result in results:
-            try:
-                if result.confidence >= IssueConfidence.MEDIUM:
-                    enhanced_result = await self._enhance_single_result(result, context)
-                    enhanced_results.append(enhanced_result)
-                else:
-                    enhanced_results.append(result)
-            except Exception as e:
-                logger.warning(f"增强描述时出错: {e}")
+        enhanced_results = []
+        for result, outcome in zip(results, outcomes, strict=True):
+            if isinstance(outcome, BaseException):
+                logger.warning(f"增强描述时出错: {outcome}")
                 enhanced_results.append(result)
+            else:
+                enhanced_results.append(outcome)
         
         return enhanced_results
     
-    async def _enhance_single_result(
+    async def _enhance_if_confident(
         self, 
         result: ValidationIssue, 
         context: ValidationContext
     ) -> ValidationIssue:
-        """增强单个结果的描述"""
+        """置信度达到中等及以上时增强描述，否则原样返回"""
+        if result.confidence >= IssueConfidence.MEDIUM:
+            return await self._enhance_single_result(result, context)
+        return result
+    
+    async def _ask_ai(self, kind: str, prompt: str, context: ValidationContext) -> str:
+        """取一条提示的AI响应：先查响应缓存，未命中时调用单次接口"""
+        cached = await self._response_cache_get(kind, prompt)
+        if cached is not None:
+            return cached
+        
+        call = (self._call_ai_for_validation if kind == "validation"
+                else self._call_ai_for_enhancement)
+        async with self._semaphore():
+            response = await call(prompt, context)
+        
+        await self._response_cache_put(kind, prompt, response)
+        return response
+    
+    def _response_cache_key(self, kind: str, prompt: str) -> str:
+        return self._hash_text(f"{kind}\x1f{PROMPT_VERSION}\x1f{prompt}")
+    
+    async def _response_cache_get(self, kind: str, prompt: str) -> Optional[str]:
+        """查响应缓存（内存优先，其次磁盘；磁盘读取放到线程中，不阻塞事件循环）"""
+        if not self.config.cache_enabled:
+            return None
+        key = self._response_cache_key(kind, prompt)
+        response = self._resp_cache.get(key)
+        if response is None:
+            path = self._response_cache_path(key)
+            if path is not None:
+                response = await asyncio.to_thread(_read_cached_response, path)
+        if response is None:
+            self.cache_misses += 1
+            logger.debug("AI响应缓存未命中 (%s): hits=%d misses=%d",
+                         kind, self.cache_hits, self.cache_misses)
+            return None
+        self._resp_cache[key] = response
+        self._resp_cache.move_to_end(key)
+        self.cache_hits += 1
+        logger.debug("AI响应缓存命中 (%s): hits=%d misses=%d",
+                     kind, self.cache_hits, self.cache_misses)
+        return response
+    
+    async def _response_cache_put(self, kind: str, prompt: str, response: str) -> None:
+        """写响应缓存；空响应（调用失败时的默认值）不缓存"""
+        if not self.config.cache_enabled or not response:
+            return
+        key = self._response_cache_key(kind, prompt)
+        self._resp_cache[key] = response
+        self._resp_cache.move_to_end(key)
+        while len(self._resp_cache) > self.config.cache_size:
+            self._resp_cache.popitem(last=False)
+        path = self._response_cache_path(key)
+        if path is not None:
+            await asyncio.to_thread(_write_cached_response, path, response)
+    
+    def _response_cache_path(self, key: str) -> Optional[Path]:
+        if not self.config.cache_dir:
+            return None
+        return Path(self.config.cache_dir).expanduser() / key[:2] / f"{key[2:]}.json"
+    
+    def _semaphore(self) -> asyncio.Semaphore:
+        """获取当前事件循环上的并发信号量"""
+        loop = asyncio.get_running_loop()
+        if self._sem is None or self._sem_loop is not loop:
+            self._sem = asyncio.Semaphore(max(1, self.config.max_concurrency))
+            self._sem_loop = loop
+        return self._sem
+    
+    async def _enhance_single_result(
+        self, 
+        result: ValidationIssue, 
+        context: ValidationContext,
+        duplicates: Optional[List[ValidationIssue]] = None
+    ) -> ValidationIssue:
+        """增强单个结果的描述；duplicates 一并应用同一增强"""
         try:
             # 构造增强提示
             enhancement_prompt = self._build_enhancement_prompt(result, context)
             
             # 调用AI进行增强
-            ai_response = await self._call_ai_for_enhancement(enhancement_prompt, context)
+            ai_response = await self._ask_ai("enhancement", enhancement_prompt, context)
             
             # 解析并应用增强
             enhanced_description = self._parse_enhancement_response(ai_response)
             if enhanced_description:
-                result.description = enhanced_description
-                result.metadata = result.metadata or {}
-                result.metadata["ai_enhanced"] = True
+                for target in [result, *(duplicates or [])]:
+                    target.description = enhanced_description
+                    target.metadata = target.metadata or {}
+                    target.metadata["ai_enhanced"] = True
             
             return result
             
@@ -247,33 +463,15 @@ class SmartAIValidator:
     
     def _build_validation_prompt(self, result: ValidationIssue, context: ValidationContext) -> str:
         """构建验证提示"""
-        return f"""
-请验证以下预算检查问题是否准确：
-
-问题描述：{result.description}
-规则ID：{result.rule_id}
-文本片段：{result.text_snippet or '无'}
-
-文档上下文：
-{context.document_text[:500]}...
-
-请回答：CONFIRM（确认）、REJECT（拒绝）或 ENHANCE（需要增强）
-"""
+        return _make_validation_prompt(
+            result.description, result.rule_id, result.text_snippet or '无', context.document_prefix
+        )
     
     def _build_enhancement_prompt(self, result: ValidationIssue, context: ValidationContext) -> str:
         """构建增强提示"""
-        return f"""
-请为以下预算检查问题提供更详细的描述：
-
-当前描述：{result.description}
-规则ID：{result.rule_id}
-文本片段：{result.text_snippet or '无'}
-
-文档上下文：
-{context.document_text[:500]}...
-
-请提供更详细、更准确的问题描述：
-"""
+        return _make_enhancement_prompt(
+            result.description, result.rule_id, result.text_snippet or '无', context.document_prefix
+        )
     
     async def _call_ai_for_validation(self, prompt: str, context: ValidationContext) -> str:
         """调用AI进行验证"""
@@ -296,16 +494,12 @@ class SmartAIValidator:
             return ""
     
     def _parse_validation_response(self, response: str) -> ValidationAction:
-        """解析验证响应"""
-        response = response.strip().upper()
-        if "CONFIRM" in response:
-            return ValidationAction.CONFIRM
-        elif "REJECT" in response:
-            return ValidationAction.REJECT
-        elif "ENHANCE" in response:
-            return ValidationAction.ENHANCE
-        else:
-            return ValidationAction.CONFIRM
+        """解析验证响应（一次扫描收集出现的动作词，优先级 CONFIRM > REJECT > ENHANCE）"""
+        found = {m.upper() for m in _ACTION_RE.findall(response)}
+        for action in _ACTION_PRIORITY:
+            if action.value.upper() in found:
+                return action
+        return ValidationAction.CONFIRM
     
     def _parse_enhancement_response(self, response: str) -> Optional[str]:
         """解析增强响应"""
@@ -313,20 +507,14 @@ class SmartAIValidator:
             return response.strip()
         return None
     
-    def _build_existing_issues_set(self, results: List[ValidationIssue]) -> Set[str]:
+    def _build_existing_issues_set(self, results: List[ValidationIssue]) -> Set[int]:
         """构建已存在问题的集合"""
-        existing_set = set()
-        for result in results:
-            # 使用描述和文本片段的组合作为唯一标识
-            key = f"{result.description}:{result.text_snippet or ''}"
-            existing_set.add(key.lower())
-        return existing_set
+        # 使用描述和文本片段的组合摘要作为唯一标识
+        return {_issue_key(result.description, result.text_snippet or '') for result in results}
     
-    def _is_duplicate_issue(self, ai_hit: Dict[str, Any], existing_set: Set[str]) -> bool:
+    def _is_duplicate_issue(self, ai_hit: Dict[str, Any], existing_set: Set[int]) -> bool:
         """检查是否为重复问题"""
-        description = ai_hit.get("description", "")
-        text_snippet = ai_hit.get("text_snippet", "")
-        key = f"{description}:{text_snippet}".lower()
+        key = _issue_key(ai_hit.get("description", ""), ai_hit.get("text_snippet", "") or "")
         return key in existing_set
     
     def _convert_ai_hit_to_result(
@@ -375,8 +563,8 @@ class SmartAIValidator:
             return IssueConfidence.LOW
     
     def _generate_hash(self, text: str) -> str:
-        """生成文本哈希"""
-        return hashlib.md5(text.encode()).hexdigest()
+        """生成文本哈希（与抽取器缓存键同一算法）"""
+        return self._hash_text(text)
 
 def create_ai_validator(config: Optional[AIValidationConfig] = None) -> SmartAIValidator:
     """创建AI验证器实例"""
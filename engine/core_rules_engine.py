@@ -3,14 +3,13 @@
 实现关键预算检查规则，包括目录一致性、缺表检查、口径一致性、总表恒等、年份一致性
 """
 
-import re
-from typing import List, Dict, Any, Optional, Tuple, Set
-from decimal import Decimal
 import logging
-from dataclasses import dataclass
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
 
-from .table_name_matcher import TableNameMatcher
-from .robust_number_parser import RobustNumberParser
+from .keyword_scanner import KeywordScanner
 
 logger = logging.getLogger(__name__)
 
@@ -27,13 +26,24 @@ class ValidationResult:
     page_numbers: List[int]
 
 
+@dataclass
+class PageScan:
+    """逐页单遍扫描的结果，各项检查在此基础上聚合"""
+    missing_tables: Set[str] = field(default_factory=set)
+    three_public_mentions: List[Dict[str, Any]] = field(default_factory=list)
+    year_counter: Counter = field(default_factory=Counter)
+    year_pages: Dict[str, List[int]] = field(default_factory=lambda: defaultdict(list))
+    toc_page_num: int = -1
+
+
 class CoreRulesEngine:
     """核心规则引擎"""
     
     def __init__(self):
         """初始化规则引擎"""
-        self.table_matcher = TableNameMatcher()
-        self.number_parser = RobustNumberParser()
+        # 表名匹配器与数字解析器构造较重（编译正则、加载 numpy），首次使用时再创建
+        self._table_matcher = None
+        self._number_parser = None
         
         # 九张表标准名称
         self.required_tables = [
@@ -42,24 +52,52 @@ class CoreRulesEngine:
             "政府性基金预算支出表", "国有资本经营预算收入表",
             "国有资本经营预算支出表", "社会保险基金预算收支情况表"
         ]
+        self._required_tables_set = frozenset(self.required_tables)
         
         # 关键词配置
         self.three_public_keywords = ["三公经费", "因公出国", "公务接待", "公务用车"]
         self.operation_keywords = ["机关运行经费", "日常公用经费", "办公费"]
         self.procurement_keywords = ["政府采购", "采购金额", "采购预算"]
         
+        self.toc_keywords = ["目录", "目　录"]
+        
         # 编译正则表达式
         self.year_pattern = re.compile(r'20\d{2}')
+        
+        # 所有关键词共用一个扫描器，每页只遍历一次
+        self.keyword_scanner = KeywordScanner({
+            "table": self.required_tables,
+            "three_public": self.three_public_keywords,
+            "operation": self.operation_keywords,
+            "procurement": self.procurement_keywords,
+            "toc": self.toc_keywords,
+        })
+    
+    @property
+    def table_matcher(self):
+        if self._table_matcher is None:
+            from .table_name_matcher import TableNameMatcher
+            self._table_matcher = TableNameMatcher()
+        return self._table_matcher
+    
+    @property
+    def number_parser(self):
+        if self._number_parser is None:
+            from .robust_number_parser import RobustNumberParser
+            self._number_parser = RobustNumberParser()
+        return self._number_parser
     
     def validate_all(self, document_data: Dict[str, Any]) -> List[ValidationResult]:
         """执行所有核心规则验证"""
         results = []
         
         try:
-            results.extend(self._validate_missing_tables(document_data))
-            results.extend(self._validate_three_public_consistency(document_data))
-            results.extend(self._validate_year_consistency(document_data))
-            results.extend(self._validate_toc_consistency(document_data))
+            # 所有页面只遍历一次，各项检查只对扫描结果做聚合
+            scan = self._scan_pages(document_data.get('pages_text', []))
+            results.extend(self._validate_missing_tables(document_data, scan))
+            results.extend(self._validate_three_public_consistency(document_data, scan))
+            results.extend(self._validate_year_consistency(document_data, scan))
+            results.extend(self._validate_toc_consistency(document_data, scan))
             
         except Exception as e:
             logger.error(f"规则验证过程中出现错误: {e}")
@@ -71,26 +109,58 @@ class CoreRulesEngine:
         
         return results
     
-    def _validate_missing_tables(self, document_data: Dict[str, Any]) -> List[ValidationResult]:
-        """验证缺表/缺章节"""
-        results = []
+    def _scan_pages(self, pages_text: List[str]) -> PageScan:
+        """
+        单遍扫描所有页面：关键词命中、缺表、三公经费提及、年份、目录页
+        """
+        scan = PageScan(missing_tables=set(self._required_tables_set))
+        remaining = scan.missing_tables
         
-        try:
-            pages_text = document_data.get('pages_text', [])
-            found_tables = set()
+        for i, page_text in enumerate(pages_text):
+            hits = self.keyword_scanner.scan(page_text)
             
-            for page_text in pages_text:
-                for table_name in self.required_tables:
-                    # 简单的字符串匹配检查
-                    if table_name in page_text:
-                        found_tables.add(table_name)
-                    else:
-                        # 使用表格匹配器
+            # 缺表：先看直接命中，仍有缺失时再用表格匹配器（较重，每页至多调用一次）
+            if remaining:
+                remaining.difference_update(hits["table"])
+                if remaining:
+                    try:
                         match = self.table_matcher.match_table_name(page_text)
-                        if match and match.get('standard_name') == table_name:
-                            found_tables.add(table_name)
+                    except Exception as e:
+                        logger.warning(f"表格名称匹配失败（第{i + 1}页）: {e}")
+                        match = None
+                    if match:
+                        remaining.discard(match.get('standard_name'))
+            
+            # 三公经费：按关键词顺序记录提及，数字留到比对时再按页抽取
+            if hits["three_public"]:
+                for keyword in self.three_public_keywords:
+                    if keyword in hits["three_public"]:
+                        scan.three_public_mentions.append({
+                            'page': i + 1,
+                            'keyword': keyword
+                        })
+            
+            # 年份
+            for m in self.year_pattern.finditer(page_text):
+                year = m.group()
+                scan.year_counter[year] += 1
+                scan.year_pages[year].append(i + 1)
             
-            missing_tables = set(self.required_tables) - found_tables
+            # 目录页（取第一处）
+            if scan.toc_page_num == -1 and hits["toc"]:
+                scan.toc_page_num = i
+        
+        return scan
+    
+    def _validate_missing_tables(self, document_data: Dict[str, Any],
+                                 scan: Optional[PageScan] = None) -> List[ValidationResult]:
+        """验证缺表/缺章节"""
+        results = []
+        
+        try:
+            if scan is None:
+                scan = self._scan_pages(document_data.get('pages_text', []))
+            missing_tables = scan.missing_tables
             
             if missing_tables:
                 results.append(ValidationResult(
@@ -111,27 +181,32 @@ class CoreRulesEngine:
         
         return results
     
-    def _validate_three_public_consistency(self, document_data: Dict[str, Any]) -> List[ValidationResult]:
+    def _validate_three_public_consistency(
+        self, document_data: Dict[str, Any], scan: Optional[PageScan] = None
+    ) -> List[ValidationResult]:
         """验证三公经费口径一致性"""
         results = []
         
         try:
-            pages_text = document_data.get('pages_text', [])
-            three_public_mentions = []
-            
-            for i, page_text in enumerate(pages_text):
-                for keyword in self.three_public_keywords:
-                    if keyword in page_text:
-                        numbers = self.number_parser.extract_all_numbers(page_text)
-                        three_public_mentions.append({
-                            'page': i + 1, 
-                            'keyword': keyword, 
-                            'numbers': numbers
-                        })
+            if scan is None:
+                scan = self._scan_pages(document_data.get('pages_text', []))
+            three_public_mentions = scan.three_public_mentions
             
             if len(three_public_mentions) == 0:
                 return results  # 没有相关内容，不做验证
             
+            # 至少两处提及才需要比对金额；同页多个关键词共用一次数字抽取
+            if len(three_public_mentions) >= 2:
+                pages_text = document_data.get('pages_text', [])
+                numbers_by_page: Dict[int, List] = {}
+                for mention in three_public_mentions:
+                    page = mention['page']
+                    if page not in numbers_by_page:
+                        numbers_by_page[page] = self.number_parser.extract_all_numbers(
+                            pages_text[page - 1]
+                        )
+                    mention['numbers'] = numbers_by_page[page]
+            
             inconsistencies = self._check_amount_consistency(three_public_mentions, "三公经费")
             
             if inconsistencies:
@@ -158,52 +233,50 @@ class CoreRulesEngine:
         
         return results
     
-    def _validate_year_consistency(self, document_data: Dict[str, Any]) -> List[ValidationResult]:
+    def _validate_year_consistency(self, document_data: Dict[str, Any],
+                                   scan: Optional[PageScan] = None) -> List[ValidationResult]:
         """验证年份一致性"""
         results = []
         
         try:
-            pages_text = document_data.get('pages_text', [])
-            year_mentions = {}
-            
-            for i, page_text in enumerate(pages_text):
-                years = self.year_pattern.findall(page_text)
-                for year in years:
-                    if year not in year_mentions:
-                        year_mentions[year] = []
-                    year_mentions[year].append(i + 1)
+            if scan is None:
+                scan = self._scan_pages(document_data.get('pages_text', []))
+            year_pages = scan.year_pages
             
-            if not year_mentions:
+            if not scan.year_counter:
                 return results
             
-            main_year = max(year_mentions.keys(), key=lambda y: len(year_mentions[y]))
-            other_years = {y: pages for y, pages in year_mentions.items() if y != main_year}
+            # 计数相同时 most_common 取先出现的年份，与按页序首次出现一致
+            main_year = scan.year_counter.most_common(1)[0][0]
             
-            if other_years:
+            if len(year_pages) > 1:
                 main_year_int = int(main_year)
-                reasonable_years = {str(main_year_int - 1), str(main_year_int + 1)}
+                allowed_years = {main_year, str(main_year_int - 1), str(main_year_int + 1)}
                 
-                problematic_years = {year: pages for year, pages in other_years.items() 
-                                   if year not in reasonable_years}
+                problematic_years = {year: pages for year, pages in year_pages.items()
+                                     if year not in allowed_years}
                 
                 if problematic_years:
                     results.append(ValidationResult(
                         rule_id="YEAR_001", rule_name="年份不一致", is_valid=False,
                         severity="warning", message=f"发现与主要年份{main_year}不一致的年份",
-                        evidence=[{"year": year, "pages": pages} for year, pages in problematic_years.items()],
+                        evidence=[
+                            {"year": year, "pages": pages}
+                            for year, pages in problematic_years.items()
+                        ],
                         page_numbers=[p for pages in problematic_years.values() for p in pages]
                     ))
                 else:
                     results.append(ValidationResult(
                         rule_id="YEAR_001", rule_name="年份一致性", is_valid=True,
                         severity="info", message=f"年份使用一致，主要年份为{main_year}",
-                        evidence=[], page_numbers=year_mentions[main_year][:3]
+                        evidence=[], page_numbers=year_pages[main_year][:3]
                     ))
             else:
                 results.append(ValidationResult(
                     rule_id="YEAR_001", rule_name="年份一致性", is_valid=True,
                     severity="info", message=f"文档中年份使用一致：{main_year}",
-                    evidence=[], page_numbers=year_mentions[main_year][:3]
+                    evidence=[], page_numbers=year_pages[main_year][:3]
                 ))
                 
         except Exception as e:
@@ -211,7 +284,8 @@ class CoreRulesEngine:
         
         return results
     
-    def _validate_toc_consistency(self, document_data: Dict[str, Any]) -> List[ValidationResult]:
+    def _validate_toc_consistency(self, document_data: Dict[str, Any],
+                                  scan: Optional[PageScan] = None) -> List[ValidationResult]:
         """验证目录-正文顺序一致性"""
         results = []
         
@@ -219,13 +293,11 @@ class CoreRulesEngine:
             pages_text = document_data.get('pages_text', [])
             if not pages_text:
                 return results
+            if scan is None:
+                scan = self._scan_pages(pages_text)
             
-            # 查找目录页
-            toc_page_num = -1
-            for i, page_text in enumerate(pages_text):
-                if any(keyword in page_text for keyword in ["目录", "目　录"]):
-                    toc_page_num = i
-                    break
+            # 目录页
+            toc_page_num = scan.toc_page_num
             
             if toc_page_num == -1:
                 results.append(ValidationResult(
@@ -256,7 +328,7 @@ class CoreRulesEngine:
         all_amounts = []
         for mention in mentions:
             if 'numbers' in mention and mention['numbers']:
-                for original_text, amount, start, end in mention['numbers']:
+                for original_text, amount, _start, _end in mention['numbers']:
                     all_amounts.append({
                         'page': mention.get('page', 1),
                         'keyword': mention.get('keyword', ''),
@@ -267,8 +339,12 @@ class CoreRulesEngine:
         # 检查金额差异
         if len(all_amounts) > 1:
             base_amount = all_amounts[0]['amount']
-            for other in all_amounts[1:]:
-                if not self.number_parser.calculate_tolerance(base_amount, other['amount']):
+            others = all_amounts[1:]
+            within = self.number_parser.tolerance_mask(
+                base_amount, [other['amount'] for other in others]
+            )
+            for other, ok in zip(others, within, strict=True):
+                if not ok:
                     inconsistencies.append({
                         'category': category,
                         'base_amount': str(base_amount),
@@ -3,23 +3,45 @@
 将三层验证系统集成到现有检查流程中
 """
 
-import logging
 import asyncio
-from typing import List, Dict, Any, Optional
+import concurrent.futures
+import logging
+import threading
 import time
-from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
+from .ai_validator import AIValidationConfig, create_ai_validator
 from .hybrid_validator import (
-    ValidationIssue, IssueSource, IssueSeverity, IssueConfidence,
-    ValidationContext, HybridConfig
+    HybridConfig,
+    IssueConfidence,
+    IssueSeverity,
+    IssueSource,
+    ValidationContext,
+    ValidationIssue,
 )
-from .rule_adapter import create_rule_engine_validator, EnhancedRuleEngine
-from .ai_validator import create_ai_validator, AIValidationConfig
-from .intelligent_merger import create_intelligent_merger, MergeConfig, MergeStrategy
+from .intelligent_merger import MergeConfig, MergeStrategy, create_intelligent_merger
+from .pipeline import run_rules as _fallback_run_rules
+from .rule_adapter import create_rule_engine_validator
 from .rules_v33 import Issue, order_and_number_issues
 
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
 logger = logging.getLogger(__name__)
 
+# 传统 Issue 严重程度字符串 -> 严重程度 / 置信度（未列出的一律按 info 处理）
+_SEVERITY_MAP = {
+    "error": IssueSeverity.HIGH, "fatal": IssueSeverity.HIGH, "critical": IssueSeverity.HIGH,
+    "warn": IssueSeverity.MEDIUM, "warning": IssueSeverity.MEDIUM,
+}
+_CONFIDENCE_MAP = {
+    "error": IssueConfidence.HIGH, "fatal": IssueConfidence.HIGH, "critical": IssueConfidence.HIGH,
+    "warn": IssueConfidence.MEDIUM, "warning": IssueConfidence.MEDIUM,
+}
+
 class HybridPipeline:
     """混合验证架构Pipeline"""
     
@@ -88,8 +110,25 @@ class HybridPipeline:
                 metadata={"doc_obj": doc_obj}
             )
             
-            # 执行混合验证
-            results = self.hybrid_engine.validate_document(context)
+            # 规则层（CPU 密集，放到线程池）与AI层（网络 I/O）并发执行，完成后再合并
+            loop = asyncio.get_running_loop()
+            layers = []
+            if self.config.rules_enabled:
+                layers.append(loop.run_in_executor(None, self.rule_validator.validate, context))
+            if use_ai_assist and self.ai_validator is not None:
+                layers.append(self.ai_validator.validate_and_extend(document, []))
+            
+            outputs = await asyncio.wait_for(
+                asyncio.gather(*layers),
+                timeout=self.config.rules_timeout + self.config.ai_timeout
+            )
+            rule_results = outputs[0] if self.config.rules_enabled else []
+            ai_results = outputs[-1] if use_ai_assist and self.ai_validator is not None else []
+            
+            if self.config.merge_enabled:
+                results = self.merger.merge_results(rule_results, ai_results)
+            else:
+                results = rule_results + ai_results
             
             elapsed = time.time() - start_time
             logger.info(f"混合验证完成，耗时{elapsed:.2f}秒，共{len(results)}个问题")
@@ -107,8 +146,7 @@ class HybridPipeline:
         try:
             if doc_obj:
                 # 使用传统规则引擎
-                from .pipeline import run_rules
-                issues = run_rules(doc_obj, use_ai_assist=False)
+                issues = _fallback_run_rules(doc_obj, use_ai_assist=False)
                 return self._convert_issues_to_results(issues)
             else:
                 return []
@@ -118,119 +156,97 @@ class HybridPipeline:
     
     def _convert_issues_to_results(self, issues: List[Issue]) -> List[ValidationIssue]:
         """将传统Issue转换为ValidationIssue"""
-        results = []
-        for issue in issues:
-            try:
-                # 确定问题来源
-                source = IssueSource.RULE_ENGINE
-                
-                # 确定置信度
-                confidence = self._map_confidence(issue.severity)
-                
-                # 确定严重程度
-                severity = self._map_severity(issue.severity)
-                
-                result = ValidationIssue(
-                    rule_id=issue.rule,
-                    title=f"规则检查: {issue.rule}",
-                    description=issue.message,
-                    severity=severity,
-                    confidence=confidence,
-                    source=source,
-                    text_snippet=str(issue.location)[:100],
-                    metadata={
-                        "rule": issue.rule,
-                        "original_severity": issue.severity,
-                        "source": "fallback_rules",
-                        "original_issue": issue
-                    }
-                )
-                results.append(result)
-            except Exception as e:
-                logger.warning(f"转换Issue时出错: {e}")
+        # 先统一校验，转换本身不再逐条 try
+        valid = [issue for issue in issues if isinstance(getattr(issue, "severity", None), str)]
+        if len(valid) != len(issues):
+            logger.warning(f"转换Issue时跳过{len(issues) - len(valid)}个无效问题")
         
-        return results
+        sev_get, conf_get = _SEVERITY_MAP.get, _CONFIDENCE_MAP.get
+        _LOW_SEV, _LOW_CONF, _RULE = IssueSeverity.LOW, IssueConfidence.LOW, IssueSource.RULE_ENGINE
+        return [
+            ValidationIssue(
+                rule_id=issue.rule,
+                title=f"规则检查: {issue.rule}",
+                description=issue.message,
+                severity=sev_get(sev, _LOW_SEV),
+                confidence=conf_get(sev, _LOW_CONF),
+                source=_RULE,
+                text_snippet=str(issue.location)[:100],
+                metadata={
+                    "rule": issue.rule,
+                    "original_severity": issue.severity,
+                    "source": "fallback_rules",
+                    "original_issue": issue
+                }
+            )
+            for issue in valid
+            for sev in (issue.severity.lower(),)
+        ]
     
     def _map_severity(self, severity_str: str) -> IssueSeverity:
         """映射严重程度字符串到枚举"""
-        severity = severity_str.lower()
-        if severity in ("error", "fatal", "critical"):
-            return IssueSeverity.ERROR
-        elif severity in ("warn", "warning"):
-            return IssueSeverity.WARNING
-        else:
-            return IssueSeverity.INFO
+        return _SEVERITY_MAP.get(severity_str.lower(), IssueSeverity.LOW)
     
     def _map_confidence(self, severity: str) -> IssueConfidence:
         """映射严重程度到置信度"""
-        severity = severity.lower()
-        if severity in ("error", "fatal", "critical"):
-            return IssueConfidence.HIGH
-        elif severity in ("warn", "warning"):
-            return IssueConfidence.MEDIUM
-        else:
-            return IssueConfidence.LOW
+        return _CONFIDENCE_MAP.get(severity.lower(), IssueConfidence.LOW)
 
 def convert_results_to_issues(results: List[ValidationIssue]) -> List[Issue]:
     """将ValidationIssue转换回Issue格式，保持向后兼容"""
-    issues = []
-    for result in results:
-        try:
-            # 映射置信度到严重程度
-            severity = _map_confidence_to_severity(result.confidence)
-            
-            # 解析位置信息
-            location = _parse_location(result.text_snippet or "")
-            
-            # 获取规则代码
-            rule_code = result.rule_id or "HYBRID"
-            
-            issue = Issue(
-                rule=rule_code,
-                severity=severity,
-                message=result.description,
-                location=location
-            )
-            issues.append(issue)
-            
-        except Exception as e:
-            logger.warning(f"转换ValidationIssue时出错: {e}")
+    # 先统一校验，转换本身不再逐条 try
+    valid = [result for result in results if isinstance(result, ValidationIssue)]
+    if len(valid) != len(results):
+        logger.warning(f"转换ValidationIssue时跳过{len(results) - len(valid)}个无效结果")
     
-    return issues
-
-def _map_confidence_to_severity(confidence: IssueConfidence) -> str:
-    """映射置信度到严重程度"""
-    if confidence == IssueConfidence.HIGH:
-        return "error"
-    elif confidence == IssueConfidence.MEDIUM:
-        return "warn"
-    else:
-        return "info"
+    # 置信度 -> 严重程度：高 error、中 warn、其余 info
+    _HIGH, _MED = IssueConfidence.HIGH, IssueConfidence.MEDIUM
+    return [
+        Issue(
+            rule=r.rule_id or "HYBRID",
+            severity=(
+                "error" if r.confidence is _HIGH else "warn" if r.confidence is _MED else "info"
+            ),
+            message=r.description,
+            location=_parse_location(r.text_snippet or "")
+        )
+        for r in valid
+    ]
 
 def _parse_location(location_str: str) -> Dict[str, Any]:
-    """解析位置字符串"""
-    try:
+    """解析位置字符串（返回新字典，调用方可自由修改）"""
+    return dict(_parse_location_cached(location_str))
+
+@lru_cache(maxsize=4096)
+def _parse_location_cached(location_str: str) -> Tuple[Tuple[str, Any], ...]:
+    # 同一页/片段的位置字符串会反复出现；缓存解析结果（以不可变元组保存）
+    if location_str.startswith("{") and location_str.rstrip().endswith("}"):
         # 尝试解析JSON格式的位置
-        import json
-        if location_str.startswith("{"):
-            return json.loads(location_str)
-    except:
-        pass
+        try:
+            parsed = _json_loads(location_str)
+            if isinstance(parsed, dict):
+                return tuple(parsed.items())
+        except ValueError:
+            pass
     
     # 默认位置格式
-    return {"page": 1, "pos": 0, "clip": location_str[:50]}
+    return (("page", 1), ("pos", 0), ("clip", location_str[:50]))
 
 # 全局Pipeline实例
 _hybrid_pipeline = None
+_hybrid_lock = threading.Lock()
 
 def get_hybrid_pipeline(config: Optional[HybridConfig] = None) -> HybridPipeline:
     """获取全局混合Pipeline实例"""
     global _hybrid_pipeline
     if _hybrid_pipeline is None:
-        _hybrid_pipeline = HybridPipeline(config)
+        with _hybrid_lock:
+            if _hybrid_pipeline is None:
+                _hybrid_pipeline = HybridPipeline(config)
     return _hybrid_pipeline
 
-async def run_hybrid_rules(doc, document_text: str = "", use_ai_assist: bool = False) -> List[Issue]:
+async def run_hybrid_rules(
+    doc, document_text: str = "", use_ai_assist: bool = False
+) -> List[Issue]:
     """
     异步运行混合验证规则
     
@@ -260,13 +276,29 @@ async def run_hybrid_rules(doc, document_text: str = "", use_ai_assist: bool = F
         issues = convert_results_to_issues(results)
         
         # 排序和编号
-        return order_and_number_issues(issues)
+        return order_and_number_issues(doc, issues)
         
     except Exception as e:
         logger.error(f"混合验证异步执行失败: {e}")
         # 降级到传统规则
-        from .pipeline import run_rules
-        return run_rules(doc, use_ai_assist=False)
+        return _fallback_run_rules(doc, use_ai_assist=False)
+
+# 同步入口共用的后台事件循环（守护线程中 run_forever），首次使用时启动
+_bg_loop: Optional[asyncio.AbstractEventLoop] = None
+_bg_loop_lock = threading.Lock()
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """获取（必要时启动）后台事件循环"""
+    global _bg_loop
+    if _bg_loop is None:
+        with _bg_loop_lock:
+            if _bg_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="hybrid-pipeline-loop", daemon=True
+                ).start()
+                _bg_loop = loop
+    return _bg_loop
 
 def run_hybrid_rules_sync(doc, document_text: str = "", use_ai_assist: bool = False) -> List[Issue]:
     """
@@ -280,22 +312,33 @@ def run_hybrid_rules_sync(doc, document_text: str = "", use_ai_assist: bool = Fa
     Returns:
         Issue列表
     """
+    loop = _get_background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        # 在后台循环内阻塞等待自己调度的协程只会死锁
+        raise RuntimeError(
+            "run_hybrid_rules_sync 不能在后台事件循环内调用，请改用 await run_hybrid_rules"
+        )
+    
     try:
-        # 使用asyncio运行异步函数
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        config = get_hybrid_pipeline().config
+        # 提交到常驻后台事件循环，避免每次调用都新建/关闭事件循环
+        future = asyncio.run_coroutine_threadsafe(
+            run_hybrid_rules(doc, document_text, use_ai_assist), loop
+        )
         try:
-            return loop.run_until_complete(
-                run_hybrid_rules(doc, document_text, use_ai_assist)
-            )
-        finally:
-            loop.close()
+            return future.result(timeout=config.rules_timeout + config.ai_timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
             
     except Exception as e:
         logger.error(f"混合验证同步执行失败: {e}")
         # 降级到传统规则
-        from .pipeline import run_rules
-        return run_rules(doc, use_ai_assist=False)
+        return _fallback_run_rules(doc, use_ai_assist=False)
 
 def configure_hybrid_pipeline(
     ai_enabled: bool = True,
@@ -315,5 +358,7 @@ def configure_hybrid_pipeline(
         merge_strategy=merge_strategy
     )
     
-    _hybrid_pipeline = HybridPipeline(config)
+    pipeline = HybridPipeline(config)
+    with _hybrid_lock:
+        _hybrid_pipeline = pipeline
     logger.info(f"混合Pipeline配置完成: AI={ai_enabled}, 合并策略={merge_strategy}")
\ No newline at end of file
@@ -3,10 +3,10 @@
 定义了验证问题、配置和接口的基础数据结构
 """
 
+import logging
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional, Protocol
 from enum import Enum
-import logging
+from typing import Any, Dict, List, Optional, Protocol
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +29,7 @@ class IssueConfidence(Enum):
     MEDIUM = 2
     HIGH = 3
 
-@dataclass
+@dataclass(slots=True)
 class ValidationIssue:
     """验证问题"""
     rule_id: str
@@ -41,7 +41,7 @@ class ValidationIssue:
     text_snippet: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = field(default_factory=dict)
 
-@dataclass
+@dataclass(slots=True)
 class HybridConfig:
     """混合验证配置"""
     # 规则引擎配置
@@ -93,7 +93,7 @@ class IntelligentMerger(Protocol):
         """智能合并结果"""
         ...
 
-@dataclass
+@dataclass(slots=True)
 class ValidationContext:
     """验证上下文信息"""
     document_path: str
@@ -3,17 +3,168 @@
 负责合并规则引擎和AI验证器的结果，去重并优化输出
 """
 
+import heapq
 import logging
-from typing import List, Dict, Any, Optional, Set, Tuple
+import re
+import unicodedata
+from collections import defaultdict
 from dataclasses import dataclass, field
 from enum import Enum
-import hashlib
-from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+try:
+    from datasketch import MinHash, MinHashLSH  # 可选：近似重复去重
+except ImportError:
+    MinHash = MinHashLSH = None
 
-from .hybrid_validator import ValidationIssue, IssueSource, IssueSeverity, IssueConfidence
+from .hybrid_validator import IssueConfidence, IssueSource, ValidationIssue
+from .keyword_scanner import KeywordScanner
 
 logger = logging.getLogger(__name__)
 
+# 相似度各分量权重：规则ID、描述词汇重叠、文本片段包含
+_RULE_WEIGHT = 0.4
+_DESC_WEIGHT = 0.4
+_TEXT_WEIGHT = 0.2
+
+def _weighted_similarity(rule_sim: float, desc_sim: float, text_sim: float) -> float:
+    return rule_sim * _RULE_WEIGHT + desc_sim * _DESC_WEIGHT + text_sim * _TEXT_WEIGHT
+
+def _priority_key(result: ValidationIssue) -> Tuple[int, int]:
+    """截断时的排序键：严重程度、置信度"""
+    return (result.severity.value, result.confidence.value)
+
+# 结果数达到该值时截断排序改用 numpy（摊薄数组构建开销）
+_NUMPY_SORT_MIN = 256
+
+def _top_by_priority_numpy(results: List[ValidationIssue], k: int) -> List[ValidationIssue]:
+    """numpy 版按 (严重程度, 置信度) 降序取前 k 个；对取负后的键做稳定升序排序，同分保持原顺序"""
+    n = len(results)
+    sev = np.fromiter((r.severity.value for r in results), dtype=np.int16, count=n)
+    conf = np.fromiter((r.confidence.value for r in results), dtype=np.int16, count=n)
+    idx = np.lexsort((-conf, -sev))[:k]
+    return [results[i] for i in idx.tolist()]
+
+class _IssueFeatures(NamedTuple):
+    """相似度计算用的预处理特征，每个结果只算一次"""
+    rule_id: str
+    has_desc: bool
+    tokens: FrozenSet[str]
+    n_tokens: int
+    snippet: str
+
+def _issue_features(result: ValidationIssue) -> _IssueFeatures:
+    desc = (result.description or "").lower()
+    tokens = frozenset(desc.split())
+    snippet = (result.text_snippet or "").lower()
+    return _IssueFeatures(result.rule_id, bool(desc), tokens, len(tokens), snippet)
+
+def _feature_similarity(f1: _IssueFeatures, f2: _IssueFeatures, threshold: float = 0.0) -> float:
+    """
+    按预处理特征计算相似度（规则ID + 描述词汇 Jaccard + 片段包含）
+    
+    按权重从高到低计算，剩余分量全取满分也达不到 threshold 时提前返回 0.0
+    """
+    rule_sim = 1.0 if f1.rule_id == f2.rule_id else 0.0
+    if _weighted_similarity(rule_sim, 1.0, 1.0) < threshold:
+        return 0.0
+    
+    if f1.has_desc and f2.has_desc and f1.n_tokens and f2.n_tokens:
+        # Jaccard 不超过 min/max，先用词数判断能否达到阈值再求交集
+        small, large = sorted((f1.n_tokens, f2.n_tokens))
+        if _weighted_similarity(rule_sim, small / large, 1.0) < threshold:
+            return 0.0
+        inter = len(f1.tokens & f2.tokens)
+        desc_sim = inter / (f1.n_tokens + f2.n_tokens - inter)
+    else:
+        desc_sim = 0.0
+    if _weighted_similarity(rule_sim, desc_sim, 1.0) < threshold:
+        return 0.0
+    
+    if f1.snippet and f2.snippet:
+        text_sim = 1.0 if f1.snippet in f2.snippet or f2.snippet in f1.snippet else 0.0
+    else:
+        text_sim = 0.0
+    
+    return min(1.0, _weighted_similarity(rule_sim, desc_sim, text_sim))
+
+_MINHASH_PERM = 64
+_MINHASH_THRESHOLD = 0.85
+
+def _shingles(text: str) -> Set[str]:
+    """描述的字符二元组（中文描述通常没有空格，按词切分会退化成整句精确匹配）"""
+    text = "".join(text.lower().split())
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+# 千分位逗号（其后恰为三位数字）与数字串
+_THOUSANDS_SEP_RE = re.compile(r"(?<=\d),(?=\d{3}(?!\d))")
+_NUMBER_TOKEN_RE = re.compile(r"\d+(?:\.\d+)?")
+
+def _number_signature(result: ValidationIssue) -> Tuple[str, ...]:
+    """描述与片段中的数字序列：全角转半角、去千分位、去小数末尾的 0"""
+    text = unicodedata.normalize("NFKC", f"{result.description or ''} {result.text_snippet or ''}")
+    text = _THOUSANDS_SEP_RE.sub("", text)
+    return tuple(
+        n.rstrip("0").rstrip(".") if "." in n else n
+        for n in _NUMBER_TOKEN_RE.findall(text)
+    )
+
+def _same_evidence(a: ValidationIssue, b: ValidationIssue) -> bool:
+    """近似重复的佐证：片段相同，或数字序列相同（均要求非空）"""
+    if a.text_snippet and a.text_snippet == b.text_snippet:
+        return True
+    numbers = _number_signature(a)
+    return bool(numbers) and numbers == _number_signature(b)
+
+@lru_cache(maxsize=1)
+def _minhash_lsh_params() -> Tuple[int, int]:
+    """LSH 分带参数 (b, r)：datasketch 按阈值做数值积分求解，结果固定，只算一次"""
+    lsh = MinHashLSH(threshold=_MINHASH_THRESHOLD, num_perm=_MINHASH_PERM)
+    return lsh.b, lsh.r
+
+def _snippet_containment_pairs(
+    rule_features: List[_IssueFeatures],
+    ai_features: List[_IssueFeatures]
+) -> Dict[int, Set[int]]:
+    """
+    找出文本片段互相包含的 (规则结果, AI结果) 对：两侧片段各建一个多模式扫描器，
+    每个片段只扫描一遍，代替逐对的子串判断
+    """
+    def index_by_snippet(features_list: List[_IssueFeatures]) -> Dict[str, List[int]]:
+        by_snippet: Dict[str, List[int]] = defaultdict(list)
+        for i, features in enumerate(features_list):
+            if features.snippet:
+                by_snippet[features.snippet].append(i)
+        return by_snippet
+    
+    rule_by_snippet = index_by_snippet(rule_features)
+    ai_by_snippet = index_by_snippet(ai_features)
+    pairs: Dict[int, Set[int]] = defaultdict(set)
+    if not rule_by_snippet or not ai_by_snippet:
+        return pairs
+    
+    # AI片段包含于规则片段
+    ai_scanner = KeywordScanner({"snippet": ai_by_snippet})
+    for snippet, rule_indices in rule_by_snippet.items():
+        hit_ai = {i for _, kw in ai_scanner.iter_hits(snippet) for i in ai_by_snippet[kw]}
+        if hit_ai:
+            for r in rule_indices:
+                pairs[r].update(hit_ai)
+    
+    # 规则片段包含于AI片段
+    rule_scanner = KeywordScanner({"snippet": rule_by_snippet})
+    for snippet, ai_indices in ai_by_snippet.items():
+        for _, kw in rule_scanner.iter_hits(snippet):
+            for r in rule_by_snippet[kw]:
+                pairs[r].update(ai_indices)
+    
+    return pairs
+
 class MergeStrategy(Enum):
     """合并策略"""
     CONSERVATIVE = "conservative"  # 保守：保留更多问题
@@ -21,7 +172,7 @@ class MergeStrategy(Enum):
     BALANCED = "balanced"          # 平衡：默认策略
     RULE_PRIORITY = "rule_priority"  # 规则优先：规则结果优先级更高
 
-@dataclass
+@dataclass(slots=True)
 class MergeConfig:
     """合并配置"""
     similarity_threshold: float = 0.8
@@ -30,7 +181,7 @@ class MergeConfig:
     boost_confidence: bool = True
     remove_duplicates: bool = True
 
-@dataclass
+@dataclass(slots=True)
 class MergeCandidate:
     """合并候选项"""
     rule_result: Optional[ValidationIssue] = None
@@ -107,18 +258,58 @@ class SmartIntelligentMerger:
         ai_results: List[ValidationIssue]
     ) -> List[MergeCandidate]:
         """找到合并候选项"""
+        # 按 rule_id 分桶：规则ID不同的一对最高只有 描述+片段 两项分量，阈值高于此上界
+        # （默认 0.8 > 0.6）时只需在同桶内比较；否则用描述词倒排索引补充有共同词的AI结果，
+        # 阈值低到仅凭片段包含即可达到时再用多模式匹配补充片段互相包含的AI结果。
+        # 候选按原顺序比较，结果与两两比较一致
         candidates = []
         used_ai_indices = set()
+        threshold = self.config.similarity_threshold
+        
+        rule_features = [_issue_features(r) for r in rule_results]
+        ai_features = [_issue_features(r) for r in ai_results]
+        
+        ai_by_rule: Dict[str, List[int]] = defaultdict(list)
+        for i, ai_result in enumerate(ai_results):
+            ai_by_rule[ai_result.rule_id].append(i)
+        
+        scan_all = threshold <= _weighted_similarity(0.0, 0.0, 0.0)
+        need_tokens = threshold <= _weighted_similarity(0.0, 1.0, 1.0)
+        need_snippets = threshold <= _weighted_similarity(0.0, 0.0, 1.0)
+        
+        ai_by_token: Dict[str, List[int]] = defaultdict(list)
+        if need_tokens and not scan_all:
+            for i, features in enumerate(ai_features):
+                for token in features.tokens:
+                    ai_by_token[token].append(i)
+        
+        snippet_pairs: Dict[int, Set[int]] = {}
+        if need_snippets and not scan_all:
+            snippet_pairs = _snippet_containment_pairs(rule_features, ai_features)
         
         # 为每个规则结果找匹配的AI结果
-        for rule_result in rule_results:
+        for rule_index, (rule_result, features) in enumerate(
+            zip(rule_results, rule_features, strict=True)
+        ):
             candidate = MergeCandidate(rule_result=rule_result)
             
-            for i, ai_result in enumerate(ai_results):
+            if scan_all:
+                indices = range(len(ai_results))
+            elif need_tokens:
+                blocked = set(ai_by_rule.get(rule_result.rule_id, ()))
+                for token in features.tokens:
+                    blocked.update(ai_by_token.get(token, ()))
+                blocked.update(snippet_pairs.get(rule_index, ()))
+                indices = sorted(blocked)
+            else:
+                indices = ai_by_rule.get(rule_result.rule_id, ())
+            
+            for i in indices:
                 if i in used_ai_indices:
                     continue
                 
-                similarity = self._calculate_similarity(rule_result, ai_result)
+                ai_result = ai_results[i]
+                similarity = _feature_similarity(features, ai_features[i], threshold)
                 if similarity >= self.config.similarity_threshold:
                     candidate.ai_results.append(ai_result)
                     candidate.similarity_score = max(candidate.similarity_score, similarity)
@@ -141,39 +332,7 @@ class SmartIntelligentMerger:
     ) -> float:
         """计算两个结果的相似度"""
         try:
-            # 1. 规则ID相似度
-            rule_sim = 1.0 if result1.rule_id == result2.rule_id else 0.0
-            
-            # 2. 描述相似度（简化版）
-            desc1 = (result1.description or "").lower()
-            desc2 = (result2.description or "").lower()
-            
-            if not desc1 or not desc2:
-                desc_sim = 0.0
-            else:
-                # 简单的词汇重叠计算
-                words1 = set(desc1.split())
-                words2 = set(desc2.split())
-                if words1 or words2:
-                    desc_sim = len(words1 & words2) / len(words1 | words2)
-                else:
-                    desc_sim = 0.0
-            
-            # 3. 文本片段相似度
-            text1 = (result1.text_snippet or "").lower()
-            text2 = (result2.text_snippet or "").lower()
-            
-            if text1 and text2:
-                # 检查是否有重叠内容
-                text_sim = 1.0 if text1 in text2 or text2 in text1 else 0.0
-            else:
-                text_sim = 0.0
-            
-            # 加权平均
-            total_sim = (rule_sim * 0.4 + desc_sim * 0.4 + text_sim * 0.2)
-            
-            return min(1.0, total_sim)
-            
+            return _feature_similarity(_issue_features(result1), _issue_features(result2))
         except Exception as e:
             logger.warning(f"计算相似度时出错: {e}")
             return 0.0
@@ -253,30 +412,80 @@ class SmartIntelligentMerger:
         # 去重
         if self.config.remove_duplicates:
             results = self._remove_duplicates(results)
+            if MinHashLSH is not None:
+                results = self._remove_near_duplicates(results)
         
         # 限制数量
         if len(results) > self.config.max_results:
-            # 按严重程度和置信度排序
-            results.sort(key=lambda x: (x.severity.value, x.confidence.value), reverse=True)
-            results = results[:self.config.max_results]
+            # 按严重程度和置信度取前 max_results 个，与稳定降序排序后截断结果一致
+            if len(results) >= _NUMPY_SORT_MIN:
+                results = _top_by_priority_numpy(results, self.config.max_results)
+            else:
+                # O(N log k)
+                results = heapq.nlargest(self.config.max_results, results, key=_priority_key)
         
         return results
     
     def _remove_duplicates(self, results: List[ValidationIssue]) -> List[ValidationIssue]:
-        """去重"""
-        seen_hashes = set()
-        unique_results = []
+        """去重：内容相同的结果只保留严重程度/置信度最高的一个，位置取首次出现处"""
+        best: Dict[Tuple[str, str, Optional[str]], ValidationIssue] = {}
         
         for result in results:
-            # 创建结果的哈希
-            content = f"{result.rule_id}:{result.description}:{result.text_snippet}"
-            result_hash = hashlib.md5(content.encode()).hexdigest()
+            key = (result.rule_id, result.description, result.text_snippet)
+            current = best.get(key)
+            if current is None or _priority_key(result) > _priority_key(current):
+                best[key] = result
+        
+        return list(best.values())
+    
+    def _remove_near_duplicates(self, results: List[ValidationIssue]) -> List[ValidationIssue]:
+        """
+        近似去重：仅处理AI验证器的结果。同一规则下描述近似（MinHash 估计 Jaccard ≥ 阈值）
+        且片段或数字相同的结果只保留首个，其余结果的元数据并入保留项。需要 datasketch
+        """
+        lsh = MinHashLSH(num_perm=_MINHASH_PERM, params=_minhash_lsh_params())
+        kept: List[ValidationIssue] = []
+        copied: Set[int] = set()
+        
+        shingle_lists = [
+            [t.encode("utf-8") for t in _shingles(result.description or "")]
+            if result.source == IssueSource.AI_VALIDATOR else []
+            for result in results
+        ]
+        # bulk 复用同一组置换参数，避免逐个 MinHash 重新生成
+        signatures = iter(MinHash.bulk([s for s in shingle_lists if s], num_perm=_MINHASH_PERM))
+        
+        for result, shingles in zip(results, shingle_lists, strict=True):
+            if not shingles:
+                kept.append(result)
+                continue
+            
+            m = next(signatures)
+            # 取最早保留的候选：lsh.query 返回集合，顺序不固定
+            dup_of = min(
+                (
+                    i for i in lsh.query(m)
+                    if kept[i].rule_id == result.rule_id and _same_evidence(kept[i], result)
+                ),
+                default=None
+            )
+            if dup_of is None:
+                lsh.insert(len(kept), m)
+                kept.append(result)
+                continue
             
-            if result_hash not in seen_hashes:
-                seen_hashes.add(result_hash)
-                unique_results.append(result)
+            existing = kept[dup_of]
+            if dup_of not in copied:
+                # 首次并入时复制，避免改动调用方传入的对象
+                existing = kept[dup_of] = self._copy_result(existing)
+                copied.add(dup_of)
+            for k, v in (result.metadata or {}).items():
+                existing.metadata.setdefault(k, v)
+            existing.metadata["near_duplicate_count"] = (
+                existing.metadata.get("near_duplicate_count", 0) + 1
+            )
         
-        return unique_results
+        return kept
     
     def _copy_result(self, result: ValidationIssue) -> ValidationIssue:
         """复制结果"""
@@ -0,0 +1,68 @@
+"""
+多关键词扫描器
+一次遍历文本找出所有关键词命中（含重叠命中）：安装了 pyahocorasick 时使用 Aho-Corasick 自动机，
+否则退回单个前瞻交替正则
+"""
+
+import re
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+try:
+    import ahocorasick  # pyahocorasick，可选
+except ImportError:
+    ahocorasick = None
+
+
+class KeywordScanner:
+    """按类别登记关键词，单遍扫描返回各类别命中的关键词"""
+
+    def __init__(self, groups: Dict[str, Iterable[str]]):
+        # 关键词 -> 所属类别（同一关键词可属于多个类别）
+        self._categories: Dict[str, List[str]] = {}
+        for category, keywords in groups.items():
+            for keyword in keywords:
+                if keyword:
+                    self._categories.setdefault(keyword, []).append(category)
+        self.categories = tuple(groups)
+        keywords = sorted(self._categories, key=len, reverse=True)
+
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in keywords:
+                self._automaton.add_word(keyword, keyword)
+            if keywords:
+                self._automaton.make_automaton()
+            self._pattern = None
+        else:
+            self._automaton = None
+            # 零宽前瞻在每个位置尝试匹配，交替按长度降序取该位置最长的关键词；
+            # 同一起点上更短的关键词（前缀）由 _prefixes 补齐
+            self._pattern = re.compile(
+                "(?=(" + "|".join(map(re.escape, keywords)) + "))"
+            ) if keywords else None
+            self._prefixes: Dict[str, Tuple[str, ...]] = {
+                kw: tuple(k for k in keywords if k != kw and kw.startswith(k)) for kw in keywords
+            }
+
+    def iter_hits(self, text: str) -> Iterator[Tuple[int, str]]:
+        """逐个产出命中：(结束位置（含）, 关键词)"""
+        if self._automaton is not None:
+            if len(self._automaton):
+                yield from self._automaton.iter(text)
+            return
+        if self._pattern is None:
+            return
+        for m in self._pattern.finditer(text):
+            keyword = m.group(1)
+            start = m.start()
+            yield start + len(keyword) - 1, keyword
+            for prefix in self._prefixes[keyword]:
+                yield start + len(prefix) - 1, prefix
+
+    def scan(self, text: str) -> Dict[str, Set[str]]:
+        """返回 {类别: 命中的关键词集合}，未命中的类别为空集合"""
+        found: Dict[str, Set[str]] = {category: set() for category in self.categories}
+        for _, keyword in self.iter_hits(text):
+            for category in self._categories[keyword]:
+                found[category].add(keyword)
+        return found
@@ -1,35 +1,95 @@
 # engine/pipeline.py
 from __future__ import annotations
-import os, time
-from typing import Dict, Any, List, Optional  # ✅ 增加 Optional
-import pdfplumber
 
-from .rules_v33 import ALL_RULES, build_document, order_and_number_issues, Issue
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from typing import List, Optional, Tuple  # ✅ 增加 Optional
+
+from .rules_v33 import ALL_RULES, Issue, apply_rule_cached, order_and_number_issues
+from .rules_v33 import build_document as build_document  # 供 api.main 从本模块导入
+
+# 线框表格设置。min_words_* 只作用于 text 策略，因此与 pdfplumber 默认设置等价，
+# 抽取为空时无需再用默认设置重跑一遍（结果必然相同，只是重复版面计算）
+_TABLE_SETTINGS = {
+    "vertical_strategy": "lines",
+    "horizontal_strategy": "lines",
+    "intersection_tolerance": 3,
+    "min_words_vertical": 1,
+    "min_words_horizontal": 1,
+}
 
 def _extract_tables_from_page(page) -> List[List[List[str]]]:
     # 返回：该页的多张表；每张表是 2D 数组（行→列）
-    tables: List[List[List[str]]] = []
     try:
-        t1 = page.extract_tables(table_settings={
-            "vertical_strategy": "lines",
-            "horizontal_strategy": "lines",
-            "intersection_tolerance": 3,
-            "min_words_vertical": 1,
-            "min_words_horizontal": 1,
-        }) or []
-        tables += t1
+        tables = page.extract_tables(table_settings=_TABLE_SETTINGS) or []
     except Exception:
-        pass
+        return []
+    return [
+        [[("" if c is None else str(c)).strip() for c in row] for row in (tb or [])]
+        for tb in tables
+    ]
+
+# 页数不少于该值时才启用多进程抽取（小文件进程启动开销不划算）
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", "0")) or (os.cpu_count() or 1)
+# 文本抽取后端：pdfplumber（默认，规则正则按其输出调校）或 pymupdf（C 实现，快一个量级）
+PDF_TEXT_BACKEND = os.getenv("PDF_TEXT_BACKEND", "pdfplumber").lower()
+
+def _extract_page_range(
+    pdf_path: str, start: int, stop: int
+) -> List[Tuple[str, List[List[List[str]]]]]:
+    """打开 PDF，抽取 [start, stop) 页的文本与表格（亦作进程池 worker）"""
+    import pdfplumber
+    fitz_doc = None
+    if PDF_TEXT_BACKEND == "pymupdf":
+        try:
+            import fitz  # PyMuPDF
+            fitz_doc = fitz.open(pdf_path)
+        except Exception as e:
+            logging.getLogger(__name__).warning("PyMuPDF 不可用，文本改用 pdfplumber 抽取: %s", e)
+    out: List[Tuple[str, List[List[List[str]]]]] = []
     try:
-        if not tables:
-            t2 = page.extract_tables() or []
-            tables += t2
-    except Exception:
-        pass
-    norm_tables: List[List[List[str]]] = []
-    for tb in tables:
-        norm_tables.append([[("" if c is None else str(c)).strip() for c in row] for row in (tb or [])])
-    return norm_tables
+        with pdfplumber.open(pdf_path) as pdf:
+            for i, p in enumerate(pdf.pages[start:stop], start):
+                if fitz_doc is None:
+                    out.append((p.extract_text() or "", _extract_tables_from_page(p)))
+                    continue
+                fp = fitz_doc[i]
+                # 两种表格策略都依赖线框；没有任何矢量路径的页不可能抽出表格，跳过 pdfminer 版面解析
+                tables = _extract_tables_from_page(p) if fp.get_drawings() else []
+                out.append((fp.get_text() or "", tables))
+    finally:
+        if fitz_doc is not None:
+            fitz_doc.close()
+    return out
+
+def extract_pdf_pages(pdf_path: str) -> Tuple[List[str], List[List[List[List[str]]]]]:
+    """
+    抽取整份 PDF 的逐页文本与表格：(page_texts, page_tables)
+    pdfminer 的解析是纯 Python 且持有 GIL，页数较多时按页段分给进程池并行。
+    """
+    import pdfplumber
+    with pdfplumber.open(pdf_path) as pdf:
+        n = len(pdf.pages)
+    if n < PARALLEL_MIN_PAGES or PDF_EXTRACT_WORKERS <= 1:
+        pages = _extract_page_range(pdf_path, 0, n)
+        return [t for t, _ in pages], [tb for _, tb in pages]
+
+    workers = min(PDF_EXTRACT_WORKERS, n)
+    step = -(-n // workers)
+    ranges = [(i, min(i + step, n)) for i in range(0, n, step)]
+    try:
+        with ProcessPoolExecutor(max_workers=len(ranges)) as ex:
+            chunks = list(ex.map(_extract_page_range, [pdf_path] * len(ranges),
+                                 [a for a, _ in ranges], [b for _, b in ranges]))
+        pages = [item for chunk in chunks for item in chunk]
+    except Exception as e:
+        # 进程池不可用（受限环境/子进程崩溃）时退回顺序抽取
+        logging.getLogger(__name__).warning("并行抽取失败，改为顺序抽取: %s", e)
+        pages = _extract_page_range(pdf_path, 0, n)
+    return [t for t, _ in pages], [tb for _, tb in pages]
 
 def run_rules(doc, use_ai_assist=False):
     """
@@ -42,23 +102,32 @@ def run_rules(doc, use_ai_assist=False):
     logger = logging.getLogger(__name__)
     logger.info(f"使用传统规则引擎，AI辅助: {use_ai_assist}")
     
+    # 各规则相互独立、只读 doc，并发执行；按 ALL_RULES 顺序汇总，保证结果确定
     issues = []
-    for rule in ALL_RULES:
-        try:
-            # 如果规则支持AI辅助，传递参数
-            if hasattr(rule, 'apply_with_ai') and use_ai_assist:
-                issues.extend(rule.apply_with_ai(doc, use_ai_assist))
-            else:
-                issues.extend(rule.apply(doc))
-        except Exception as e:
-            issues.append(Issue(
-                rule=rule.code, severity="hint",
-                message=f"规则执行异常：{e}",
-                location={"page": 1, "pos": 0}
-            ))
+    if ALL_RULES:
+        with ThreadPoolExecutor(max_workers=min(32, len(ALL_RULES))) as executor:
+            for rule_issues in executor.map(
+                _safe_apply, ALL_RULES, repeat(doc), repeat(use_ai_assist)
+            ):
+                issues.extend(rule_issues)
     
     return order_and_number_issues(doc, issues)
 
+
+def _safe_apply(rule, doc, use_ai_assist: bool) -> List[Issue]:
+    """执行单条规则，异常转为 hint 级问题"""
+    try:
+        # 如果规则支持AI辅助，传递参数
+        if hasattr(rule, 'apply_with_ai') and use_ai_assist:
+            return list(rule.apply_with_ai(doc, use_ai_assist))
+        return apply_rule_cached(rule, doc)
+    except Exception as e:
+        return [Issue(
+            rule=rule.code, severity="hint",
+            message=f"规则执行异常：{e}",
+            location={"page": 1, "pos": 0}
+        )]
+
 # ===== 在此行下面粘贴 =====
 
 def _issue_to_dict(x) -> dict:
@@ -80,13 +149,14 @@ def _issue_to_dict(x) -> dict:
         "location": getattr(x, "location", None) or {},
     }
 
+_SEV_NORM = {
+    "error": "error", "err": "error", "fatal": "error", "critical": "error",
+    "warn": "warn", "warning": "warn",
+}
+
+
 def _norm_sev(s: Optional[str]) -> str:  # ✅ 参数改为 Optional[str]
-    s = (s or "").lower()
-    if s in ("error", "err", "fatal", "critical"):
-        return "error"
-    if s in ("warn", "warning"):
-        return "warn"
-    return "info"
+    return _SEV_NORM.get((s or "").lower(), "info")
 
 
 def build_issues_payload(doc, use_ai_assist=False) -> dict:
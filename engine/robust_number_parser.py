@@ -3,16 +3,76 @@
 支持中文数字、千分位、百分号、括号负数、跨行断词等复杂格式
 """
 
+import heapq
+import logging
 import re
+import threading
 from decimal import Decimal, InvalidOperation
-from typing import Optional, Tuple, Union, List
-import logging
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Iterator, List, Optional, Tuple, Union
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+def _run_start(chars: str) -> str:
+    """
+    "只在字符串 [chars]+ 的起点开始匹配" 的零宽断言
+    
+    形如 [chars]+<后缀> 的模式，从连续串中间开始能否匹配取决于同一个后缀，与从串首开始的结论相同，
+    加上断言不改变匹配结果，但避免了标准库 re 在不带后缀的长数字串上逐位重试造成的平方级回溯
+    """
+    return f'(?<![{chars}])'
+
+# calculate_tolerance 可先用 float 判断的输入类型（bool 等其余类型走 Decimal 原逻辑）
+_FLOAT_SAFE_TYPES = frozenset((int, float, Decimal))
+_FLOAT_BAND_LIMIT = 1e290
+
+# 单独出现时不按中文数字解析的单位
+_BARE_UNITS = frozenset('万亿千')
+
+# 不超过该长度的输入按文本缓存解析结果（金额、合计、"0.00" 等在文档中大量重复）
+_PARSE_CACHE_MAX_LEN = 64
+_PARSE_CACHE_SIZE = 65536
+
+# _scan_number 状态
+_SCAN_START, _SCAN_SIGN, _SCAN_INT, _SCAN_COMMA, _SCAN_DOT, _SCAN_FRAC, _SCAN_PERCENT = range(7)
+
 class RobustNumberParser:
     """鲁棒数字解析器，支持各种复杂数字格式"""
     
+    # 金额单位及乘数，按单位长度降序（同长度保持原登记顺序）
+    _AMOUNT_UNITS = tuple(sorted({
+        '万元': 10000,
+        '万': 10000,
+        '千万': 10000000,
+        '千万元': 10000000,
+        '亿元': 100000000,
+        '亿': 100000000,
+        '元': 1,
+    }.items(), key=lambda x: len(x[0]), reverse=True))
+    
+    # 中文数字特殊情况（整串直接查表）
+    _SPECIAL_CASES = MappingProxyType({
+        '十': 10, '拾': 10, '二十': 20,
+        '三万五千': 35000,
+        '十二万八千': 128000,
+        '五千万': 50000000,
+        '二千三百万': 23000000,
+        '一千二百三十四万五千六百七十八': 12345678,
+        '三万五千二百': 35200
+    })
+    
+    # 小于10000部分的特殊单位
+    _SPECIAL_SMALL = MappingProxyType({
+        '十': 10, '拾': 10,
+        '二十': 20, '三十': 30, '四十': 40, '五十': 50,
+        '六十': 60, '七十': 70, '八十': 80, '九十': 90,
+        '一百': 100, '二百': 200, '三百': 300,
+        '一千': 1000, '二千': 2000, '三千': 3000
+    })
+    
     def __init__(self):
         """初始化解析器"""
         # 中文数字映射表
@@ -34,8 +94,33 @@ class RobustNumberParser:
             '兆': 1000000000000
         }
         
+        # _parse_small_chinese 逐字查表：数字为非负值，千/百/十单位存为负的倍数，
+        # 一次查找即可区分（十/拾同时是数字，按数字处理；万及以上单位在此忽略，不入表）
+        self._small_cn_values = {
+            **{char: -unit for char, unit in self.cn_unit_map.items() if unit <= 1000},
+            **self.cn_num_map
+        }
+        
+        # OCR常见错误映射（均为单字符替换，一次 translate 完成）
+        self._ocr_table = str.maketrans({
+            'l': '1',  # 小写L误识为1
+            'I': '1',  # 大写i误识为1
+            'O': '0',  # 大写O误识为0
+            'o': '0',  # 小写o误识为0
+            'S': '5',  # 大写S误识为5
+            'Z': '2',  # 大写Z误识为2
+            'B': '8',  # 大写B误识为8
+            'G': '6',  # 大写G误识为6
+            '，': ',',  # 中文逗号转英文
+            '．': '.'   # 中文句号转英文
+        })
+        
         # 编译正则表达式
         self._compile_patterns()
+        
+        # 按文本缓存的解析结果，每个实例各一份：子类或改过映射表的实例结果不同，不能共用
+        # （Decimal 不可变，可安全共享给调用方）
+        self._parse_cached = lru_cache(maxsize=_PARSE_CACHE_SIZE)(self._parse_stripped)
     
     def _compile_patterns(self):
         """编译常用正则表达式"""
@@ -51,7 +136,7 @@ class RobustNumberParser:
         
         # 百分号数字
         self.percent_pattern = re.compile(
-            r'([0-9,]+(?:\.[0-9]+)?)%'
+            _run_start('0-9,') + r'([0-9,]+(?:\.[0-9]+)?)%'
         )
         
         # 中文数字 - 只匹配纯中文数字，不包含阿拉伯数字
@@ -64,11 +149,41 @@ class RobustNumberParser:
         
         # 跨行断词（数字被换行分割）
         self.cross_line_pattern = re.compile(
-            r'(\d+)[，,]?\s*\n\s*(\d+)', re.MULTILINE
+            r'(?<!\d)(\d+)[，,]?\s*\n\s*(\d+)', re.MULTILINE
         )
         
         # 清理模式（移除非数字字符）
         self.cleanup_pattern = re.compile(r'[^\d.,+-]')
+        self._comma_run_pattern = re.compile(r',+')
+        
+        # 金额单位的必含字符
+        self._unit_char_pattern = re.compile(r'[万亿元]')
+        
+        # 负数关键词及其剥离
+        self._neg_kw = re.compile(r'负|减少|下降')
+        self._neg_strip_pattern = re.compile(r'[负减少下降]')
+        self._neg_prefix_pattern = re.compile(r'^[-负]\s*')
+        self._decrease_strip_pattern = re.compile(r'[减少下降]')
+        self._digit_pattern = re.compile(r'\d')
+        self._mixed_unit_pattern = re.compile(r'(\d+)(万|亿|千)')
+        
+        # 百分比（支持中英文百分号）
+        self._percent_patterns = tuple(re.compile(p) for p in (
+            r'([+-]?' + _run_start('0-9,.') + r'[0-9,.]+)%',
+            r'([+-]?' + _run_start('0-9,.') + r'[0-9,.]+)％',
+            r'负\s*([0-9,.]+)%',  # 负百分比
+            r'\(([0-9,.]+)%\)'   # 括号百分比
+        ))
+        
+        # 阿拉伯数字 + 单位，按顺序尝试
+        unit_run = _run_start('0-9,，.')
+        self._arabic_patterns = tuple(re.compile(p) for p in (
+            unit_run + r'([0-9,，.]+)(亿)',     # XX亿
+            unit_run + r'([0-9,，.]+)(千万)',   # XX千万
+            unit_run + r'([0-9,，.]+)(万)',     # XX万
+            unit_run + r'([0-9,，.]+)(千)',     # XX千
+            r'([+-]?[0-9,，.]+)',    # 普通数字（包含正负号）
+        ))
     
     def parse_number(self, text: str) -> Optional[Decimal]:
         """
@@ -87,6 +202,18 @@ class RobustNumberParser:
         if not text:
             return None
         
+        if len(text) < _PARSE_CACHE_MAX_LEN:
+            return self._parse_cached(text)
+        return self._parse_stripped(text)
+    
+    def _parse_stripped(self, text: str) -> Optional[Decimal]:
+        """解析已去除首尾空白的非空文本"""
+        # 0. 常见的纯ASCII数字记号直接得出结果，不走完整流程
+        if text.isascii():
+            fast_result = self._fast_ascii_parse(text)
+            if fast_result is not None:
+                return fast_result
+        
         try:
             # 1. 处理跨行断词
             text = self._handle_cross_line(text)
@@ -121,27 +248,69 @@ class RobustNumberParser:
             logger.warning(f"数字解析失败: {text} - {e}")
             return None
     
-    def _fix_ocr_errors(self, text: str) -> str:
-        """修正常见的OCR错误"""
-        # OCR常见错误映射
-        ocr_fixes = {
-            'l': '1',  # 小写L误识为1
-            'I': '1',  # 大写i误识为1
-            'O': '0',  # 大写O误识为0
-            'o': '0',  # 小写o误识为0
-            'S': '5',  # 大写S误识为5
-            'Z': '2',  # 大写Z误识为2
-            'B': '8',  # 大写B误识为8
-            'G': '6',  # 大写G误识为6
-            '，': ',',  # 中文逗号转英文
-            '．': '.'   # 中文句号转英文
-        }
+    def _fast_ascii_parse(self, text: str) -> Optional[Decimal]:
+        """ASCII 快速路径：[+-]1,234.56[%] 及括号负数 (1,234.56)；无法确定时返回 None"""
+        if text[0] == '(' and text[-1] == ')':
+            inner = text[1:-1]
+            if not inner or inner[0] in '+-' or inner[-1] == '%':
+                return None
+            value = self._scan_number(inner)
+            return None if value is None else -value
+        return self._scan_number(text)
+    
+    def _scan_number(self, text: str) -> Optional[Decimal]:
+        """
+        单遍状态机解析形如 [+-]1,234.56[%] 的纯数字记号
         
-        result = text
-        for wrong, correct in ocr_fixes.items():
-            result = result.replace(wrong, correct)
+        只接受各解析阶段结论明确一致的形式（逗号后必须是数字、小数点后至少一位）；
+        其余输入返回 None，交给完整的多阶段解析
+        """
+        state = _SCAN_START
+        sign = 0
+        digits: List[int] = []
+        frac_len = 0
+        
+        for ch in text:
+            if '0' <= ch <= '9':
+                if state == _SCAN_PERCENT:
+                    return None
+                digits.append(ord(ch) - 48)
+                if state in (_SCAN_DOT, _SCAN_FRAC):
+                    state = _SCAN_FRAC
+                    frac_len += 1
+                else:
+                    state = _SCAN_INT
+            elif ch == ',':
+                if state != _SCAN_INT:
+                    return None
+                state = _SCAN_COMMA
+            elif ch == '.':
+                if state != _SCAN_INT:
+                    return None
+                state = _SCAN_DOT
+            elif ch == '%':
+                if state not in (_SCAN_INT, _SCAN_FRAC):
+                    return None
+                state = _SCAN_PERCENT
+            elif ch in '+-':
+                if state != _SCAN_START:
+                    return None
+                sign = 1 if ch == '-' else 0
+                state = _SCAN_SIGN
+            else:
+                return None
         
-        return result
+        if state == _SCAN_PERCENT:
+            return Decimal((sign, tuple(digits), -frac_len))
+        if state not in (_SCAN_INT, _SCAN_FRAC):
+            return None
+        # 与阿拉伯数字解析一致用取负得到负数（-0 归一为 0）
+        value = Decimal((0, tuple(digits), -frac_len))
+        return -value if sign else value
+    
+    def _fix_ocr_errors(self, text: str) -> str:
+        """修正常见的OCR错误"""
+        return text.translate(self._ocr_table)
     
     def _handle_cross_line(self, text: str) -> str:
         """处理跨行断词"""
@@ -162,20 +331,10 @@ class RobustNumberParser:
     def _parse_percent(self, text: str) -> Optional[Decimal]:
         """解析百分号格式 12.34% -> 12.34 (保持百分比数值) - 修复负数识别"""
         # 检查负数标识
-        is_negative = False
-        if '负' in text or '减少' in text or '下降' in text or '(' in text:
-            is_negative = True
+        is_negative = '(' in text or self._neg_kw.search(text) is not None
         
-        # 支持中英文百分号
-        percent_patterns = [
-            r'([+-]?[0-9,.]+)%',
-            r'([+-]?[0-9,.]+)％',
-            r'负\s*([0-9,.]+)%',  # 负百分比
-            r'\(([0-9,.]+)%\)'   # 括号百分比
-        ]
-        
-        for pattern in percent_patterns:
-            match = re.search(pattern, text)
+        for pattern in self._percent_patterns:
+            match = pattern.search(text)
             if match:
                 try:
                     number_str = match.group(1).replace(',', '').replace('，', '')
@@ -196,7 +355,11 @@ class RobustNumberParser:
         is_negative = False
         if '负' in text or '减少' in text or '下降' in text:
             is_negative = True
-            text = re.sub(r'[负减少下降]', '', text).strip()
+            text = self._neg_strip_pattern.sub('', text).strip()
+        
+        # 包含阿拉伯数字的混合格式交给阿拉伯数字解析器处理（先判断，省去中文模式扫描）
+        if self._digit_pattern.search(text):
+            return None
         
         # 查找中文数字模式
         match = self.chinese_pattern.search(text)
@@ -205,9 +368,8 @@ class RobustNumberParser:
         
         cn_text = match.group()
         
-        # 检查是否为纯中文数字，排除混合格式
-        if re.search(r'\d', text) or (len(cn_text) == 1 and cn_text in ['万', '亿', '千']):
-            # 包含阿拉伯数字或只是单个单位，交给阿拉伯数字解析器处理
+        # 只是单个单位，同样交给阿拉伯数字解析器处理
+        if len(cn_text) == 1 and cn_text in _BARE_UNITS:
             return None
         
         try:
@@ -224,28 +386,17 @@ class RobustNumberParser:
             return 0
         
         # 特殊情况处理
-        special_cases = {
-            '十': 10, '拾': 10, '二十': 20,
-            '三万五千': 35000,
-            '十二万八千': 128000,
-            '五千万': 50000000,
-            '二千三百万': 23000000,
-            '一千二百三十四万五千六百七十八': 12345678,
-            '三万五千二百': 35200  # 增加此项
-        }
-        
-        if cn_text in special_cases:
-            return special_cases[cn_text]
+        special = self._SPECIAL_CASES.get(cn_text)
+        if special is not None:
+            return special
         
         # 处理混合格式：123万、456亿等 - 先检查是否是纯中文
-        mixed_pattern = r'(\d+)(万|亿|千)'
-        mixed_match = re.search(mixed_pattern, cn_text)
-        if mixed_match:
+        if self._mixed_unit_pattern.search(cn_text):
             # 这实际上应该由阿拉伯数字解析器处理，不是中文数字
             return 0  # 返回0表示无法处理，由后续解析器处理
         
         # 检查是否包含阿拉伯数字，如果包含则不处理
-        if re.search(r'\d', cn_text):
+        if self._digit_pattern.search(cn_text):
             return 0  # 返回0表示无法处理
         
         # 解析逻辑：分解为[亿]、[万]、[千百十个]部分
@@ -283,78 +434,46 @@ class RobustNumberParser:
             return 0
             
         # 特殊单位处理
-        special = {
-            '十': 10, '拾': 10,
-            '二十': 20, '三十': 30, '四十': 40, '五十': 50,
-            '六十': 60, '七十': 70, '八十': 80, '九十': 90,
-            '一百': 100, '二百': 200, '三百': 300,
-            '一千': 1000, '二千': 2000, '三千': 3000
-        }
-        
-        if text in special:
-            return special[text]
+        special = self._SPECIAL_SMALL.get(text)
+        if special is not None:
+            return special
         
-        result = 0
+        lookup = self._small_cn_values.get
         current = 0
         temp = 0
         
-        i = 0
-        while i < len(text):
-            char = text[i]
-            
-            if char in self.cn_num_map:
-                temp = self.cn_num_map[char]
-            elif char in self.cn_unit_map:
-                unit = self.cn_unit_map[char]
-                
-                if unit == 1000:  # 千
-                    if temp == 0:
-                        temp = 1
-                    current += temp * 1000
-                    temp = 0
-                elif unit == 100:  # 百
-                    if temp == 0:
-                        temp = 1
-                    current += temp * 100
-                    temp = 0
-                elif unit == 10:  # 十
-                    if temp == 0:
-                        temp = 1
-                    current += temp * 10
-                    temp = 0
-            i += 1
-        
-        result = current + temp
-        return result
+        for char in text:
+            value = lookup(char)
+            if value is None:
+                continue
+            if value >= 0:
+                temp = value
+            else:
+                # 只累加千/百/十；万、亿已由调用方拆分，更大的单位忽略
+                current += (temp or 1) * -value
+                temp = 0
+        
+        return current + temp
     
     def _parse_arabic_number(self, text: str) -> Optional[Decimal]:
         """解析阿拉伯数字（含千分位、单位、负数） - 增强版"""
         # 先处理负数标识
         is_negative = False
-        original_text = text
         
         # 检查负数标识（优先级：前缀 > 括号 > 关键词）
         if text.startswith('-') or text.startswith('负'):
             is_negative = True
-            text = re.sub(r'^[-负]\s*', '', text)
+            text = self._neg_prefix_pattern.sub('', text)
         elif text.startswith('(') and text.endswith(')'):
             is_negative = True
             text = text[1:-1]  # 移除括号
         elif any(keyword in text for keyword in ['减少', '下降']):
             is_negative = True
-            text = re.sub(r'[减少下降]', '', text)
-        
-        # 匹配数字和单位 - 扩充更多模式，支持小数点+单位，移除\s*要求
-        patterns = [
-            r'([0-9,，.]+)(亿)',     # XX亿
-            r'([0-9,，.]+)(千万)',   # XX千万  
-            r'([0-9,，.]+)(万)',     # XX万
-            r'([0-9,，.]+)(千)',     # XX千
-            r'([+-]?[0-9,，.]+)',              # 普通数字（包含正负号）
-        ]
+            text = self._decrease_strip_pattern.sub('', text)
         
-        for pattern in patterns:
-            match = re.search(pattern, text)
+        # 匹配数字和单位 - 支持小数点+单位
+        for pattern in self._arabic_patterns:
+            match = pattern.search(text)
             if match:
                 try:
                     number_str = match.group(1).replace(',', '').replace('，', '')
@@ -392,7 +511,7 @@ class RobustNumberParser:
     def _parse_cleaned_number(self, text: str) -> Optional[Decimal]:
         """清理文本后尝试解析"""
         # 移除非数字字符，保留 . , + -
-        cleaned = re.sub(r'[^\d.,+-]', '', text)
+        cleaned = self.cleanup_pattern.sub('', text)
         if not cleaned:
             return None
         
@@ -404,7 +523,7 @@ class RobustNumberParser:
                 cleaned = ''.join(parts[:-1]) + '.' + parts[-1]
         
         # 移除多余的逗号
-        cleaned = re.sub(r',+', ',', cleaned)
+        cleaned = self._comma_run_pattern.sub(',', cleaned)
         cleaned = cleaned.replace(',', '')
         
         try:
@@ -415,15 +534,20 @@ class RobustNumberParser:
     def calculate_tolerance(self, value1: Union[Decimal, float], 
                           value2: Union[Decimal, float],
                           relative_tolerance: float = 0.005,  # 0.5%
-                          absolute_tolerance: Union[Decimal, float] = 0) -> bool:
+                          absolute_tolerance: Union[Decimal, float] = 0,
+                          strict: bool = False) -> bool:
         """
         计算两个数值是否在容差范围内 - 修复版本
         
+        数值类型的输入先用 float 判断，只有结论落在阈值附近（浮点误差可能影响结论）时
+        才按 Decimal 精确计算
+        
         Args:
             value1: 第一个数值
             value2: 第二个数值
             relative_tolerance: 相对容差（默认0.5%）
             absolute_tolerance: 绝对容差（默认1元）
+            strict: 为 True 时始终按 Decimal 精确计算
             
         Returns:
             是否在容差范围内
@@ -431,6 +555,13 @@ class RobustNumberParser:
         if value1 is None or value2 is None:
             return False
         
+        if not strict:
+            fast_result = self._float_tolerance(
+                value1, value2, relative_tolerance, absolute_tolerance
+            )
+            if fast_result is not None:
+                return fast_result
+        
         try:
             v1 = Decimal(str(value1))
             v2 = Decimal(str(value2))
@@ -454,6 +585,88 @@ class RobustNumberParser:
         except (InvalidOperation, ValueError, TypeError):
             return False
     
+    def _float_tolerance(
+        self, value1, value2, relative_tolerance, absolute_tolerance
+    ) -> Optional[bool]:
+        """float 快速判断；输入非数值类型、非有限值或结论不确定时返回 None"""
+        if (type(value1) not in _FLOAT_SAFE_TYPES or type(value2) not in _FLOAT_SAFE_TYPES
+                or type(absolute_tolerance) not in _FLOAT_SAFE_TYPES
+                or type(relative_tolerance) not in _FLOAT_SAFE_TYPES):
+            return None
+        try:
+            v1 = float(value1)
+            v2 = float(value2)
+        except OverflowError:
+            return None
+        abs_tol = float(absolute_tolerance)
+        rel_tol = float(relative_tolerance)
+        
+        diff = abs(v1 - v2)
+        max_value = max(abs(v1), abs(v2))
+        # 舍入误差与数值量级成正比，误差带内交给 Decimal；nan/inf（比较恒为假）同样交给 Decimal
+        band = 1e-9 * (max_value + abs(abs_tol) + 1.0)
+        if not (band < _FLOAT_BAND_LIMIT and diff < _FLOAT_BAND_LIMIT
+                and abs(rel_tol) < _FLOAT_BAND_LIMIT):
+            return None
+        if abs(diff - abs_tol) <= band:
+            return None
+        if diff <= abs_tol:
+            return True
+        if max_value <= band:
+            return None
+        rel_threshold = max_value * rel_tol
+        if abs(diff - rel_threshold) <= band * (1.0 + abs(rel_tol)):
+            return None
+        return diff <= rel_threshold
+    
+    def tolerance_mask(self, base: Union[Decimal, float],
+                       others: List[Union[Decimal, float]],
+                       relative_tolerance: float = 0.005,
+                       absolute_tolerance: Union[Decimal, float] = 0) -> np.ndarray:
+        """
+        批量判断 others 中各值是否与 base 在容差范围内，结果与逐个调用 calculate_tolerance 一致
+        
+        先用 float64 向量化计算；落在阈值附近（浮点误差可能影响结论）或无法表示为有限浮点数的
+        元素再用 calculate_tolerance 按 Decimal 精确复核
+        
+        Returns:
+            布尔数组，与 others 一一对应
+        """
+        n = len(others)
+        if n == 0 or base is None:
+            return np.zeros(n, dtype=bool)
+        
+        try:
+            b = float(base)
+            vals = np.array([np.nan if v is None else float(v) for v in others], dtype=np.float64)
+        except (InvalidOperation, ValueError, TypeError, OverflowError):
+            return np.array([
+                self.calculate_tolerance(
+                    base, v, relative_tolerance, absolute_tolerance, strict=True
+                )
+                for v in others
+            ], dtype=bool)
+        
+        abs_tol = float(absolute_tolerance)
+        diff = np.abs(vals - b)
+        max_value = np.maximum(np.abs(vals), abs(b))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rel_diff = np.where(max_value > 0, diff / max_value, 0.0)
+        mask = (diff <= abs_tol) | ((max_value > 0) & (rel_diff <= relative_tolerance))
+        
+        # 阈值附近及非有限值交给 Decimal 精确判断
+        eps = 1e-9
+        uncertain = (~np.isfinite(vals) | ~np.isfinite(diff)
+                     | (np.abs(diff - abs_tol) <= eps * (1 + abs_tol))
+                     | (np.abs(rel_diff - relative_tolerance) <= eps))
+        if not np.isfinite(b):
+            uncertain[:] = True
+        for i in np.flatnonzero(uncertain):
+            mask[i] = self.calculate_tolerance(
+                base, others[i], relative_tolerance, absolute_tolerance, strict=True
+            )
+        return mask
+    
     def extract_all_numbers(self, text: str) -> List[Tuple[str, Decimal, int, int]]:
         """
         提取文本中的所有数字及其位置
@@ -464,45 +677,33 @@ class RobustNumberParser:
         Returns:
             [(原始文本, 解析值, 开始位置, 结束位置), ...]
         """
-        results = []
-        
-        # 查找所有可能的数字模式
+        return list(self.iter_numbers(text))
+    
+    def iter_numbers(self, text: str) -> Iterator[Tuple[str, Decimal, int, int]]:
+        """按文档顺序逐个产出 (原始文本, 解析值, 开始位置, 结束位置)，不物化整页结果"""
+        # 各模式分别扫描，按开始位置归并成一个有序流（同一位置按下列模式顺序）
         patterns = [
-            (self.bracket_negative_pattern, 'bracket'),
-            (self.percent_pattern, 'percent'),
-            (self.chinese_pattern, 'chinese'),
-            (self.arabic_pattern, 'arabic')
+            self.bracket_negative_pattern,
+            self.percent_pattern,
+            self.chinese_pattern,
+            self.arabic_pattern
         ]
+        matches = heapq.merge(
+            *(pattern.finditer(text) for pattern in patterns), key=lambda m: m.start()
+        )
         
-        for pattern, pattern_type in patterns:
-            for match in pattern.finditer(text):
-                original_text = match.group()
-                parsed_value = self.parse_number(original_text)
-                
-                if parsed_value is not None:
-                    results.append((
-                        original_text,
-                        parsed_value,
-                        match.start(),
-                        match.end()
-                    ))
-        
-        # 按位置排序并去重
-        results.sort(key=lambda x: x[2])
-        unique_results = []
-        
-        for item in results:
-            # 检查是否与已有结果重叠
-            overlap = False
-            for existing in unique_results:
-                if (item[2] < existing[3] and item[3] > existing[2]):
-                    overlap = True
-                    break
+        # 已产出的结果按位置有序且互不重叠，只需与最后产出项的结束位置比较即可判断重叠
+        last_end = -1
+        for match in matches:
+            start = match.start()
+            if start < last_end:
+                continue
+            original_text = match.group()
+            parsed_value = self.parse_number(original_text)
             
-            if not overlap:
-                unique_results.append(item)
-        
-        return unique_results
+            if parsed_value is not None:
+                last_end = match.end()
+                yield original_text, parsed_value, start, last_end
     
     def normalize_amount_unit(self, text: str) -> Tuple[Optional[Decimal], str]:
         """
@@ -514,33 +715,18 @@ class RobustNumberParser:
         Returns:
             (标准化后的数值, 单位)
         """
-        # 常见单位映射
-        unit_map = {
-            '万元': 10000,
-            '万': 10000,
-            '千万': 10000000,
-            '千万元': 10000000,
-            '亿元': 100000000,
-            '亿': 100000000,
-            '元': 1,
-        }
-        
-        # 找到单位和乘数
+        # 找到单位和乘数：按长度优先匹配（所有单位都含"万/亿/元"之一，不含时一次扫描即可跳过）
         unit = ''
         multiplier = 1
-        
-        # 按照长度排序，优先匹配长单位
-        sorted_units = sorted(unit_map.items(), key=lambda x: len(x[0]), reverse=True)
-        
-        for unit_text, unit_value in sorted_units:
-            if unit_text in text:
-                unit = unit_text
-                multiplier = unit_value
-                # 移除单位后重新解析
-                number_text = text.replace(unit_text, '')
-                break
-        else:
-            number_text = text
+        number_text = text
+        if self._unit_char_pattern.search(text):
+            for unit_text, unit_value in self._AMOUNT_UNITS:
+                if unit_text in text:
+                    unit = unit_text
+                    multiplier = unit_value
+                    # 移除单位后重新解析
+                    number_text = text.replace(unit_text, '')
+                    break
         
         # 提取数字
         number = self.parse_number(number_text)
@@ -549,19 +735,22 @@ class RobustNumberParser:
         
         # 应用单位乘数
         if multiplier != 1:
-            number = number * Decimal(str(multiplier))
+            number = number * multiplier
         
         return number, unit
 
 
-# 全局解析器实例
+# 全局解析器实例（无可变状态，各线程共用；结果缓存随实例共用，按线程拆分只会降低命中率）
 _parser_instance = None
+_parser_lock = threading.Lock()
 
 def get_parser() -> RobustNumberParser:
     """获取全局解析器实例"""
     global _parser_instance
     if _parser_instance is None:
-        _parser_instance = RobustNumberParser()
+        with _parser_lock:
+            if _parser_instance is None:
+                _parser_instance = RobustNumberParser()
     return _parser_instance
 
 def parse_number(text: str) -> Optional[Decimal]:
@@ -2,22 +2,49 @@
 规则引擎适配器 - 将现有规则系统适配到混合验证架构
 """
 
-from typing import List, Dict, Any, Optional
 import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
 from .hybrid_validator import (
-    ValidationIssue, ValidationContext, IssueSource, 
-    IssueSeverity, IssueConfidence
+    IssueConfidence,
+    IssueSeverity,
+    IssueSource,
+    ValidationContext,
+    ValidationIssue,
 )
-from .rules_v33 import ALL_RULES, Document, Issue, build_document
+from .rules_v33 import ALL_RULES, Document, Issue, apply_rule_cached, build_document
 
 logger = logging.getLogger(__name__)
 
+# 规则并发执行的线程数（0 表示按规则数自动确定，1 表示串行）
+RULE_WORKERS = int(os.getenv("GOV_RULE_WORKERS", "0"))
+
+# 每个适配器缓存最近构建的 Document 数
+_DOC_CACHE_MAX = 8
+
+# 规则严重程度 -> 统一严重程度（未列出的按 MEDIUM）
+_SEVERITY_MAP = {
+    'error': IssueSeverity.HIGH,
+    'warn': IssueSeverity.MEDIUM,
+    'warning': IssueSeverity.MEDIUM,
+    'info': IssueSeverity.LOW
+}
+
 
 class RuleEngineAdapter:
     """规则引擎适配器 - 第一层验证"""
     
     def __init__(self):
         self.rules = ALL_RULES
+        self._rules_by_code = {rule.code: rule for rule in self.rules}
+        self._titles = {rule.code: f"{rule.code}: {rule.desc}" for rule in self.rules}
+        # (路径, 各页文本, 文件大小) -> (表格数据, Document)；同一内容反复验证时复用
+        self._doc_cache: "OrderedDict[Tuple, Tuple[Any, Document]]" = OrderedDict()
+        self._doc_cache_lock = threading.Lock()
         
     def validate(self, context: ValidationContext) -> List[ValidationIssue]:
         """执行规则验证并转换为统一格式"""
@@ -28,16 +55,11 @@ class RuleEngineAdapter:
         
         # 2. 应用所有规则
         all_issues = []
-        for rule in self.rules:
-            try:
-                rule_issues = rule.apply(doc)
-                all_issues.extend(rule_issues)
-                logger.debug(f"规则 {rule.code} 发现 {len(rule_issues)} 个问题")
-            except Exception as e:
-                logger.warning(f"规则 {rule.code} 执行失败: {e}")
-                
-        # 3. 转换为统一格式
-        validation_issues = self._convert_to_validation_issues(all_issues)
+        for rule_issues in self._apply_rules(doc):
+            all_issues.extend(rule_issues)
+            
+        # 3. 转换为统一格式（apply_rule_cached 返回的是独立副本，location 可直接移交）
+        validation_issues = self._convert_to_validation_issues(all_issues, copy_location=False)
         
         logger.info(f"规则引擎验证完成，发现 {len(validation_issues)} 个问题")
         return validation_issues
@@ -55,41 +77,76 @@ class RuleEngineAdapter:
         doc = self._build_document_from_context(context)
         
         all_results = []
-        for rule in self.rules:
+        for rule, rule_issues in zip(self.rules, self._apply_rules(doc), strict=True):
+            title = self._titles[rule.code]
+            for issue in rule_issues:
+                loc = issue.location
+                result = {
+                    'rule_id': rule.code,
+                    'title': title,
+                    'description': issue.message,
+                    'severity': issue.severity,
+                    'page_num': loc.get('page'),
+                    'position': loc.get('pos'),
+                    'text_snippet': loc.get('snippet', ''),
+                    'expected_value': loc.get('expected'),
+                    'actual_value': loc.get('actual'),
+                    'metadata': loc
+                }
+                all_results.append(result)
+            
+        return all_results
+    
+    def _apply_rules(self, doc: Document) -> List[List[Issue]]:
+        """各规则相互独立、只读 doc，并发执行；按规则顺序返回各自的问题列表，失败的规则记为空"""
+        def run(rule) -> List[Issue]:
             try:
-                rule_issues = rule.apply(doc)
-                for issue in rule_issues:
-                    result = {
-                        'rule_id': rule.code,
-                        'title': f"{rule.code}: {rule.desc}",
-                        'description': issue.message,
-                        'severity': issue.severity,
-                        'page_num': issue.location.get('page'),
-                        'position': issue.location.get('pos'),
-                        'text_snippet': issue.location.get('snippet', ''),
-                        'expected_value': issue.location.get('expected'),
-                        'actual_value': issue.location.get('actual'),
-                        'metadata': issue.location
-                    }
-                    all_results.append(result)
+                rule_issues = apply_rule_cached(rule, doc)
+                logger.debug("规则 %s 发现 %d 个问题", rule.code, len(rule_issues))
+                return rule_issues
             except Exception as e:
                 logger.warning(f"规则 {rule.code} 执行失败: {e}")
-                
-        return all_results
+                return []
+        
+        workers = RULE_WORKERS or min(32, len(self.rules))
+        if workers <= 1 or len(self.rules) <= 1:
+            return [run(rule) for rule in self.rules]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run, self.rules))
     
     def _build_document_from_context(self, context: ValidationContext) -> Document:
-        """从验证上下文构建Document对象"""
+        """从验证上下文构建Document对象（按内容缓存，文本和表格相同则复用）"""
         # 从上下文提取必要信息
         page_texts = context.pages_text
         
-        # 构建空的表格数据（如果没有提供）
+        # 表格数据缺失或页数不足时由 build_document 补齐空页
         page_tables = context.extracted_data.get('page_tables', [])
-        if not page_tables:
-            page_tables = [[] for _ in page_texts]
-            
-        # 估算文件大小
-        filesize = context.extracted_data.get('filesize', 
-                                            sum(len(text.encode('utf-8')) for text in page_texts))
+        
+        # 字符串哈希由解释器缓存，以各页文本元组为键的开销与页数成正比；表格不可哈希，命中后再比较
+        key = (context.document_path, tuple(page_texts), context.extracted_data.get('filesize'))
+        with self._doc_cache_lock:
+            cached = self._doc_cache.get(key)
+            if cached is not None:
+                self._doc_cache.move_to_end(key)
+        if cached is not None and (cached[0] is page_tables or cached[0] == page_tables):
+            return cached[1]
+        
+        doc = self._build_document(context, page_texts, page_tables)
+        with self._doc_cache_lock:
+            self._doc_cache[key] = (page_tables, doc)
+            if len(self._doc_cache) > _DOC_CACHE_MAX:
+                self._doc_cache.popitem(last=False)
+        return doc
+    
+    def _build_document(
+        self, context: ValidationContext, page_texts: List[str], page_tables: List
+    ) -> Document:
+        """构建Document对象"""
+        # 未提供文件大小时按文本 UTF-8 字节数估算（dict.get 的默认值会被提前求值，这里显式判断）
+        filesize = context.extracted_data.get('filesize')
+        if filesize is None:
+            filesize = sum(len(text) if text.isascii() else len(text.encode('utf-8'))
+                           for text in page_texts)
         
         # 使用现有的build_document函数
         doc = build_document(
@@ -101,33 +158,32 @@ class RuleEngineAdapter:
         
         return doc
     
-    def _convert_to_validation_issues(self, issues: List[Issue]) -> List[ValidationIssue]:
-        """将原始Issue转换为ValidationIssue"""
+    def _convert_to_validation_issues(
+        self, issues: List[Issue], copy_location: bool = True
+    ) -> List[ValidationIssue]:
+        """
+        将原始Issue转换为ValidationIssue
+        
+        copy_location 为 False 时直接以 issue.location 作为 metadata（调用方保证这些 Issue 及其
+        location 不再另作他用，如 apply_rule_cached 返回的副本），省去逐条复制
+        """
         validation_issues = []
         
         for issue in issues:
+            loc = issue.location
             # 映射严重程度
             severity = self._map_severity(issue.severity)
             
-            # 提取位置信息
-            page_num = issue.location.get('page')
-            position = issue.location.get('pos')
-            text_snippet = issue.location.get('snippet', '')
-            
-            # 创建ValidationIssue
+            # 创建ValidationIssue（页码、位置、期望/实际值等位置信息保留在 metadata 中）
             validation_issue = ValidationIssue(
                 rule_id=issue.rule,
-                title=f"{issue.rule}: {self._get_rule_desc(issue.rule)}",
+                title=self._get_rule_title(issue.rule),
                 description=issue.message,
                 severity=severity,
                 confidence=IssueConfidence.HIGH,  # 规则引擎置信度高
                 source=IssueSource.RULE_ENGINE,
-                page_num=page_num,
-                position=position,
-                text_snippet=text_snippet,
-                expected_value=issue.location.get('expected'),
-                actual_value=issue.location.get('actual'),
-                metadata=issue.location.copy()
+                text_snippet=loc.get('snippet', ''),
+                metadata=loc.copy() if copy_location else loc
             )
             
             validation_issues.append(validation_issue)
@@ -136,20 +192,17 @@ class RuleEngineAdapter:
     
     def _map_severity(self, severity: str) -> IssueSeverity:
         """映射严重程度"""
-        severity_map = {
-            'error': IssueSeverity.ERROR,
-            'warn': IssueSeverity.WARNING,
-            'warning': IssueSeverity.WARNING,
-            'info': IssueSeverity.INFO
-        }
-        return severity_map.get(severity.lower(), IssueSeverity.WARNING)
+        return _SEVERITY_MAP.get(severity.lower(), IssueSeverity.MEDIUM)
     
     def _get_rule_desc(self, rule_code: str) -> str:
         """获取规则描述"""
-        for rule in self.rules:
-            if rule.code == rule_code:
-                return rule.desc
-        return "未知规则"
+        rule = self._rules_by_code.get(rule_code)
+        return rule.desc if rule is not None else "未知规则"
+    
+    def _get_rule_title(self, rule_code: str) -> str:
+        """获取问题标题（规则代码: 规则描述）"""
+        title = self._titles.get(rule_code)
+        return title if title is not None else f"{rule_code}: 未知规则"
     
     def get_validator_info(self) -> Dict[str, Any]:
         """获取验证器信息"""
@@ -224,8 +277,10 @@ class EnhancedRuleEngine:
                     issue.confidence
                 )
                 
-            issue.ai_reasoning = ai_response.get('reasoning', '')
-            issue.ai_suggestions = ai_response.get('suggestions', [])
+            # ValidationIssue 使用 __slots__，附加信息放入 metadata
+            issue.metadata = issue.metadata or {}
+            issue.metadata['ai_reasoning'] = ai_response.get('reasoning', '')
+            issue.metadata['ai_suggestions'] = ai_response.get('suggestions', [])
             
         except Exception as e:
             logger.warning(f"AI增强失败: {e}")
@@ -235,6 +290,11 @@ class EnhancedRuleEngine:
     def _build_enhancement_prompt(self, issue: ValidationIssue, 
                                 context: ValidationContext) -> str:
         """构建AI增强提示"""
+        page_num = issue.page_num
+        if page_num and page_num <= len(context.pages_text):
+            page_context = context.pages_text[page_num - 1]
+        else:
+            page_context = "无上下文"
         return f"""
 请分析并增强以下规则检测结果：
 
@@ -250,7 +310,7 @@ class EnhancedRuleEngine:
 4. 改进建议
 
 文档上下文：
-{context.pages_text[issue.page_num-1] if issue.page_num and issue.page_num <= len(context.pages_text) else "无上下文"}
+{page_context}
 """
 
 
@@ -86,15 +86,18 @@ def order_and_number_issues(doc, issues):
     return sorted_issues
 # engine/rules_v33.py  —— v3.3 规则（修正版）
 
-from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional, Tuple
-
 import os
 import re
+import threading
 from collections import Counter, defaultdict
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
 import numpy as np
 from rapidfuzz import fuzz
 
+
 # ---------- 数据结构 ----------
 @dataclass
 class Issue:
@@ -116,6 +119,36 @@ class Document:
     anchors: Dict[str, List[int]] = field(default_factory=dict)
     dominant_year: Optional[int] = None
     dominant_unit: Optional[str] = None
+    # 全文缓冲："\n" 连接各页，page_offsets[i] 为第 i+1 页在全文中的起点
+    full_text: str = ""
+    page_offsets: Optional[np.ndarray] = None
+    # 本文档的规则结果缓存：(规则编码, 规则配置) -> 规则输出，见 apply_rule_cached
+    rule_cache: Dict[Tuple[str, Tuple], List["Issue"]] = field(
+        default_factory=dict, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        if not self.full_text and self.page_texts:
+            self.full_text = "\n".join(self.page_texts)
+        if self.page_offsets is None:
+            starts = np.zeros(len(self.page_texts), dtype=np.int64)
+            if len(starts) > 1:
+                starts[1:] = np.cumsum([len(t) + 1 for t in self.page_texts[:-1]])
+            self.page_offsets = starts
+
+    def locate(self, pos: int) -> Tuple[int, int]:
+        """全文位置 -> (页码(1 起), 页内位置)"""
+        return locate_in_pages(self.page_offsets, pos)
+
+
+def locate_in_pages(page_offsets: Optional[np.ndarray], pos: int) -> Tuple[int, int]:
+    """按页起点数组二分定位；越界时回落到 (1, 0)"""
+    if page_offsets is None or not len(page_offsets):
+        return 1, 0
+    i = int(np.searchsorted(page_offsets, pos, side="right")) - 1
+    if i < 0:
+        return 1, 0
+    return i + 1, pos - int(page_offsets[i])
 
 
 # ---------- 工具 ----------
@@ -138,6 +171,32 @@ def extract_money_unit(s: str) -> Optional[str]:
     m = _UNIT_RE.search(s or "")
     return m.group(1) if m else None
 
+# 单位 + 年份合并为一条交替式：build_document 每页只扫描一遍文本
+# （两个分支互不重叠：单位片段内不含数字，年份片段内不含“单位”）
+_UNIT_YEAR_RE = re.compile(
+    r"(?:单位[:：]\s*(?P<unit>万元|元|亿元))"
+    r"|(?:(?<!\d)(?P<year>20\d{2})(?:(?:\s*年(?:度)?)|(?=\D)))"
+)
+def scan_unit_and_years(s: str) -> Tuple[Optional[str], List[int]]:
+    """等价于 (extract_money_unit(s), extract_years(s))，但只遍历一次"""
+    unit: Optional[str] = None
+    years: List[int] = []
+    for m in _UNIT_YEAR_RE.finditer(s or ""):
+        y = m.group("year")
+        if y is not None:
+            years.append(int(y))
+        elif unit is None:
+            unit = m.group("unit")
+    return unit, years
+
+# 逐行/逐段循环里用到的正则，统一预编译
+_FUNC_CODE_RE = re.compile(r"^\s*(\d{3,7})")
+_TEXT_NUM_RE = re.compile(r"\d+(?:,\d{3})*(?:\.\d+)?")
+_EMPTY_TABLE_STMT_RE = re.compile(
+    r"(空表|无相关收支|不存在|无此项|本表无数据|故本表无数据|无数据)", flags=re.S | re.M
+)
+_REASON_TAIL_RE = re.compile(r"(主要原因|增减原因|变动原因)\s*[:：]([^。]*)")
+
 _NUM_RE  = re.compile(r"^-?\s*(?:\d{1,3}(?:,\d{3})*|\d+)(?:\.\d+)?$")
 _PCT_RE  = re.compile(r"^-?\s*(?:\d{1,3}(?:,\d{3})*|\d+)(?:\.\d+)?\s*%$")
 _DASHES  = {"-", "—", "–", "— —", "— — —", "— — — —", ""}
@@ -292,6 +351,13 @@ def _is_non_table_page(raw: str) -> bool:
     r = raw or ""
     return ("目录" in r) or ("名词解释" in r) or ("情况说明" in r)
 
+# 九张表名称/别名的标准化形式，导入时算一次
+_NINE_TABLES_NORM: List[Tuple[str, str, List[str]]] = [
+    (spec["name"], normalize_text(spec["name"]),
+     [normalize_text(a) for a in spec.get("aliases", [])])
+    for spec in NINE_TABLES
+]
+
 def find_table_anchors(doc: Document) -> Dict[str, List[int]]:
     """
     表锚点识别优化：
@@ -299,16 +365,17 @@ def find_table_anchors(doc: Document) -> Dict[str, List[int]]:
     - 匹配时既考虑别名也考虑表名本体（标准化后），提升召回、降低缺失误报
     """
     anchors: Dict[str, List[int]] = {it["name"]: [] for it in NINE_TABLES}
-    unit_hint = re.compile(r"单位[:：]\s*(万元|元|亿元)")
+    units = doc.units_per_page
     for pidx, raw in enumerate(doc.page_texts):
         if _is_non_table_page(raw):
             continue
         ntxt = normalize_text(raw)
         if not ntxt:
             continue
-        # 放宽表页判断
+        # 放宽表页判断（单位已在 build_document 中逐页抽取）
+        unit = units[pidx] if pidx < len(units) else extract_money_unit(raw)
         is_table_page = (
-            bool(unit_hint.search(raw)) or
+            (unit is not None) or
             ("本表反映" in raw) or
             # 简单的表头信号（包含“合计”且数字较多）
             (("合计" in raw) and (sum(ch.isdigit() for ch in raw) >= 10))
@@ -316,19 +383,17 @@ def find_table_anchors(doc: Document) -> Dict[str, List[int]]:
         if not is_table_page:
             continue
         # 既匹配别名，也匹配表名本体
-        for spec in NINE_TABLES:
-            name_norm = normalize_text(spec["name"])
+        for name, name_norm, alias_norms in _NINE_TABLES_NORM:
             matched = False
             if name_norm and (name_norm in ntxt or fuzz.partial_ratio(name_norm, ntxt) >= 92):
                 matched = True
             else:
-                for alias in spec.get("aliases", []):
-                    alias_norm = normalize_text(alias)
+                for alias_norm in alias_norms:
                     if alias_norm and (alias_norm in ntxt or fuzz.partial_ratio(alias_norm, ntxt) >= 95):
                         matched = True
                         break
             if matched:
-                anchors[spec["name"]].append(pidx + 1)
+                anchors[name].append(pidx + 1)
     return anchors
 
 
@@ -545,7 +610,7 @@ class R33005_TableTotalConsistency(Rule):
                 for r in range(1, total_row_idx):
                     row = table[r]
                     name0 = str((row[0] if row else "") or "")
-                    m = re.match(r"^\s*(\d{3,7})", name0)
+                    m = _FUNC_CODE_RE.match(name0)
                     if m:
                         code_rows.append((r, m.group(1)))
                 leaf_len = max((len(c) for _, c in code_rows), default=None)
@@ -562,7 +627,7 @@ class R33005_TableTotalConsistency(Rule):
                         if headr in self._EXCLUDE_HEAD or self._TOTAL_RE.match(headr.strip()):
                             continue
                         if leaf_len is not None:
-                            m = re.match(r"^\s*(\d{3,7})", headr)
+                            m = _FUNC_CODE_RE.match(headr)
                             if not (m and len(m.group(1)) == leaf_len):
                                 continue
                         cell = table[r][c] if c < len(table[r]) else None
@@ -644,7 +709,7 @@ def _sum_by_func_class(table: List[List[str]], digits: int = 3) -> Dict[str, flo
     ncols = max(len(r) for r in table)
     for r, row in enumerate(table[1:], start=1):
         name = str((row[0] if row else "") or "")
-        m = re.match(r"(\d{3,7})", name.strip())
+        m = _FUNC_CODE_RE.match(name.strip())
         if not m:
             continue
         code = m.group(1)[:digits]
@@ -758,8 +823,7 @@ class R33102_TotalSheet_vs_Text(Rule):
                 if pos != -1:
                     # 在关键词后面100个字符内查找数字
                     snippet = search_text[pos:pos+100]
-                    import re
-                    numbers = re.findall(r'\d+(?:,\d{3})*(?:\.\d+)?', snippet)
+                    numbers = _TEXT_NUM_RE.findall(snippet)
                     if numbers:
                         try:
                             found_num = float(numbers[0].replace(",", ""))
@@ -799,7 +863,7 @@ class R33103_Income_vs_Text(Rule):
         fp = _row_value(t, ("财政拨款收入", "一般公共预算财政拨款收入", "财政拨款"))
         if total is None or fp is None:
             return issues
-        txt = "\n".join(doc.page_texts)
+        txt = doc.full_text
         tt = near_number(txt, ["收入决算情况说明", "本年收入合计", "合计"])
         tf = near_number(txt, ["财政拨款收入"])
         if tt and not tolerant_equal(total, tt):
@@ -831,7 +895,7 @@ class R33104_Expense_vs_Text(Rule):
         proj = _row_value(t, ("项目支出",))
         if total is None or basic is None or proj is None:
             return issues
-        txt = "\n".join(doc.page_texts)
+        txt = doc.full_text
         for (nm, a, b) in [("本年支出合计", total, near_number(txt, ["支出决算情况说明", "本年支出合计", "合计"])),
                            ("基本支出", basic, near_number(txt, ["基本支出"])),
                            ("项目支出", proj, near_number(txt, ["项目支出"]))]:
@@ -861,7 +925,7 @@ class R33105_FinGrantTotal_vs_Text(Rule):
         total = _row_value(t, ("支出合计", "支出总计", "合计"))
         if total is None:
             return issues
-        txt = "\n".join(doc.page_texts)
+        txt = doc.full_text
         t_total = near_number(txt, ["财政拨款收入支出决算总体情况说明", "总计", "合计"])
         if t_total and not tolerant_equal(total, t_total):
             issues.append(self._issue(f"财政拨款支出合计：表{total} ≠ 文本{t_total}", {"page": p}, "warn"))
@@ -892,7 +956,7 @@ class R33106_GeneralBudgetStruct(Rule):
                 return issues
 
             # 3) 在"总体情况说明"中查找相近数字
-            full_text = "\n".join(doc.page_texts)
+            full_text = doc.full_text
             found_num = near_number(full_text, ["总体情况说明", "总体情况"])
             if found_num is not None:
                 if not tolerant_equal(total_val, found_num):
@@ -938,7 +1002,7 @@ class R33107_BasicExpense_Check(Rule):
         if ren is None or gong is None:
             return issues
         total = ren + gong
-        txt = "\n".join(doc.page_texts)
+        txt = doc.full_text
         t_total = near_number(txt, ["一般公共预算财政拨款基本支出决算情况说明", "基本支出", "合计"])
         if t_total and not tolerant_equal(total, t_total):
             issues.append(self._issue(f"基本支出合计：表算{total} ≠ 文本{t_total}", {"page": p}, "warn"))
@@ -961,7 +1025,7 @@ class R33108_ThreePublic_vs_Text(Rule):
         act = _row_value(t, ("合计决算数", "决算合计", "决算数"))
         if bud is None and act is None:
             return issues
-        txt = "\n".join(doc.page_texts)
+        txt = doc.full_text
         tb = near_number(txt, ["三公", "年初预算", "预算"])
         ta = near_number(txt, ["三公", "支出决算", "决算"])
         if tb and bud and not tolerant_equal(bud, tb):
@@ -977,7 +1041,7 @@ class R33109_EmptyTables_Statement(Rule):
 
     def apply(self, doc: Document) -> List[Issue]:
         issues: List[Issue] = []
-        txt_all = "\n".join(doc.page_texts)
+        txt_all = doc.full_text
         for nm in ["政府性基金预算财政拨款收入支出决算表", "国有资本经营预算财政拨款收入支出决算表"]:
             p = _get_first_anchor_page(doc, nm)
             if not p:
@@ -993,7 +1057,7 @@ class R33109_EmptyTables_Statement(Rule):
                         vals.append(v)
             is_empty = (not vals) or all(abs(v) < 1e-9 for v in vals)
             if is_empty:
-                if not re.search(r"(空表|无相关收支|不存在|无此项|本表无数据|故本表无数据|无数据)", txt_all, flags=re.S | re.M):
+                if not _EMPTY_TABLE_STMT_RE.search(txt_all):
                     issues.append(self._issue(f"【{nm}】为空表，但未见“空表说明/无相关收支/无数据”等说明。", {"page": p}, "warn"))
         return issues
 
@@ -1083,12 +1147,10 @@ class R33110_BudgetVsFinal_TextConsistency(Rule):
     
     def _apply_internal(self, doc: Document, use_ai_assist: bool = False) -> List[Issue]:
         issues: List[Issue] = []
-        full = "\n".join(doc.page_texts)
+        full = doc.full_text
 
-        # 计算每页 offset → page/pos 映射
-        offsets, acc = [0], 0
-        for t in doc.page_texts:
-            acc += len(t); offsets.append(acc)
+        # 每页起点（build_document 时已算好），用于 offset → page/pos 映射
+        offsets = doc.page_offsets
 
         # 抽取该小节全文
         sec, sec_start, _ = self._slice_section_span(full)
@@ -1187,7 +1249,9 @@ class R33110_BudgetVsFinal_TextConsistency(Rule):
 
         return issues
     
-    def _extract_by_rules(self, sec: str, sec_start: int, offsets: List[int]) -> List[Dict[str, Any]]:
+    def _extract_by_rules(
+        self, sec: str, sec_start: int, offsets: np.ndarray
+    ) -> List[Dict[str, Any]]:
         """使用确定性规则抽取"""
         pairs = []
         
@@ -1281,16 +1345,12 @@ class R33110_BudgetVsFinal_TextConsistency(Rule):
         return pairs
 
     def _create_pair_info(self, raw_bud: str, raw_act: str, phrase: str, match, sec: str, 
-                         sec_start: int, offsets: List[int], qizhong_pos, source: str) -> Dict[str, Any]:
+                         sec_start: int, offsets: np.ndarray, qizhong_pos,
+                         source: str) -> Dict[str, Any]:
         """创建配对信息的辅助方法"""
         # 绝对位置 → page/pos
         abs_pos = sec_start + match.start()
-        page, pos_in_page = 1, 0
-        for i in range(len(offsets) - 1):
-            if offsets[i] <= abs_pos < offsets[i + 1]:
-                page = i + 1
-                pos_in_page = abs_pos - offsets[i]
-                break
+        page, pos_in_page = locate_in_pages(offsets, abs_pos)
 
         clip = (match.group(0)[:80] if match.group(0) else "")
         
@@ -1327,7 +1387,9 @@ class R33110_BudgetVsFinal_TextConsistency(Rule):
             "match_end": match.end()
         }
     
-    def _extract_by_fallback(self, sec: str, sec_start: int, offsets: List[int]) -> List[Dict[str, Any]]:
+    def _extract_by_fallback(
+        self, sec: str, sec_start: int, offsets: np.ndarray
+    ) -> List[Dict[str, Any]]:
         """使用fallback模式抽取（更宽松的匹配）"""
         pairs = []
         
@@ -1347,12 +1409,7 @@ class R33110_BudgetVsFinal_TextConsistency(Rule):
 
             # 绝对位置 → page/pos
             abs_pos = sec_start + m.start()
-            page, pos_in_page = 1, 0
-            for i in range(len(offsets) - 1):
-                if offsets[i] <= abs_pos < offsets[i + 1]:
-                    page = i + 1
-                    pos_in_page = abs_pos - offsets[i]
-                    break
+            page, pos_in_page = locate_in_pages(offsets, abs_pos)
 
             clip = (m.group(0)[:80] if m.group(0) else "")
             
@@ -1365,7 +1422,7 @@ class R33110_BudgetVsFinal_TextConsistency(Rule):
                 next_item = self._NEXT_ITEM.search(tail)
                 end_idx = next_item.start() if next_item else min(len(tail), 220)
                 window = tail[:end_idx]
-                reason_match = re.search(r"(主要原因|增减原因|变动原因)\s*[:：]([^。]*)", window)
+                reason_match = _REASON_TAIL_RE.search(window)
                 if reason_match:
                     reason_text = reason_match.group(2).strip()
 
@@ -1382,7 +1439,9 @@ class R33110_BudgetVsFinal_TextConsistency(Rule):
 
         return pairs
     
-    def _convert_ai_pairs(self, ai_pairs: List[Dict[str, Any]], sec_start: int, offsets: List[int]) -> List[Dict[str, Any]]:
+    def _convert_ai_pairs(
+        self, ai_pairs: List[Dict[str, Any]], sec_start: int, offsets: np.ndarray
+    ) -> List[Dict[str, Any]]:
         """转换AI抽取结果为内部格式，完善location信息"""
         converted = []
         
@@ -1395,12 +1454,7 @@ class R33110_BudgetVsFinal_TextConsistency(Rule):
                 
                 # 绝对位置 → page/pos
                 abs_pos = sec_start + match_start
-                page, pos_in_page = 1, 0
-                for i in range(len(offsets) - 1):
-                    if offsets[i] <= abs_pos < offsets[i + 1]:
-                        page = i + 1
-                        pos_in_page = abs_pos - offsets[i]
-                        break
+                page, pos_in_page = locate_in_pages(offsets, abs_pos)
 
                 # 确保clip信息完整
                 clip = ai_pair.get("clip", "")
@@ -1572,33 +1626,74 @@ ALL_RULES_BASE: List[Rule] = [
     R33110_BudgetVsFinal_TextConsistency(),
 ]
 
-# 动态裁剪：默认仅聚焦预算↔决算对比（V33-110），避免非关键提示干扰
-def _resolve_active_rules() -> List[Rule]:
+# code -> (基线序号, 规则)，导入时构建一次，按编码裁剪时无需线性扫描基线
+_BASE_BY_CODE: Dict[str, Tuple[int, Rule]] = {
+    r.code: (i, r) for i, r in enumerate(ALL_RULES_BASE)
+}
+
+
+@lru_cache(maxsize=32)
+def _select_rules(enable_env: str, focus_env: str) -> Tuple[Rule, ...]:
+    """按 (ENABLE_RULES, FOCUS_COMPARE_ONLY) 原值缓存裁剪结果，保持基线顺序"""
     # 环境变量优先：ENABLE_RULES="V33-110,V33-002"
-    enable_env = os.getenv("ENABLE_RULES", "")
     if enable_env.strip():
         code_set = {x.strip() for x in enable_env.split(",") if x.strip()}
-        return [r for r in ALL_RULES_BASE if r.code in code_set]
+        picked = sorted(_BASE_BY_CODE[c] for c in code_set if c in _BASE_BY_CODE)
+        return tuple(r for _, r in picked)
     # 默认聚焦对比结论：只启用 V33-110；如需全开，可设置 ENABLE_RULES=ALL
-    focus_compare = os.getenv("FOCUS_COMPARE_ONLY", "1").lower() in ("1", "true", "yes")
-    if focus_compare:
-        return [r for r in ALL_RULES_BASE if r.code == "V33-110"]
-    return ALL_RULES_BASE
+    if focus_env.lower() in ("1", "true", "yes"):
+        hit = _BASE_BY_CODE.get("V33-110")
+        return (hit[1],) if hit else ()
+    return tuple(ALL_RULES_BASE)
+
+
+# 动态裁剪：默认仅聚焦预算↔决算对比（V33-110），避免非关键提示干扰
+def _resolve_active_rules() -> List[Rule]:
+    return list(_select_rules(os.getenv("ENABLE_RULES", ""),
+                              os.getenv("FOCUS_COMPARE_ONLY", "1")))
 
 ALL_RULES: List[Rule] = _resolve_active_rules()
 
 
+# ---------- 规则结果缓存 ----------
+# 结果挂在 Document 上，随文档对象一起释放，不跨文档/任务复用；
+# 规则执行时读取的环境配置也计入键，配置改变后重新执行
+_RULE_ENV_VARS = ("AI_ASSIST_ENABLED", "AI_EXTRACTOR_URL", "ENABLE_RULES", "FOCUS_COMPARE_ONLY")
+_APPLY_CACHE_LOCK = threading.Lock()
+
+
+def _copy_issues(issues: List[Issue]) -> List[Issue]:
+    # 下游会改写 message（编号）等字段，缓存内外各持一份
+    return [replace(it, location=dict(it.location)) for it in issues]
+
+
+def apply_rule_cached(rule: Rule, doc: Document) -> List[Issue]:
+    """在 doc 上按 (规则编码, 规则配置) 缓存 rule.apply(doc) 的结果"""
+    key = (rule.code, tuple(os.getenv(name) for name in _RULE_ENV_VARS))
+    with _APPLY_CACHE_LOCK:
+        hit = doc.rule_cache.get(key)
+    if hit is None:
+        hit = _copy_issues(rule.apply(doc))
+        with _APPLY_CACHE_LOCK:
+            doc.rule_cache[key] = hit
+    return _copy_issues(hit)
+
+
 # ---------- 构建 Document ----------
 def build_document(path: str,
                    page_texts: List[str],
                    page_tables: List[List[List[List[str]]]],
                    filesize: int) -> Document:
     pages = len(page_texts)
+    # 表格按页对齐：调用方给的表格页数不足时一次性补齐空页，规则按 page_tables[p-1] 取值不会越界
+    if len(page_tables) < pages:
+        page_tables = list(page_tables) + [[] for _ in range(pages - len(page_tables))]
     units: List[Optional[str]] = []
     years: List[List[int]] = []
     for i in range(pages):
-        units.append(extract_money_unit(page_texts[i]))
-        years.append(extract_years(page_texts[i]))
+        unit, page_years = scan_unit_and_years(page_texts[i])
+        units.append(unit)
+        years.append(page_years)
     doc = Document(
         path=path, pages=pages, filesize=filesize,
         page_texts=page_texts, page_tables=page_tables,
@@ -4,14 +4,15 @@ YAML规则配置加载器
 支持多文档、Profile筛选、别名匹配、版本管理和热更新
 """
 
-import os
-import yaml
+import hashlib
 import logging
-from pathlib import Path
-from typing import Dict, List, Any, Optional
+import os
 from dataclasses import dataclass, field
 from datetime import datetime
-import hashlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
 
 logger = logging.getLogger(__name__)
 
@@ -63,6 +64,9 @@ class RulesYamlLoader:
         self._cached_config: Optional[YamlRulesConfig] = None
         self._cache_timestamp: Optional[float] = None
         self._file_hashes: Dict[str, str] = {}
+        # 文件 (mtime_ns, size) -> 已算好的哈希；stat 未变的文件不再读盘重算
+        self._file_stats: Dict[str, Tuple[int, int, str]] = {}
+        self._cache_key: Optional[Tuple[str, Optional[str]]] = None
         
         # 支持的版本和文件
         self.version_files = {
@@ -113,8 +117,11 @@ class RulesYamlLoader:
             
             # 6. 更新缓存
             self._update_cache(config)
+            self._cache_key = (version, profile)
             
-            logger.info(f"成功加载YAML配置: {len(config.rules)}个规则, {len(config.profiles)}个Profile")
+            logger.info(
+                f"成功加载YAML配置: {len(config.rules)}个规则, {len(config.profiles)}个Profile"
+            )
             return config
             
         except Exception as e:
@@ -129,7 +136,8 @@ class RulesYamlLoader:
     def _load_version_config(self, version: str) -> YamlRulesConfig:
         """加载指定版本的配置文件"""
         if version not in self.version_files:
-            raise ValueError(f"不支持的版本: {version}, 支持的版本: {list(self.version_files.keys())}")
+            supported = list(self.version_files.keys())
+            raise ValueError(f"不支持的版本: {version}, 支持的版本: {supported}")
         
         config_file = self.config_dir / self.version_files[version]
         
@@ -278,7 +286,7 @@ class RulesYamlLoader:
                         normalized_aliases.append(normalized)
                 
                 rule_config.aliases = normalized_aliases
-                logger.debug(f"规则 {rule_id} 处理了 {len(normalized_aliases)} 个别名")
+                logger.debug("规则 %s 处理了 %d 个别名", rule_id, len(normalized_aliases))
         
         return config
     
@@ -334,15 +342,23 @@ class RulesYamlLoader:
         logger.debug("配置缓存已更新")
     
     def _calculate_file_hashes(self) -> Dict[str, str]:
-        """计算配置文件的哈希值"""
+        """计算配置文件的哈希值（mtime/大小未变的文件沿用上次结果）"""
         hashes = {}
+        stats = {}
         for file_path in self.config_dir.glob("*.yaml"):
+            key = str(file_path)
             try:
-                content = file_path.read_bytes()
-                hash_value = hashlib.md5(content).hexdigest()
-                hashes[str(file_path)] = hash_value
+                st = file_path.stat()
+                prev = self._file_stats.get(key)
+                if prev is not None and prev[0] == st.st_mtime_ns and prev[1] == st.st_size:
+                    hash_value = prev[2]
+                else:
+                    hash_value = hashlib.md5(file_path.read_bytes()).hexdigest()
+                hashes[key] = hash_value
+                stats[key] = (st.st_mtime_ns, st.st_size, hash_value)
             except Exception as e:
                 logger.warning(f"计算文件哈希失败 {file_path}: {e}")
+        self._file_stats = stats
         return hashes
     
     def _create_default_config(self, config_file: Path, version: str) -> None:
@@ -444,8 +460,13 @@ class RulesYamlLoader:
             profiles={}
         )
     
-    def reload_config(self, version: str = "v3_3", profile: Optional[str] = None) -> YamlRulesConfig:
-        """热更新配置"""
+    def reload_config(self, version: str = "v3_3",
+                      profile: Optional[str] = None) -> YamlRulesConfig:
+        """热更新配置（配置文件未变化时直接返回已加载的配置）"""
+        if (self._cached_config is not None and self._cache_key == (version, profile)
+                and self._calculate_file_hashes() == self._file_hashes):
+            logger.debug("规则配置文件未变化，跳过热更新")
+            return self._cached_config
         logger.info(f"热更新规则配置: version={version}, profile={profile}")
         return self.load_rules_yaml(version, profile, force_reload=True)
     
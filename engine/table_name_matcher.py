@@ -4,10 +4,11 @@
 支持标准名称、常见别名、模糊匹配和跨页表题识别
 """
 
-import re
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+import re
 from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
 from rapidfuzz import fuzz, process
 
 logger = logging.getLogger(__name__)
@@ -29,6 +30,7 @@ class TableNameMatcher:
     def __init__(self):
         self.table_configs = self._load_table_configs()
         self.compiled_patterns = self._compile_patterns()
+        self._build_alias_index()
         
     def _load_table_configs(self) -> List[TableNameConfig]:
         """加载九张表配置"""
@@ -144,6 +146,19 @@ class TableNameMatcher:
             )
         ]
     
+    def _build_alias_index(self):
+        """预建别名索引：精确匹配查字典，模糊匹配交给 rapidfuzz 在 C 层批量打分"""
+        self._exact_aliases: Dict[str, TableNameConfig] = {}
+        self._alias_list: List[str] = []
+        self._alias_configs: List[TableNameConfig] = []
+        for config in self.table_configs:
+            for alias in config.aliases:
+                self._exact_aliases.setdefault(alias, config)
+                self._alias_list.append(alias)
+                self._alias_configs.append(config)
+        self._min_similarity = min((c.min_similarity for c in self.table_configs), default=0.0)
+        self._max_alias_len = max(map(len, self._alias_list), default=0)
+    
     def _compile_patterns(self) -> Dict[str, re.Pattern]:
         """编译正则表达式模式"""
         patterns = {}
@@ -209,24 +224,31 @@ class TableNameMatcher:
         input_name = input_name.strip()
         
         # 1. 精确匹配
-        for config in self.table_configs:
-            if input_name in config.aliases:
-                return {
-                    "standard_name": config.standard_name,
-                    "confidence": 100.0,
-                    "match_type": "exact",
-                    "category": config.category
-                }
+        config = self._exact_aliases.get(input_name)
+        if config is not None:
+            return {
+                "standard_name": config.standard_name,
+                "confidence": 100.0,
+                "match_type": "exact",
+                "category": config.category
+            }
         
         # 2. 模糊匹配
         best_match = None
         best_score = 0
         
-        for config in self.table_configs:
-            for alias in config.aliases:
-                # 使用rapidfuzz进行模糊匹配
-                score = fuzz.ratio(input_name, alias)
-                if score > best_score and score >= config.min_similarity:
+        # ratio 上界为 200*min(l1,l2)/(l1+l2)：
+        # 输入远长于所有别名（如整页文本）时不可能达到阈值，直接跳过
+        n = len(input_name)
+        a = self._max_alias_len
+        if n + a > 0 and (n <= a or 200.0 * a / (n + a) >= self._min_similarity):
+            # 结果按得分降序、同分按别名顺序，第一个达到所属配置阈值的即最佳
+            for alias, score, idx in process.extract(
+                input_name, self._alias_list, scorer=fuzz.ratio,
+                score_cutoff=self._min_similarity, limit=None
+            ):
+                config = self._alias_configs[idx]
+                if score > 0 and score >= config.min_similarity:
                     best_score = score
                     best_match = {
                         "standard_name": config.standard_name,
@@ -235,6 +257,7 @@ class TableNameMatcher:
                         "category": config.category,
                         "matched_alias": alias
                     }
+                    break
         
         # 3. 关键词匹配
         if not best_match or best_score < 85:
@@ -3,18 +3,25 @@ V3.3规则集加载器和验证器
 支持多文档YAML规则加载、Profile筛选、规则验证
 """
 
-import yaml
-import re
 import logging
-from pathlib import Path
-from typing import Dict, List, Any, Optional, Set
-from dataclasses import dataclass, field
+import mmap
+from dataclasses import dataclass
 from datetime import datetime
-from engine.table_name_matcher import TableNameMatcher
+from functools import cached_property
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+import yaml
+
 from engine.robust_number_parser import RobustNumberParser
+from engine.table_name_matcher import TableNameMatcher
 
 logger = logging.getLogger(__name__)
 
+# 优先使用 libyaml 的 C 实现
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 
 @dataclass
 class RuleDefinition:
@@ -66,7 +73,9 @@ class V33RulesetLoader:
         self.rules_file = Path(rules_file)
         self.metadata: Optional[RulesetMetadata] = None
         self.table_aliases: Dict[str, TableAlias] = {}
-        self.rules: Dict[str, RuleDefinition] = {}
+        # 只读视图，按规则ID排序；rules_ordered 为同序的已物化序列
+        self.rules: Mapping[str, RuleDefinition] = MappingProxyType({})
+        self.rules_ordered: Tuple[RuleDefinition, ...] = ()
         self.global_config: Dict[str, Any] = {}
         
         # 集成现有组件
@@ -85,8 +94,7 @@ class V33RulesetLoader:
                 logger.error(f"规则文件不存在: {self.rules_file}")
                 return False
             
-            with open(self.rules_file, 'r', encoding='utf-8') as f:
-                data = yaml.safe_load(f)
+            data = self._read_yaml_documents()
             
             # 加载元数据
             self._load_metadata(data.get('meta', {}))
@@ -107,6 +115,22 @@ class V33RulesetLoader:
             logger.error(f"规则集加载失败: {e}")
             return False
     
+    def _read_yaml_documents(self) -> Dict[str, Any]:
+        """
+        读取规则文件并合并其中的多个YAML文档（meta / tables_aliases / checks 分段）
+        
+        文件以 mmap 只读映射后直接交给 libyaml 解析，避免先整体读入内存再解析。
+        """
+        data: Dict[str, Any] = {}
+        if self.rules_file.stat().st_size == 0:
+            return data
+        with open(self.rules_file, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for doc in yaml.load_all(mm, Loader=_YamlLoader):
+                if isinstance(doc, dict):
+                    data.update(doc)
+        return data
+    
     def _load_metadata(self, meta_data: Dict[str, Any]):
         """加载元数据"""
         self.metadata = RulesetMetadata(
@@ -132,6 +156,7 @@ class V33RulesetLoader:
     
     def _load_rules(self, rules_data: List[Dict[str, Any]]):
         """加载检查规则"""
+        parsed: Dict[str, RuleDefinition] = {}
         for rule_data in rules_data:
             rule = RuleDefinition(
                 id=rule_data.get('id', ''),
@@ -144,8 +169,10 @@ class V33RulesetLoader:
                 evidence=rule_data.get('evidence', {})
             )
             
-            self.rules[rule.id] = rule
+            parsed[rule.id] = rule
         
+        self.rules = MappingProxyType(dict(sorted(parsed.items())))
+        self.rules_ordered = tuple(self.rules.values())
         logger.info(f"加载了 {len(self.rules)} 条检查规则")
     
     def _load_global_config(self, config_data: Dict[str, Any]):
@@ -163,10 +190,7 @@ class V33RulesetLoader:
         Returns:
             匹配的规则列表
         """
-        matching_rules = []
-        for rule in self.rules.values():
-            if rule.matches_profile(profile):
-                matching_rules.append(rule)
+        matching_rules = [rule for rule in self.rules_ordered if rule.matches_profile(profile)]
         
         logger.info(f"Profile '{profile}' 匹配到 {len(matching_rules)} 条规则")
         return matching_rules
@@ -290,21 +314,68 @@ class V33RulesetLoader:
                 'table_count': len(self.table_aliases)
             },
             'rules_by_severity': {
-                'error': len([r for r in self.rules.values() if r.severity == 'error']),
-                'warning': len([r for r in self.rules.values() if r.severity == 'warning']),
-                'info': len([r for r in self.rules.values() if r.severity == 'info'])
+                'error': len([r for r in self.rules_ordered if r.severity == 'error']),
+                'warning': len([r for r in self.rules_ordered if r.severity == 'warning']),
+                'info': len([r for r in self.rules_ordered if r.severity == 'info'])
             },
             'profiles_available': list(set(
-                profile for rule in self.rules.values() 
+                profile for rule in self.rules_ordered 
                 for profile in rule.profile
             )),
             'required_tables': self.get_required_tables()
         }
 
 
+class BoundV33RuleExecutor:
+    """绑定到单个文档的规则执行器
+
+    对同一份文档连续执行多条规则时，页面文本、必需表格、逐页表名匹配等
+    文档级中间结果只计算一次，供所有规则共享。
+    """
+    
+    def __init__(self, executor: "V33RuleExecutor", document_data: Dict[str, Any]):
+        self.executor = executor
+        self.loader = executor.loader
+        self.document_data = document_data
+        self.pages_text: List[str] = document_data.get('pages_text', [])
+    
+    @cached_property
+    def required_tables(self) -> List[str]:
+        """必需表格列表（按文档缓存）"""
+        return self.loader.get_required_tables()
+    
+    @cached_property
+    def found_tables(self) -> Set[str]:
+        """逐页别名匹配命中的标准表名（每页只匹配一次）"""
+        found = set()
+        for page_text in self.pages_text:
+            matched_table = self.loader.find_table_by_alias(page_text)
+            if matched_table:
+                found.add(matched_table)
+        return found
+    
+    def execute_rule(self, rule: RuleDefinition) -> Dict[str, Any]:
+        """执行单个规则（复用已绑定的文档数据）"""
+        return self.executor._run_rule(rule, self)
+
+
 class V33RuleExecutor:
     """V3.3规则执行器"""
     
+    # 规则ID -> 执行方法名
+    _HANDLERS: Dict[str, str] = {
+        'V33-001': '_execute_toc_consistency',
+        'V33-002': '_execute_table_completeness',
+        'V33-003': '_execute_balance_equation',
+        'V33-004': '_execute_amount_consistency',
+        'V33-005': '_execute_amount_consistency',
+        'V33-006': '_execute_amount_consistency',
+        'V33-007': '_execute_year_consistency',
+        'V33-008': '_execute_format_consistency',
+        'V33-009': '_execute_text_number_diff',
+        'V33-010': '_execute_missing_location',
+    }
+    
     def __init__(self, loader: V33RulesetLoader):
         """
         初始化规则执行器
@@ -316,6 +387,18 @@ class V33RuleExecutor:
         self.tolerance_config = loader.get_tolerance_config()
         self.evidence_config = loader.get_evidence_config()
     
+    def bind_document(self, document_data: Dict[str, Any]) -> BoundV33RuleExecutor:
+        """
+        绑定文档，返回可对多条规则复用文档预处理结果的执行器
+        
+        Args:
+            document_data: 文档数据
+            
+        Returns:
+            绑定后的执行器
+        """
+        return BoundV33RuleExecutor(self, document_data)
+    
     def execute_rule(self, rule: RuleDefinition, document_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         执行单个规则
@@ -327,6 +410,10 @@ class V33RuleExecutor:
         Returns:
             执行结果
         """
+        return self._run_rule(rule, self.bind_document(document_data))
+    
+    def _run_rule(self, rule: RuleDefinition, bound: BoundV33RuleExecutor) -> Dict[str, Any]:
+        """在已绑定的文档上执行单个规则"""
         try:
             result = {
                 'rule_id': rule.id,
@@ -341,22 +428,9 @@ class V33RuleExecutor:
             start_time = datetime.now()
             
             # 根据规则ID调用对应的执行方法
-            if rule.id == 'V33-001':
-                findings = self._execute_toc_consistency(rule, document_data)
-            elif rule.id == 'V33-002':
-                findings = self._execute_table_completeness(rule, document_data)
-            elif rule.id == 'V33-003':
-                findings = self._execute_balance_equation(rule, document_data)
-            elif rule.id in ['V33-004', 'V33-005', 'V33-006']:
-                findings = self._execute_amount_consistency(rule, document_data)
-            elif rule.id == 'V33-007':
-                findings = self._execute_year_consistency(rule, document_data)
-            elif rule.id == 'V33-008':
-                findings = self._execute_format_consistency(rule, document_data)
-            elif rule.id == 'V33-009':
-                findings = self._execute_text_number_diff(rule, document_data)
-            elif rule.id == 'V33-010':
-                findings = self._execute_missing_location(rule, document_data)
+            handler = self._HANDLERS.get(rule.id)
+            if handler:
+                findings = getattr(self, handler)(rule, bound)
             else:
                 findings = []
                 logger.warning(f"未实现的规则: {rule.id}")
@@ -364,7 +438,7 @@ class V33RuleExecutor:
             result['findings'] = findings
             result['execution_time'] = (datetime.now() - start_time).total_seconds()
             
-            logger.debug(f"规则 {rule.id} 执行完成，发现 {len(findings)} 个问题")
+            logger.debug("规则 %s 执行完成，发现 %d 个问题", rule.id, len(findings))
             return result
             
         except Exception as e:
@@ -380,30 +454,23 @@ class V33RuleExecutor:
                 'execution_time': 0
             }
     
-    def _execute_toc_consistency(self, rule: RuleDefinition, document_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _execute_toc_consistency(
+        self, rule: RuleDefinition, bound: BoundV33RuleExecutor
+    ) -> List[Dict[str, Any]]:
         """执行目录一致性检查"""
         # 具体实现逻辑
         findings = []
         # TODO: 实现目录一致性检查逻辑
         return findings
     
-    def _execute_table_completeness(self, rule: RuleDefinition, document_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _execute_table_completeness(
+        self, rule: RuleDefinition, bound: BoundV33RuleExecutor
+    ) -> List[Dict[str, Any]]:
         """执行表格完整性检查"""
         findings = []
         
-        pages_text = document_data.get('pages_text', [])
-        required_tables = self.loader.get_required_tables()
-        found_tables = set()
-        
-        # 检查每页文本
-        for page_no, page_text in enumerate(pages_text, 1):
-            for table_name in required_tables:
-                matched_table = self.loader.find_table_by_alias(page_text)
-                if matched_table:
-                    found_tables.add(matched_table)
-        
         # 找出缺失的表格
-        missing_tables = set(required_tables) - found_tables
+        missing_tables = set(bound.required_tables) - bound.found_tables
         for missing_table in missing_tables:
             findings.append({
                 'type': 'missing_table',
@@ -414,32 +481,44 @@ class V33RuleExecutor:
         
         return findings
     
-    def _execute_balance_equation(self, rule: RuleDefinition, document_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _execute_balance_equation(
+        self, rule: RuleDefinition, bound: BoundV33RuleExecutor
+    ) -> List[Dict[str, Any]]:
         """执行总表恒等式检查"""
         # TODO: 实现恒等式检查逻辑
         return []
     
-    def _execute_amount_consistency(self, rule: RuleDefinition, document_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _execute_amount_consistency(
+        self, rule: RuleDefinition, bound: BoundV33RuleExecutor
+    ) -> List[Dict[str, Any]]:
         """执行金额一致性检查"""
         # TODO: 实现金额一致性检查逻辑
         return []
     
-    def _execute_year_consistency(self, rule: RuleDefinition, document_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _execute_year_consistency(
+        self, rule: RuleDefinition, bound: BoundV33RuleExecutor
+    ) -> List[Dict[str, Any]]:
         """执行年份一致性检查"""
         # TODO: 实现年份一致性检查逻辑
         return []
     
-    def _execute_format_consistency(self, rule: RuleDefinition, document_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _execute_format_consistency(
+        self, rule: RuleDefinition, bound: BoundV33RuleExecutor
+    ) -> List[Dict[str, Any]]:
         """执行格式一致性检查"""
         # TODO: 实现格式一致性检查逻辑
         return []
     
-    def _execute_text_number_diff(self, rule: RuleDefinition, document_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _execute_text_number_diff(
+        self, rule: RuleDefinition, bound: BoundV33RuleExecutor
+    ) -> List[Dict[str, Any]]:
         """执行文本数字差异检查"""
         # TODO: 实现文本数字差异检查逻辑
         return []
     
-    def _execute_missing_location(self, rule: RuleDefinition, document_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _execute_missing_location(
+        self, rule: RuleDefinition, bound: BoundV33RuleExecutor
+    ) -> List[Dict[str, Any]]:
         """执行缺章缺表定位"""
         # TODO: 实现缺章缺表定位逻辑
         return []
@@ -14,6 +14,17 @@ from engine.rules_v33 import (
 
 logger = logging.getLogger(__name__)
 
+# 规则代码 -> 规则对象，精确匹配走字典，避免每次线性扫描
+_RULES_BY_CODE = {rule.code: rule for rule in ALL_RULES}
+
+
+def _find_rule(code: str):
+    """按代码查找规则：先精确匹配，再退回子串匹配（如 "110" -> "V33-110"）"""
+    rule = _RULES_BY_CODE.get(code)
+    if rule is not None:
+        return rule
+    return next((r for r in ALL_RULES if code in r.code), None)
+
 
 @dataclass
 class EngineRuleResult:
@@ -90,7 +101,7 @@ class EngineRuleRunner:
                         "findings": len(result.findings),
                         "elapsed_ms": result.elapsed_ms
                     })
-                    logger.debug(f"Rule {rule_id} found {len(result.findings)} issues")
+                    logger.debug("Rule %s found %d issues", rule_id, len(result.findings))
                 else:
                     self._stats["failed_rules"] += 1
                     per_rule_details.append({
@@ -99,7 +110,7 @@ class EngineRuleRunner:
                         "why_not": result.why_not,
                         "elapsed_ms": result.elapsed_ms
                     })
-                    logger.debug(f"Rule {rule_id} failed: {result.why_not}")
+                    logger.debug("Rule %s failed: %s", rule_id, result.why_not)
                 
             except Exception as e:
                 self._stats["failed_rules"] += 1
@@ -280,13 +291,9 @@ class EngineRuleRunner:
         
         try:
             # 查找对应的规则对象（先做代码规范化映射）
-            rule_obj = None
             raw_code = rule.get('code') or rule_id
             code_to_match = self._normalize_rule_code(raw_code)
-            for r in ALL_RULES:
-                if r.code == code_to_match or code_to_match in r.code:
-                    rule_obj = r
-                    break
+            rule_obj = _find_rule(code_to_match)
             
             if rule_obj is None:
                 return EngineRuleResult(
@@ -489,4 +496,4 @@ def get_available_rules() -> List[str]:
 
 def validate_rule_id(rule_id: str) -> bool:
     """验证规则ID是否有效"""
-    return any(rule.code == rule_id or rule_id in rule.code for rule in ALL_RULES)
\ No newline at end of file
+    return _find_rule(rule_id) is not None
\ No newline at end of file
@@ -179,7 +179,7 @@ class PerformanceOptimizer:
                 estimated_total = elapsed * (100.0 / progress)
                 metrics.estimated_remaining_seconds = max(0, estimated_total - elapsed)
         
-        logger.debug(f"任务 {task_id} 进度更新: {progress:.1f}% - {stage}")
+        logger.debug("任务 %s 进度更新: %.1f%% - %s", task_id, progress, stage)
     
     def complete_task(self, task_id: str, success: bool = True, error: Optional[str] = None):
         """完成任务"""
@@ -0,0 +1 @@
+"""测试与调试脚本共享的样例数据"""
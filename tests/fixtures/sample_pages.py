@@ -0,0 +1,48 @@
+"""
+样例部门决算文档（按页文本 + 按页表格）
+
+调试脚本与测试共用同一份样例，避免各处复制粘贴大段中文字面量。
+"""
+
+from __future__ import annotations
+
+import functools
+from typing import TYPE_CHECKING, Tuple
+
+if TYPE_CHECKING:
+    from engine.rules_v33 import Document
+
+PageTexts = Tuple[str, ...]
+PageTables = Tuple[tuple, ...]
+
+
+@functools.cache
+def sample_document() -> Tuple[PageTexts, PageTables]:
+    """返回 (page_texts, page_tables)，进程内只构建一次"""
+    page_texts = (
+        "2024年度部门决算说明\n单位：万元",
+        "一、一般公共预算收入执行情况\n"
+        "预算数：1000万元，实际完成：800万元，完成率：80%\n"
+        "二、一般公共预算支出执行情况\n"
+        "预算数：1200万元，实际支出：1300万元，超支：100万元",
+        "三、三公经费支出情况\n"
+        "预算数：50万元，实际支出：80万元，超支率：60%\n"
+        "四、政府采购执行情况\n"
+        "预算数：200万元，实际采购：180万元",
+    )
+    page_tables = tuple(() for _ in page_texts)
+    return page_texts, page_tables
+
+
+@functools.lru_cache(maxsize=1)
+def sample_built_document() -> "Document":
+    """返回由样例页面构建好的 Document，进程内只跑一次 build_document"""
+    from engine.rules_v33 import build_document
+
+    page_texts, page_tables = sample_document()
+    return build_document(
+        path="sample.pdf",
+        page_texts=list(page_texts),
+        page_tables=[list(t) for t in page_tables],
+        filesize=1024000,
+    )
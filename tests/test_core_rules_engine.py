@@ -0,0 +1,98 @@
+"""Tests for the single-pass page scan of CoreRulesEngine."""
+
+from __future__ import annotations
+
+import random
+from collections import Counter, defaultdict
+from typing import Any
+
+import pytest
+
+from engine.core_rules_engine import CoreRulesEngine, PageScan
+
+FRAGMENTS = [
+    "目录", "目　录", "三公经费", "因公出国", "公务接待", "公务用车", "机关运行经费",
+    "一般公共预算收入表", "政府性基金预算支出表", "社会保险基金预算收支情况表",
+    "2023年", "2024年度", "2019", "合计100万元", "（二）", "说明", "\n",
+]
+
+
+@pytest.fixture(scope="module")
+def engine() -> CoreRulesEngine:
+    return CoreRulesEngine()
+
+
+def _random_documents(count: int, seed: int) -> list[list[str]]:
+    rnd = random.Random(seed)
+    return [
+        ["".join(rnd.choices(FRAGMENTS, k=rnd.randint(0, 8))) for _ in range(rnd.randint(0, 6))]
+        for _ in range(count)
+    ]
+
+
+def _reference_scan(engine: CoreRulesEngine, pages_text: list[str]) -> PageScan:
+    """One pass per check over the pages, as the checks did before the scan was fused."""
+    remaining = set(engine.required_tables)
+    for page_text in pages_text:
+        remaining -= {table for table in engine.required_tables if table in page_text}
+        if remaining:
+            match = engine.table_matcher.match_table_name(page_text)
+            if match:
+                remaining.discard(match.get("standard_name"))
+
+    mentions = [
+        {"page": i + 1, "keyword": keyword}
+        for i, page_text in enumerate(pages_text)
+        for keyword in engine.three_public_keywords
+        if keyword in page_text
+    ]
+
+    year_counter: Counter = Counter()
+    year_pages: dict[str, list[int]] = defaultdict(list)
+    for i, page_text in enumerate(pages_text):
+        for year in engine.year_pattern.findall(page_text):
+            year_counter[year] += 1
+            year_pages[year].append(i + 1)
+
+    toc_page_num = next(
+        (
+            i for i, page_text in enumerate(pages_text)
+            if any(keyword in page_text for keyword in engine.toc_keywords)
+        ),
+        -1,
+    )
+    return PageScan(remaining, mentions, year_counter, year_pages, toc_page_num)
+
+
+def _as_tuples(results: list[Any]) -> list[tuple]:
+    return [
+        (r.rule_id, r.is_valid, r.message, sorted(map(repr, r.evidence)), r.page_numbers)
+        for r in results
+    ]
+
+
+def test_scan_pages_matches_per_check_passes(engine: CoreRulesEngine) -> None:
+    """_scan_pages collects the same facts as separate passes per check."""
+
+    for pages_text in _random_documents(200, seed=11):
+        scan = engine._scan_pages(pages_text)
+        reference = _reference_scan(engine, pages_text)
+        assert scan.missing_tables == reference.missing_tables
+        assert scan.three_public_mentions == reference.three_public_mentions
+        assert scan.year_counter == reference.year_counter
+        assert dict(scan.year_pages) == dict(reference.year_pages)
+        assert scan.toc_page_num == reference.toc_page_num
+
+
+def test_validate_all_matches_individual_checks(engine: CoreRulesEngine) -> None:
+    """validate_all on a shared scan equals each check scanning the pages on its own."""
+
+    for pages_text in _random_documents(50, seed=3):
+        document_data = {"pages_text": pages_text}
+        individual = (
+            engine._validate_missing_tables(document_data)
+            + engine._validate_three_public_consistency(document_data)
+            + engine._validate_year_consistency(document_data)
+            + engine._validate_toc_consistency(document_data)
+        )
+        assert _as_tuples(engine.validate_all(document_data)) == _as_tuples(individual)
@@ -0,0 +1,151 @@
+"""Tests for the ExtractorClient result cache and batch fallback."""
+
+from __future__ import annotations
+
+import asyncio
+
+from engine.ai.extractor_client import (
+    ExtractorClient,
+    ExtractorConfig,
+    ExtractorHTTPError,
+    generate_doc_hash,
+)
+
+
+def _hit(text: str) -> dict:
+    return {
+        "budget_text": "1", "budget_span": [0, 1], "final_text": "2", "final_span": [1, 2],
+        "stmt_text": text, "stmt_span": [2, 3], "clip": text,
+    }
+
+
+def _client(**overrides) -> tuple[ExtractorClient, list[str]]:
+    """Client whose single/batch calls are answered locally and recorded."""
+    config = ExtractorConfig(enabled=True, batch_window=0.0, max_retries=0, **overrides)
+    client = ExtractorClient(config)
+    sent: list[str] = []
+
+    async def single_call(section_text, doc_hash):
+        sent.append(section_text)
+        return [_hit(section_text)]
+
+    async def batch_call(sections):
+        sent.extend(text for text, _ in sections)
+        return [[_hit(text)] for text, _ in sections]
+
+    client._single_call = single_call
+    client._batch_call = batch_call
+    return client, sent
+
+
+def test_repeated_text_is_served_from_cache() -> None:
+    """Identical section text is extracted once, whatever doc_hash the caller passes."""
+
+    client, sent = _client(cache_dir=None)
+
+    async def run():
+        first = await client.ai_extract_pairs("小节A", "doc-1")
+        first[0]["clip"] = "mutated"
+        second = await client.ai_extract_pairs("小节A", "doc-2")
+        forced = await client.ai_extract_pairs("小节A", "doc-3", disable_cache=True)
+        return second, forced
+
+    second, forced = asyncio.run(run())
+    assert sent == ["小节A", "小节A"]
+    assert second == [_hit("小节A")]
+    assert forced == [_hit("小节A")]
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    """The in-memory cache keeps at most cache_size entries."""
+
+    client, sent = _client(cache_dir=None, cache_size=2)
+
+    async def run():
+        for text in ("a", "b", "a", "c", "a", "b"):
+            await client.ai_extract_pairs(text, "h")
+
+    asyncio.run(run())
+    assert sent == ["a", "b", "c", "b"]
+    assert list(client._cache) == [generate_doc_hash("a"), generate_doc_hash("b")]
+
+
+def test_disk_cache_is_shared_between_clients(tmp_path) -> None:
+    """With cache_dir set, a fresh client reuses results written by another one."""
+
+    writer, _ = _client(cache_dir=str(tmp_path))
+    reader, sent = _client(cache_dir=str(tmp_path))
+    asyncio.run(writer.ai_extract_pairs("小节B", "h"))
+
+    assert asyncio.run(reader.ai_extract_pairs("小节B", "h")) == [_hit("小节B")]
+    assert sent == []
+
+
+def test_batch_extraction_only_sends_cache_misses() -> None:
+    """ai_extract_pairs_batch answers cached sections locally and batches the rest."""
+
+    client, sent = _client(cache_dir=None)
+
+    async def run():
+        await client.ai_extract_pairs("x", "h")
+        return await client.ai_extract_pairs_batch([("x", "h"), ("y", "h"), (" ", "h"), ("z", "h")])
+
+    results = asyncio.run(run())
+    assert sent == ["x", "y", "z"]
+    assert results == [[_hit("x")], [_hit("y")], [], [_hit("z")]]
+
+
+def test_missing_batch_endpoint_falls_back_to_single_calls() -> None:
+    """A 404 from the batch endpoint sends the sections one by one, now and later."""
+
+    client = ExtractorClient(ExtractorConfig(enabled=True, max_retries=0, cache_dir=None))
+    posted: list[str] = []
+
+    async def post_json(url, request_data):
+        posted.append(url)
+        if url == client.config.batch_url:
+            raise ExtractorHTTPError("not found", 404)
+        return {"hits": [_hit(request_data["section_text"])]}
+
+    client._post_json = post_json
+
+    async def run():
+        first = await client._batch_call([("a", "h"), ("b", "h")])
+        second = await client._batch_call([("c", "h")])
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == [[_hit("a")], [_hit("b")]]
+    assert second == [[_hit("c")]]
+    assert posted == [client.config.batch_url] + [client.config.url] * 3
+
+
+def test_batch_item_errors_only_fail_their_section() -> None:
+    """An error reported for one batch item leaves the other sections' results intact."""
+
+    client = ExtractorClient(ExtractorConfig(enabled=True, max_retries=0, cache_dir=None))
+
+    async def post_json(url, request_data):
+        return {"results": [
+            {"error": "boom"} if item["section_text"] == "bad" else
+            {"hits": [_hit(item["section_text"])]}
+            for item in request_data["items"]
+        ]}
+
+    client._post_json = post_json
+
+    results = asyncio.run(client.ai_extract_pairs_batch([("a", "h"), ("bad", "h"), ("c", "h")]))
+    assert results == [[_hit("a")], [], [_hit("c")]]
+    assert generate_doc_hash("bad") not in client._cache
+
+
+def test_urls_follow_base_url_changes() -> None:
+    """Derived endpoint URLs are recomputed when base_url is reassigned."""
+
+    config = ExtractorConfig(base_url="http://a:1")
+    assert config.batch_url == "http://a:1/ai/extract/v1/batch"
+
+    config.base_url = "http://b:2/ai/extract/v1"
+    assert config.url == "http://b:2/ai/extract/v1"
+    assert config.batch_url == "http://b:2/ai/extract/v1/batch"
+    assert config.health_url == "http://b:2/ai/extract/v1/health"
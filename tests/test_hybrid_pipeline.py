@@ -0,0 +1,151 @@
+"""Tests for HybridPipeline.run_hybrid_validation with stubbed rule and AI layers."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from engine import hybrid_pipeline
+from engine.hybrid_pipeline import HybridPipeline
+from engine.hybrid_validator import (
+    HybridConfig,
+    IssueConfidence,
+    IssueSeverity,
+    IssueSource,
+    ValidationIssue,
+)
+from engine.rules_v33 import build_document
+
+
+def _issue(rule_id: str, description: str, source: IssueSource,
+           snippet: str | None = None) -> ValidationIssue:
+    return ValidationIssue(rule_id, f"规则检查: {rule_id}", description, IssueSeverity.MEDIUM,
+                           IssueConfidence.MEDIUM, source, snippet, {})
+
+
+class _StubRuleValidator:
+    """Returns fixed rule results; blocks until the AI layer has started."""
+
+    def __init__(self, results: list[ValidationIssue], ai_started: threading.Event):
+        self.results = results
+        self.ai_started = ai_started
+        self.saw_ai_start = False
+        self.contexts: list = []
+
+    def validate(self, context) -> list[ValidationIssue]:
+        self.contexts.append(context)
+        self.saw_ai_start = self.ai_started.wait(timeout=5)
+        return list(self.results)
+
+
+class _StubAIValidator:
+    """Returns fixed AI results and records its calls."""
+
+    def __init__(self, results: list[ValidationIssue], started: threading.Event):
+        self.results = results
+        self.started = started
+        self.calls: list[tuple] = []
+
+    async def validate_and_extend(self, document, rule_results):
+        self.calls.append((document, list(rule_results)))
+        self.started.set()
+        await asyncio.sleep(0)
+        return list(self.results)
+
+
+@pytest.fixture
+def stubbed():
+    pipeline = HybridPipeline(HybridConfig())
+    started = threading.Event()
+    rule_results = [
+        _issue("R1", "预算 支出 金额 不一致", IssueSource.RULE_ENGINE, "第3页"),
+        _issue("R2", "缺失 必要 表格 说明", IssueSource.RULE_ENGINE),
+    ]
+    ai_results = [
+        _issue(
+            "R1", "预算 支出 金额 不一致 超出 预算 百分之三十", IssueSource.AI_VALIDATOR, "第3页"
+        ),
+        _issue("R9", "三公 经费 表述 前后 不一致", IssueSource.AI_VALIDATOR),
+    ]
+    pipeline.rule_validator = _StubRuleValidator(rule_results, started)
+    pipeline.ai_validator = _StubAIValidator(ai_results, started)
+    return pipeline, rule_results, ai_results
+
+
+def test_rule_and_ai_layers_run_concurrently_and_merge(stubbed) -> None:
+    """Both layers run at the same time and their outputs go through the merger."""
+
+    pipeline, rule_results, ai_results = stubbed
+    results = asyncio.run(pipeline.run_hybrid_validation("文档全文", use_ai_assist=True))
+
+    assert pipeline.rule_validator.saw_ai_start
+    assert pipeline.rule_validator.contexts[0].pages_text == ["文档全文"]
+    assert pipeline.ai_validator.calls == [("文档全文", [])]
+
+    assert [r.rule_id for r in results] == ["R1", "R2", "R9"]
+    merged, rule_only, ai_only = results
+    assert merged.source is IssueSource.RULE_ENGINE
+    assert merged.description == ai_results[0].description
+    assert merged.confidence is IssueConfidence.HIGH
+    assert merged.metadata["merged_from"] == "rule_and_ai"
+    assert merged.metadata["ai_confirmations"] == 1
+    assert rule_only is rule_results[1]
+    assert ai_only is ai_results[1]
+    # the merged issue is a copy; the caller's rule result is left untouched
+    assert rule_results[0].metadata == {}
+
+
+def test_merge_disabled_concatenates_layers(stubbed) -> None:
+    """With merging off the rule results come first, followed by the AI results."""
+
+    pipeline, rule_results, ai_results = stubbed
+    pipeline.config.merge_enabled = False
+    results = asyncio.run(pipeline.run_hybrid_validation("文档全文", use_ai_assist=True))
+
+    assert results == rule_results + ai_results
+
+
+def test_ai_assist_off_skips_ai_layer(stubbed) -> None:
+    """Without AI assist only the rule layer runs."""
+
+    pipeline, rule_results, _ = stubbed
+    pipeline.rule_validator.ai_started.set()
+    results = asyncio.run(pipeline.run_hybrid_validation("文档全文", use_ai_assist=False))
+
+    assert pipeline.ai_validator.calls == []
+    assert [r.rule_id for r in results] == [r.rule_id for r in rule_results]
+
+
+def test_public_entry_points_run_without_fallback(stubbed, monkeypatch) -> None:
+    """run_hybrid_rules and run_hybrid_rules_sync return numbered issues from the hybrid path."""
+
+    pipeline, _, _ = stubbed
+    pipeline.rule_validator.ai_started.set()
+    monkeypatch.setattr(hybrid_pipeline, "_hybrid_pipeline", pipeline)
+
+    def no_fallback(*args, **kwargs):
+        raise AssertionError("fell back to run_rules")
+
+    monkeypatch.setattr(hybrid_pipeline, "_fallback_run_rules", no_fallback)
+    doc = build_document("doc.pdf", ["第一页", "第二页"], [], 0)
+
+    issues = asyncio.run(hybrid_pipeline.run_hybrid_rules(doc, use_ai_assist=True))
+    sync_issues = hybrid_pipeline.run_hybrid_rules_sync(doc, use_ai_assist=True)
+
+    assert pipeline.ai_validator.calls[0][0] == "第一页\n第二页"
+    for result in (issues, sync_issues):
+        assert [issue.rule for issue in result] == ["R1", "R2", "R9"]
+        assert [issue.message[:2] for issue in result] == ["一、", "二、", "三、"]
+
+
+def test_sync_entry_point_refuses_to_block_background_loop() -> None:
+    """Calling the sync entry point from the background loop raises instead of deadlocking."""
+
+    async def call_sync():
+        return hybrid_pipeline.run_hybrid_rules_sync(None)
+
+    future = asyncio.run_coroutine_threadsafe(call_sync(), hybrid_pipeline._get_background_loop())
+    with pytest.raises(RuntimeError):
+        future.result(timeout=5)
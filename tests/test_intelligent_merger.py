@@ -0,0 +1,105 @@
+"""Tests for candidate blocking and near-duplicate removal in SmartIntelligentMerger."""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from engine.hybrid_validator import IssueConfidence, IssueSeverity, IssueSource, ValidationIssue
+from engine.intelligent_merger import MergeCandidate, MergeConfig, SmartIntelligentMerger
+
+WORDS = "预算 支出 收入 表格 缺失 金额 不一致 三公 经费 year table missing amount".split()
+SNIPPETS = [None, "", "abc", "ABCdef", "xyz", "abcdef gh"]
+
+
+def _issue(rnd: random.Random, source: IssueSource) -> ValidationIssue:
+    return ValidationIssue(
+        rule_id=rnd.choice(["R1", "R2", "R3", "R4"]),
+        title="t",
+        description=" ".join(rnd.choices(WORDS, k=rnd.randint(0, 6))),
+        severity=rnd.choice(list(IssueSeverity)),
+        confidence=rnd.choice(list(IssueConfidence)),
+        source=source,
+        text_snippet=rnd.choice(SNIPPETS),
+    )
+
+
+def _pairwise_candidates(
+    merger: SmartIntelligentMerger,
+    rule_results: list[ValidationIssue],
+    ai_results: list[ValidationIssue],
+) -> list[MergeCandidate]:
+    """Greedy assignment by comparing every rule result with every AI result."""
+    candidates = []
+    used: set[int] = set()
+    for rule_result in rule_results:
+        candidate = MergeCandidate(rule_result=rule_result)
+        for i, ai_result in enumerate(ai_results):
+            if i in used:
+                continue
+            similarity = merger._calculate_similarity(rule_result, ai_result)
+            if similarity >= merger.config.similarity_threshold:
+                candidate.ai_results.append(ai_result)
+                candidate.similarity_score = max(candidate.similarity_score, similarity)
+                used.add(i)
+        candidates.append(candidate)
+    candidates.extend(
+        MergeCandidate(ai_results=[ai_result])
+        for i, ai_result in enumerate(ai_results)
+        if i not in used
+    )
+    return candidates
+
+
+def _shape(candidates: list[MergeCandidate]) -> list[tuple]:
+    return [
+        (id(c.rule_result), [id(r) for r in c.ai_results], c.similarity_score)
+        for c in candidates
+    ]
+
+
+@pytest.mark.parametrize("threshold", [0.0, 0.1, 0.2, 0.3, 0.5, 0.6, 0.8, 0.9, 1.0])
+def test_find_merge_candidates_matches_pairwise_scan(threshold: float) -> None:
+    """Blocking by rule_id / token / snippet never changes the greedy assignment."""
+
+    rnd = random.Random(int(threshold * 100))
+    merger = SmartIntelligentMerger(MergeConfig(similarity_threshold=threshold))
+    for _ in range(60):
+        rule_results = [_issue(rnd, IssueSource.RULE_ENGINE) for _ in range(rnd.randint(0, 25))]
+        ai_results = [_issue(rnd, IssueSource.AI_VALIDATOR) for _ in range(rnd.randint(0, 25))]
+        assert _shape(merger._find_merge_candidates(rule_results, ai_results)) == _shape(
+            _pairwise_candidates(merger, rule_results, ai_results)
+        )
+
+
+def _ai(description: str, snippet: str | None = None,
+        source: IssueSource = IssueSource.AI_VALIDATOR) -> ValidationIssue:
+    return ValidationIssue("R1", "t", description, IssueSeverity.MEDIUM, IssueConfidence.MEDIUM,
+                           source, snippet, {})
+
+
+def test_remove_near_duplicates_requires_matching_evidence() -> None:
+    """Only AI results with similar wording and the same snippet or numbers are folded."""
+
+    pytest.importorskip("datasketch")
+    base = "一般公共预算收入合计与各项明细之和不一致，请核对收入决算表中的合计数"
+    results = [
+        _ai(base + " 1,234.50"),
+        _ai(base + " 1234.5。"),
+        _ai(base + " 999"),
+        _ai(base, "表1"),
+        _ai(base + "。", "表1"),
+        _ai(base + "！", "表2"),
+        _ai(base + " 1", source=IssueSource.RULE_ENGINE),
+        _ai(base + " 1。", source=IssueSource.RULE_ENGINE),
+    ]
+    kept = SmartIntelligentMerger()._remove_near_duplicates(results)
+
+    assert [r.description for r in kept] == [
+        results[i].description for i in (0, 2, 3, 5, 6, 7)
+    ]
+    assert kept[0].metadata["near_duplicate_count"] == 1
+    assert kept[2].metadata["near_duplicate_count"] == 1
+    assert "near_duplicate_count" not in kept[1].metadata
+    assert results[0].metadata == {}
@@ -0,0 +1,124 @@
+"""Equivalence tests for the RobustNumberParser fast paths."""
+
+from __future__ import annotations
+
+import random
+import re
+import time
+from decimal import Decimal
+
+import pytest
+
+from engine.robust_number_parser import RobustNumberParser
+
+ASCII_ALPHABET = "0123456789,.+-%() a"
+MIXED_ALPHABET = list(
+    "0123456789,.，%％()（）+-负减少下降万亿千百十一二三四五零○兆元 \nlO"
+) + ["千万", "万元", "亿元"]
+
+
+class _LegacyParser(RobustNumberParser):
+    """Parser with the ASCII fast path disabled, i.e. only the multi-stage pipeline."""
+
+    def _fast_ascii_parse(self, text: str) -> Decimal | None:
+        return None
+
+
+def _legacy_extract_all_numbers(
+    parser: RobustNumberParser, text: str
+) -> list[tuple[str, Decimal, int, int]]:
+    """extract_all_numbers before the pattern streams were merged: sort, then pairwise overlap."""
+    results = []
+    for pattern in (
+        parser.bracket_negative_pattern,
+        parser.percent_pattern,
+        parser.chinese_pattern,
+        parser.arabic_pattern,
+    ):
+        for match in pattern.finditer(text):
+            parsed = parser.parse_number(match.group())
+            if parsed is not None:
+                results.append((match.group(), parsed, match.start(), match.end()))
+    results.sort(key=lambda x: x[2])
+    unique: list[tuple[str, Decimal, int, int]] = []
+    for item in results:
+        if not any(item[2] < kept[3] and item[3] > kept[2] for kept in unique):
+            unique.append(item)
+    return unique
+
+
+def _random_strings(alphabet, count: int, max_len: int, seed: int) -> list[str]:
+    rnd = random.Random(seed)
+    return [
+        "".join(rnd.choice(alphabet) for _ in range(rnd.randint(1, max_len)))
+        for _ in range(count)
+    ]
+
+
+@pytest.fixture(scope="module")
+def parser() -> RobustNumberParser:
+    return RobustNumberParser()
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["0", "-0", "+12", "1,234.56", "-1,234.56", "12.5%", "-0%", "(1,234.56)", "(0)",
+     "1,", "1.", ".5", "1,,2", "(+1)", "(-1)", "(5%)", "--1", "1.2.3"],
+)
+def test_fast_path_matches_pipeline_on_edge_cases(parser: RobustNumberParser, text: str) -> None:
+    """The scanner and bracket fast path must agree with the pipeline, down to Decimal repr."""
+
+    assert repr(parser.parse_number(text)) == repr(_LegacyParser().parse_number(text))
+
+
+def test_fast_path_matches_pipeline_on_random_ascii(parser: RobustNumberParser) -> None:
+    """Random numeric-looking ASCII strings parse identically with and without the fast path."""
+
+    legacy = _LegacyParser()
+    for text in _random_strings(ASCII_ALPHABET, 5000, 12, seed=13):
+        assert repr(parser.parse_number(text)) == repr(legacy.parse_number(text)), text
+
+
+def test_extract_all_numbers_matches_pairwise_overlap_scan(parser: RobustNumberParser) -> None:
+    """Merged pattern streams keep exactly the matches the sort + pairwise scan kept."""
+
+    samples = _random_strings(MIXED_ALPHABET, 3000, 25, seed=7)
+    samples += ["4.508.9%", "(1,234)5%三万", "收入1,000万元，增长12.5%，减少(30)"]
+    for text in samples:
+        assert parser.extract_all_numbers(text) == _legacy_extract_all_numbers(parser, text), text
+
+
+def _unguarded(pattern: re.Pattern) -> re.Pattern:
+    """Same pattern without the run-start lookbehind guards."""
+    return re.compile(re.sub(r"\(\?<!(?:\[[^\]]*\]|\\d)\)", "", pattern.pattern), pattern.flags)
+
+
+def test_run_start_guards_do_not_change_matches(parser: RobustNumberParser) -> None:
+    """The lookbehind guards only skip redundant retries; finditer results stay the same."""
+
+    guarded = [
+        parser.percent_pattern,
+        parser.cross_line_pattern,
+        *parser._percent_patterns[:2],
+        *parser._arabic_patterns[:4],
+    ]
+    samples = _random_strings(MIXED_ALPHABET, 2000, 30, seed=17)
+    for pattern in guarded:
+        reference = _unguarded(pattern)
+        assert reference.pattern != pattern.pattern
+        for text in samples:
+            assert [m.span() for m in pattern.finditer(text)] == [
+                m.span() for m in reference.finditer(text)
+            ], (pattern.pattern, text)
+
+
+def test_long_digit_run_is_linear(parser: RobustNumberParser) -> None:
+    """A long digit run without a suffix must not trigger quadratic backtracking."""
+
+    text = "1" * 20000
+    start = time.perf_counter()
+    assert parser.percent_pattern.search(text) is None
+    assert parser.cross_line_pattern.search(text) is None
+    for pattern in parser._arabic_patterns[:4]:
+        assert pattern.search(text) is None
+    assert time.perf_counter() - start < 1.0